@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -10,6 +11,20 @@ class Settings(BaseSettings):
     # 智谱AI配置
     ZHIPU_API_KEY: str = os.getenv("ZHIPU_API_KEY", "")
     ZHIPU_MODEL: str = os.getenv("ZHIPU_MODEL", "glm-4.6v")
+    ZHIPU_BASE_URL: str = os.getenv("ZHIPU_BASE_URL", "https://open.bigmodel.cn/api/paas/v4/")
+
+    # 模型调用传输模式（http/record/replay），record 录制真实请求，replay 离线回放
+    LLM_TRANSPORT: str = os.getenv("LLM_TRANSPORT", "http")
+    LLM_CASSETTE_DIR: str = os.getenv("LLM_CASSETTE_DIR", "./llm_cassettes")
+    # 回放延迟（秒），recorded 表示使用录制时的实际耗时
+    LLM_REPLAY_LATENCY: Optional[float] = (
+        None if os.getenv("LLM_REPLAY_LATENCY", "recorded") == "recorded"
+        else float(os.getenv("LLM_REPLAY_LATENCY"))
+    )
+    LLM_REPLAY_ERROR_RATE: float = float(os.getenv("LLM_REPLAY_ERROR_RATE", "0"))
+    LLM_REPLAY_CHUNK_SIZE: int = int(os.getenv("LLM_REPLAY_CHUNK_SIZE", "0"))
+    LLM_REPLAY_CHUNK_DELAY: float = float(os.getenv("LLM_REPLAY_CHUNK_DELAY", "0"))
+    LLM_REPLAY_SEED: int = int(os.getenv("LLM_REPLAY_SEED", "0"))
 
     # 阿里云OSS配置
     OSS_ACCESS_KEY_ID: str = os.getenv("OSS_ACCESS_KEY_ID", "")
@@ -17,11 +32,66 @@ class Settings(BaseSettings):
     OSS_ENDPOINT: str = os.getenv("OSS_ENDPOINT", "oss-cn-hangzhou.aliyuncs.com")
     OSS_BUCKET_NAME: str = os.getenv("OSS_BUCKET_NAME", "")
 
+    # 存储后端配置（auto/oss/local），local 由本服务提供签名URL，无需上传
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "auto")
+    STORAGE_SECRET: str = os.getenv("STORAGE_SECRET", "")
+
     # 服务配置
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "./uploads")
     OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "./outputs")
     SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
     SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    # 本服务对外访问地址，用于生成本地存储的签名URL
+    PUBLIC_BASE_URL: str = os.getenv("PUBLIC_BASE_URL", f"http://localhost:{SERVER_PORT}")
+
+    # 分析代理配置（low/medium/high，off 表示直接上传原视频）
+    ANALYSIS_PROXY_PROFILE: str = os.getenv("ANALYSIS_PROXY_PROFILE", "low")
+
+    # 同时执行的视频分析数（单个与批量分析共享）
+    ANALYSIS_CONCURRENCY: int = int(os.getenv("ANALYSIS_CONCURRENCY", "2"))
+
+    # 重新编码导出的并行分块转码：并发进程数（0 表示 CPU 核数）、每块最短时长（秒）
+    TRANSCODE_WORKERS: int = int(os.getenv("TRANSCODE_WORKERS", "0"))
+    TRANSCODE_MIN_CHUNK_SECONDS: float = float(os.getenv("TRANSCODE_MIN_CHUNK_SECONDS", "20"))
+
+    # 分开导出时同时剪切的片段数
+    EXPORT_CUT_WORKERS: int = int(os.getenv("EXPORT_CUT_WORKERS", "4"))
+
+    # 音频预筛配置：只把最有价值的窗口送去LLM分析
+    PREFILTER_ENABLED: bool = os.getenv("PREFILTER_ENABLED", "false").lower() == "true"
+    PREFILTER_WINDOW_SECONDS: float = float(os.getenv("PREFILTER_WINDOW_SECONDS", "60"))
+    PREFILTER_BUDGET_SECONDS: float = float(os.getenv("PREFILTER_BUDGET_SECONDS", "600"))
+    PREFILTER_MIN_ACTIVITY: float = float(os.getenv("PREFILTER_MIN_ACTIVITY", "0.1"))
+
+    # 分析模式（video 上传整段视频，frames 只发送抽取的关键帧图片，two_pass 粗筛后精细分析），模板可单独指定
+    ANALYSIS_MODE: str = os.getenv("ANALYSIS_MODE", "video")
+    # 关键帧抽样：最多帧数、图片宽度、场景检测候选帧率上限、去重阈值（累计场景分数）
+    FRAME_BUDGET: int = int(os.getenv("FRAME_BUDGET", "32"))
+    FRAME_WIDTH: int = int(os.getenv("FRAME_WIDTH", "512"))
+    FRAME_SAMPLE_FPS: float = float(os.getenv("FRAME_SAMPLE_FPS", "2"))
+    FRAME_MIN_CHANGE: float = float(os.getenv("FRAME_MIN_CHANGE", "0.02"))
+    # 两遍分析（two_pass）：粗筛代理档位、精细分析的候选片段数、候选窗口前后扩展（秒）
+    COARSE_PROXY_PROFILE: str = os.getenv("COARSE_PROXY_PROFILE", "coarse")
+    TWO_PASS_CANDIDATES: int = int(os.getenv("TWO_PASS_CANDIDATES", "5"))
+    TWO_PASS_PADDING_SECONDS: float = float(os.getenv("TWO_PASS_PADDING_SECONDS", "10"))
+    # 多模板分析结果合并：重叠时长占较短片段的比例达到该值视为同一片段
+    CLIP_MERGE_OVERLAP: float = float(os.getenv("CLIP_MERGE_OVERLAP", "0.6"))
+
+    # HLS打包配置（码率阶梯格式: 高度:视频码率kbps，逗号分隔）
+    HLS_LADDER: str = os.getenv("HLS_LADDER", "1080:5000,720:2800,480:1400")
+    HLS_SEGMENT_SECONDS: int = int(os.getenv("HLS_SEGMENT_SECONDS", "4"))
+    HLS_AUDIO_BITRATE: str = os.getenv("HLS_AUDIO_BITRATE", "128k")
+    HLS_AUTO_PACKAGE: bool = os.getenv("HLS_AUTO_PACKAGE", "true").lower() == "true"
+
+    # 输出目录空间管理：类别配额（类别:容量，逗号分隔）、全局配额（0 表示不限）
+    DISK_QUOTAS: str = os.getenv("DISK_QUOTAS", "previews:2G,exports:20G,proxies:10G,hls:50G,storage:50G")
+    DISK_QUOTA_TOTAL: str = os.getenv("DISK_QUOTA_TOTAL", "0")
+    DISK_SWEEP_INTERVAL: int = int(os.getenv("DISK_SWEEP_INTERVAL", "600"))
+    DISK_MIN_AGE_SECONDS: float = float(os.getenv("DISK_MIN_AGE_SECONDS", "300"))
+    DISK_TEMP_MAX_AGE_SECONDS: float = float(os.getenv("DISK_TEMP_MAX_AGE_SECONDS", "3600"))
+
+    # 作业追踪采样分析器的采样间隔（秒），仅在请求开启 profile 时生效
+    PROFILE_SAMPLE_INTERVAL: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
 
     # 确保目录存在
     def ensure_dirs(self):
@@ -1,12 +1,22 @@
+import json
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from pathlib import Path
 
-from app.routers import video, clips
+from app.routers import video, clips, events, traces, storage, disk, batches
 from app.config import settings
+from app.services.metrics import (
+    DISK_USAGE_REFRESH_SECONDS,
+    Gauge,
+    directory_size,
+    measure_directory,
+    registry
+)
 
 # 配置日志
 logging.basicConfig(
@@ -73,9 +83,15 @@ def restore_videos_from_uploads():
                     video_info_dict = video_processor.get_video_info(str(file_path))
                     duration = video_info_dict.get('duration', 300)
 
-                    # 计算时间范围
-                    seg_start = seg_index * 300
-                    seg_end = seg_start + duration
+                    # 计算时间范围：优先读取切分时记录的真实边界（对齐关键帧），
+                    # 旧版本切分的分段没有记录，按整段时长估算
+                    manifest_path = file_path.with_suffix(".json")
+                    manifest = {}
+                    if manifest_path.exists():
+                        with open(manifest_path) as f:
+                            manifest = json.load(f)
+                    seg_start = manifest.get("start", seg_index * 300)
+                    seg_end = manifest.get("end", seg_start + duration)
 
                     # 格式化时间
                     start_min = int(seg_start // 60)
@@ -83,12 +99,14 @@ def restore_videos_from_uploads():
                     end_min = int(seg_end // 60)
                     end_sec = int(seg_end % 60)
 
-                    # 查找父视频（第一个非分段视频）
-                    parent_id = None
-                    for v in video_store.values():
-                        if not v.is_segment:
-                            parent_id = v.video_id
-                            break
+                    # 查找父视频：记录中有源文件时取其ID，否则取第一个非分段视频
+                    parent_id = Path(manifest["source"]).stem if manifest.get("source") else None
+                    if parent_id not in video_store:
+                        parent_id = None
+                        for v in video_store.values():
+                            if not v.is_segment:
+                                parent_id = v.video_id
+                                break
 
                     video_info = VideoInfo(
                         video_id=seg_id,
@@ -113,13 +131,39 @@ def restore_videos_from_uploads():
     logger.info(f"Restored {len(video_store)} videos from uploads/segments directory")
 
 
+async def sweep_disk_periodically():
+    """启动时及每隔 DISK_SWEEP_INTERVAL 秒清理输出目录"""
+    while True:
+        try:
+            await asyncio.to_thread(disk.disk_manager.sweep)
+        except Exception as e:
+            logger.error(f"Disk sweep failed: {e}")
+        await asyncio.sleep(settings.DISK_SWEEP_INTERVAL)
+
+
+async def measure_directories_periodically():
+    """在后台线程中定期统计上传和输出目录占用，/metrics 只读取统计结果"""
+    while True:
+        for path in (settings.UPLOAD_DIR, settings.OUTPUT_DIR):
+            try:
+                await asyncio.to_thread(measure_directory, path)
+            except Exception as e:
+                logger.error(f"Measuring {path} failed: {e}")
+        await asyncio.sleep(DISK_USAGE_REFRESH_SECONDS)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时恢复视频记录
     restore_videos_from_uploads()
+    # 恢复记录后再清理孤儿产物，并定期执行磁盘配额
+    sweeper = asyncio.create_task(sweep_disk_periodically())
+    measurer = asyncio.create_task(measure_directories_periodically())
     yield
     # 关闭时清理（如需要）
+    sweeper.cancel()
+    measurer.cancel()
 
 
 app = FastAPI(
@@ -141,6 +185,11 @@ app.add_middleware(
 # 注册路由
 app.include_router(video.router)
 app.include_router(clips.router)
+app.include_router(events.router)
+app.include_router(traces.router)
+app.include_router(storage.router)
+app.include_router(disk.router)
+app.include_router(batches.router)
 
 # 静态文件服务
 uploads_path = Path(settings.UPLOAD_DIR)
@@ -162,6 +211,45 @@ async def root():
     }
 
 
+registry.register(Gauge(
+    "video_store_size", "Videos and segments held in video_store",
+    callback=lambda: {(): len(video.video_store)}
+))
+registry.register(Gauge(
+    "directory_bytes", "Disk usage of the upload and output directories", ["directory"],
+    callback=lambda: {
+        (name,): size
+        for name, size in (
+            ("upload", directory_size(settings.UPLOAD_DIR)),
+            ("output", directory_size(settings.OUTPUT_DIR))
+        )
+        if size is not None
+    }
+))
+
+registry.register(Gauge(
+    "analysis_queue_depth", "Analyses waiting in the global analysis scheduler",
+    callback=lambda: {(): video.analysis_scheduler.queued}
+))
+
+registry.register(Gauge(
+    "disk_category_bytes", "Disk usage of OUTPUT_DIR artifacts by category", ["category"],
+    callback=lambda: {
+        (category,): entry["bytes"]
+        for category, entry in disk.disk_manager.usage()["categories"].items()
+    }
+))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 文本格式指标"""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from enum import Enum
 from datetime import datetime
 
@@ -26,7 +26,10 @@ class ClipInfo(BaseModel):
     highlight_type: str
     score: float = Field(ge=0, le=1)
     thumbnail_url: Optional[str] = None
+    thumbnail_key: Optional[str] = None  # 缩略图对象键，URL过期后据此重新签名
     selected: bool = False
+    template: Optional[str] = None  # 多模板分析时产生该片段的模板
+    template_scores: Dict[str, float] = {}  # 多模板分析时各模板对该片段的评分（含被合并的重复片段）
 
 
 class VideoUploadResponse(BaseModel):
@@ -42,6 +45,7 @@ class VideoStatusResponse(BaseModel):
     video_id: str
     status: VideoStatus
     progress: int = Field(ge=0, le=100)
+    stage: Optional[str] = None
     message: str
     duration: Optional[float] = None
     thumbnail_url: Optional[str] = None
@@ -54,12 +58,82 @@ class ClipsResponse(BaseModel):
     total_count: int
 
 
+class ClipRef(BaseModel):
+    """片段引用（可跨视频）"""
+    video_id: str
+    clip_id: str
+
+
+class ClipBoundaryUpdate(ClipRef):
+    """片段边界修改"""
+    start_seconds: float = Field(ge=0)
+    end_seconds: float = Field(gt=0)
+
+
+class BatchSelectRequest(BaseModel):
+    """批量设置选中状态"""
+    clips: List[ClipRef]
+    selected: bool = True
+
+
+class BatchDeleteRequest(BaseModel):
+    """批量删除片段"""
+    clips: List[ClipRef]
+
+
+class BatchUpdateRequest(BaseModel):
+    """批量修改片段边界"""
+    updates: List[ClipBoundaryUpdate]
+
+
+class BatchClipsResponse(BaseModel):
+    """批量操作响应：受影响视频的最新片段列表"""
+    updated_count: int
+    videos: Dict[str, List[ClipInfo]]
+
+
+class ClipDedupeRequest(BaseModel):
+    """重叠片段去重：suppress 为非极大值抑制，merge 为合并成覆盖并集的片段"""
+    mode: str = Field("suppress", pattern="^(suppress|merge)$")
+    threshold: float = Field(0.5, ge=0, le=1)  # suppress 模式的重叠阈值
+    metric: str = Field("iou", pattern="^(iou|shorter)$")  # 重叠度量：交并比 / 交集占较短片段比例
+    gap: float = Field(0.0, ge=0)  # merge 模式下间隔不超过该秒数的片段也合并
+    apply: bool = False  # 是否用结果替换视频的片段列表，否则只返回预览
+
+
+class ClipDedupeResponse(BaseModel):
+    """去重结果"""
+    video_id: str
+    clips: List[ClipInfo]
+    removed: Dict[str, str]  # 被去除的片段ID -> 保留它的片段ID
+    total_count: int
+    applied: bool
+
+
+class ExportProfile(BaseModel):
+    """多版本导出中的一个输出配置"""
+    resolution: str = Field(pattern="^(480p|720p|1080p|4k)$")
+    crf: int = Field(20, ge=0, le=51)
+    preset: str = "veryfast"
+    audio_bitrate: str = "128k"
+
+
 class ExportRequest(BaseModel):
     """导出请求"""
     clip_ids: List[str]
     format: str = "mp4"
     resolution: str = "1080p"
     merge: bool = True  # 是否合并为单个视频
+    renditions: List[ExportProfile] = []  # 一次解码导出多个版本（合并导出），传入时忽略 resolution 和 merge
+    aspect_ratio: Optional[str] = Field(None, pattern=r"^[1-9]\d*:[1-9]\d*$")  # 重构图导出的宽高比，如 9:16
+
+
+class ExportFile(BaseModel):
+    """导出的单个文件"""
+    index: int
+    clip_ids: List[str]     # 该文件包含的片段
+    rendition: Optional[str] = None  # 多版本导出时的分辨率
+    download_url: str
 
 
 class ExportResponse(BaseModel):
@@ -67,13 +141,49 @@ class ExportResponse(BaseModel):
     export_id: str
     video_id: str
     status: str
-    download_url: Optional[str] = None
+    download_url: Optional[str] = None  # 只有一个文件时的下载链接
+    files: List[ExportFile] = []
     message: str
 
 
 class AnalyzeRequest(BaseModel):
     """分析请求"""
     prompt: Optional[str] = None  # 自定义分析提示词
+    template: Optional[str] = None  # 内置模板名（见 prompts.PROMPT_TEMPLATES），prompt 优先
+    templates: List[str] = []  # 多个内置模板同时分析并合并结果，不能与 prompt/template 同时使用
+    mode: Optional[str] = Field(None, pattern="^(video|frames|two_pass)$")  # 分析模式，不传则取模板默认或服务端配置
+    prefilter: Optional[bool] = None  # 是否启用音频预筛，不传则使用服务端配置
+    profile: bool = False  # 是否对本次分析启用采样分析器
+    priority: int = 0  # 排队优先级，数值越大越先执行
+
+
+class BatchAnalyzeRequest(AnalyzeRequest):
+    """批量分析请求：指定视频ID列表，或指定原视频ID分析其全部分段"""
+    video_ids: List[str] = []
+    parent_video_id: Optional[str] = None
+
+
+class BatchItemStatus(BaseModel):
+    """批量分析中单个视频的状态"""
+    video_id: str
+    status: VideoStatus
+    progress: int
+    stage: Optional[str] = None
+    clip_count: int = 0
+    error_message: Optional[str] = None
+
+
+class BatchStatusResponse(BaseModel):
+    """批量分析的汇总进度与结果"""
+    batch_id: str
+    status: str                   # queued / running / completed / cancelled
+    total: int
+    counts: Dict[str, int]        # 各状态的视频数
+    progress: int                 # 平均进度（0-100）
+    clip_count: int
+    cancelled: bool = False
+    created_at: datetime
+    items: List[BatchItemStatus]
 
 
 class VideoInfo(BaseModel):
@@ -81,8 +191,11 @@ class VideoInfo(BaseModel):
     video_id: str
     filename: str
     file_path: str
-    oss_url: Optional[str] = None
+    oss_url: Optional[str] = None          # 最近一次签发的分析素材URL
+    storage_key: Optional[str] = None      # 已上传分析素材的对象键
     status: VideoStatus = VideoStatus.PENDING
+    progress: int = 0                      # 当前处理进度（0-100）
+    stage: Optional[str] = None            # 当前处理阶段
     duration: Optional[float] = None
     width: Optional[int] = None
     height: Optional[int] = None
@@ -95,5 +208,6 @@ class VideoInfo(BaseModel):
     segment_start: Optional[float] = None  # 分段开始时间（秒）
     segment_end: Optional[float] = None    # 分段结束时间（秒）
     is_segment: bool = False               # 是否为分段
+    analysis_stats: Dict[str, Any] = {}    # 最近一次分析的耗时与流量统计
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
@@ -281,3 +281,27 @@ PRODUCT_HIGHLIGHT_PROMPT = """
 
 只返回JSON，不要其他文字。
 """
+
+# 关键帧模式：附加在提示词前，说明输入为带时间戳的抽帧图片
+FRAME_ANALYSIS_PREAMBLE = """
+以下图片是按时间顺序从同一个视频中抽取的关键帧，每张图片前的 [HH:MM:SS] 是该帧在视频中的时间。
+相邻两帧之间的画面与前一帧基本一致。请根据这些关键帧判断精彩片段，片段的 start_time 和 end_time
+必须使用上述视频时间，并尽量与关键帧时间对齐。
+"""
+
+# 内置模板（名称 -> 提示词）
+PROMPT_TEMPLATES = {
+    "highlight": HIGHLIGHT_DETECTION_PROMPT,
+    "simple": SIMPLE_HIGHLIGHT_PROMPT,
+    "sports": SPORTS_HIGHLIGHT_PROMPT,
+    "funny": FUNNY_HIGHLIGHT_PROMPT,
+    "vlog": VLOG_HIGHLIGHT_PROMPT,
+    "knowledge": KNOWLEDGE_HIGHLIGHT_PROMPT,
+    "product": PRODUCT_HIGHLIGHT_PROMPT,
+}
+
+# 模板默认的分析模式（未列出的使用 ANALYSIS_MODE 配置）
+# 讲解/幻灯片类内容画面变化少，只发送关键帧即可，省去整段视频的上传和模型时长
+TEMPLATE_ANALYSIS_MODES = {
+    "knowledge": "frames",
+}
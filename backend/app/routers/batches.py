@@ -0,0 +1,176 @@
+import uuid
+import logging
+from datetime import datetime
+from fastapi import APIRouter, HTTPException
+from typing import Dict, List
+
+from app.models.schemas import (
+    BatchAnalyzeRequest,
+    BatchItemStatus,
+    BatchStatusResponse,
+    VideoStatus
+)
+from app.routers.video import (
+    video_store,
+    analysis_scheduler,
+    get_video_analyzer,
+    queue_video_analysis,
+    resolve_analysis_options
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/batches", tags=["batches"])
+
+# 批量分析任务（内存存储）
+batch_store: Dict[str, dict] = {}
+
+
+def expand_video_ids(request: BatchAnalyzeRequest) -> List[str]:
+    """
+    展开批量请求中的视频：原视频ID展开为其全部分段（未分段则为原视频本身），去重并保持顺序
+    """
+    video_ids = list(request.video_ids)
+    if request.parent_video_id:
+        if request.parent_video_id not in video_store:
+            raise HTTPException(status_code=404, detail="Parent video not found")
+        segments = sorted(
+            (v for v in video_store.values() if v.parent_video_id == request.parent_video_id),
+            key=lambda v: v.segment_index or 0
+        )
+        if segments:
+            video_ids.extend(v.video_id for v in segments)
+        else:
+            video_ids.append(request.parent_video_id)
+    return list(dict.fromkeys(video_ids))
+
+
+def batch_status(batch_id: str) -> BatchStatusResponse:
+    """根据视频当前状态汇总批量进度"""
+    batch = batch_store[batch_id]
+    items = []
+    for video_id in batch["video_ids"]:
+        video = video_store.get(video_id)
+        if video is None:
+            # 批量提交后视频被删除
+            items.append(BatchItemStatus(
+                video_id=video_id, status=VideoStatus.ERROR, progress=0,
+                error_message="Video deleted"
+            ))
+            continue
+        items.append(BatchItemStatus(
+            video_id=video_id,
+            status=video.status,
+            progress=100 if video.status == VideoStatus.ANALYZED else video.progress,
+            stage=video.stage,
+            clip_count=len(video.clips),
+            error_message=video.error_message if video.status == VideoStatus.ERROR else None
+        ))
+
+    counts: Dict[str, int] = {}
+    for item in items:
+        counts[item.status.value] = counts.get(item.status.value, 0) + 1
+
+    active = [item for item in items if item.status == VideoStatus.ANALYZING]
+    if batch["cancelled"] and not active:
+        status = "cancelled"
+    elif not active:
+        status = "completed"
+    elif all(item.stage == "queued" for item in active):
+        status = "queued"
+    else:
+        status = "running"
+
+    # 已结束（完成、失败或取消）的视频按100%计入平均进度
+    progress = sum(
+        item.progress if item.status == VideoStatus.ANALYZING else 100 for item in items
+    ) // max(len(items), 1)
+
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        status=status,
+        total=len(items),
+        counts=counts,
+        progress=progress,
+        clip_count=sum(item.clip_count for item in items if item.status == VideoStatus.ANALYZED),
+        cancelled=batch["cancelled"],
+        created_at=batch["created_at"],
+        items=items
+    )
+
+
+@router.post("", response_model=BatchStatusResponse)
+async def create_batch(request: BatchAnalyzeRequest):
+    """批量分析多个视频（共享全局分析并发上限，按优先级排队）"""
+    video_ids = expand_video_ids(request)
+    if not video_ids:
+        raise HTTPException(status_code=400, detail="No videos to analyze")
+
+    missing = [video_id for video_id in video_ids if video_id not in video_store]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Videos not found: {missing}")
+
+    prompt, mode, templates = resolve_analysis_options(request)
+    analyzer = get_video_analyzer()
+    if analyzer is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Video analyzer not configured. Check API keys."
+        )
+
+    batch_id = uuid.uuid4().hex
+    # cancels: 本批次排队的分析的取消函数
+    batch = {"video_ids": video_ids, "cancelled": False, "cancels": [], "created_at": datetime.now()}
+    batch_store[batch_id] = batch
+
+    for video_id in video_ids:
+        video = video_store[video_id]
+        # 已在分析中的视频不重复排队，只纳入进度汇总
+        if video.status == VideoStatus.ANALYZING:
+            continue
+        batch["cancels"].append(queue_video_analysis(
+            video,
+            analyzer,
+            prompt,
+            request.prefilter,
+            request.profile,
+            request.priority,
+            mode=mode,
+            templates=templates
+        ))
+
+    logger.info(f"Batch {batch_id} queued {len(video_ids)} videos (priority {request.priority})")
+    return batch_status(batch_id)
+
+
+@router.get("")
+async def list_batches():
+    """列出批量任务及全局调度器状态"""
+    batches = [batch_status(batch_id) for batch_id in batch_store]
+    return {
+        "scheduler": analysis_scheduler.stats(),
+        "batches": [
+            batch.model_dump(exclude={"items"})
+            for batch in sorted(batches, key=lambda b: b.created_at, reverse=True)
+        ]
+    }
+
+
+@router.get("/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch(batch_id: str):
+    """获取批量分析的汇总进度与每个视频的结果"""
+    if batch_id not in batch_store:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch_status(batch_id)
+
+
+@router.delete("/{batch_id}", response_model=BatchStatusResponse)
+async def cancel_batch(batch_id: str):
+    """取消批量任务中尚未开始的分析（立即恢复为排队前的状态，已开始的分析会继续完成）"""
+    if batch_id not in batch_store:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    batch = batch_store[batch_id]
+    batch["cancelled"] = True
+    cancelled = sum(cancel() for cancel in batch["cancels"])
+    logger.info(f"Batch {batch_id} cancelled {cancelled} queued analyses")
+    return batch_status(batch_id)
@@ -1,19 +1,34 @@
 import os
+import time
 import uuid
 import logging
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import FileResponse
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List
 
 from app.models.schemas import (
     ClipsResponse,
     ClipInfo,
+    ClipRef,
     ExportRequest,
-    ExportResponse
+    ExportResponse,
+    ExportFile,
+    BatchSelectRequest,
+    BatchDeleteRequest,
+    BatchUpdateRequest,
+    BatchClipsResponse,
+    ClipDedupeRequest,
+    ClipDedupeResponse
 )
-from app.routers.video import video_store, video_processor, get_oss_client
+from app.routers.video import video_store, video_processor, reframer, get_storage, event_bus
 from app.config import settings
+from app.services.metrics import EXPORT_SECONDS
+from app.services.disk_manager import touch
+from app.services.response_cache import response_cache, payload_response
+from app.services.clip_index import ClipIndex, clip_indexes
+from app.services.video_analyzer import seconds_to_time_str
 
 logger = logging.getLogger(__name__)
 
@@ -23,19 +38,144 @@ router = APIRouter(prefix="/api/clips", tags=["clips"])
 export_store = {}
 
 
+def refresh_thumbnail_urls(clips: List[ClipInfo]) -> None:
+    """缩略图签名URL临近过期时重新签名"""
+    store = get_storage()
+    if store is None:
+        return
+    for clip in clips:
+        if clip.thumbnail_key:
+            clip.thumbnail_url = store.get_url(clip.thumbnail_key)
+
+
+def resolve_clip_refs(refs: List[ClipRef]) -> Dict[str, Dict[str, int]]:
+    """
+    校验所有片段引用，任一视频或片段不存在则整体失败
+
+    Returns:
+        视频ID -> {片段ID: 在 clips 中的下标}
+    """
+    indexes: Dict[str, Dict[str, int]] = {}
+    resolved: Dict[str, Dict[str, int]] = {}
+    missing = []
+    for ref in refs:
+        video = video_store.get(ref.video_id)
+        if video is None:
+            raise HTTPException(status_code=404, detail=f"Video not found: {ref.video_id}")
+        if ref.video_id not in indexes:
+            indexes[ref.video_id] = {clip.id: i for i, clip in enumerate(video.clips)}
+        index = indexes[ref.video_id].get(ref.clip_id)
+        if index is None:
+            missing.append(ref.clip_id)
+            continue
+        resolved.setdefault(ref.video_id, {})[ref.clip_id] = index
+
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Clips not found: {missing}")
+    return resolved
+
+
+def clip_list_version(video_id: str) -> tuple:
+    video = video_store[video_id]
+    return video_store.versions.get(video_id), id(video.clips), len(video.clips)
+
+
+def get_clip_index(video_id: str) -> ClipIndex:
+    """获取视频的片段区间索引（片段变更后首次查询时重建，重建耗时随片段数增长，应在线程池中调用）"""
+    return clip_indexes.get(video_id, clip_list_version(video_id), video_store[video_id].clips)
+
+
+def commit_clip_lists(new_clips: Dict[str, List[ClipInfo]], updated_count: int) -> BatchClipsResponse:
+    """一次性替换受影响视频的片段列表并推送变更事件"""
+    for video_id, clips in new_clips.items():
+        video_store[video_id].clips = clips
+        video_store.mark_changed(video_id)
+        event_bus.publish(
+            "clips_changed", video_id, clips=[clip.model_dump() for clip in clips]
+        )
+    return BatchClipsResponse(updated_count=updated_count, videos=new_clips)
+
+
+@router.post("/batch/select", response_model=BatchClipsResponse)
+async def batch_select_clips(request: BatchSelectRequest):
+    """批量设置片段选中状态（可跨视频，全部成功或全部不生效）"""
+    resolved = resolve_clip_refs(request.clips)
+
+    new_clips = {}
+    for video_id, targets in resolved.items():
+        clips = list(video_store[video_id].clips)
+        for index in targets.values():
+            clips[index] = clips[index].model_copy(update={"selected": request.selected})
+        new_clips[video_id] = clips
+
+    return commit_clip_lists(new_clips, sum(map(len, resolved.values())))
+
+
+@router.post("/batch/delete", response_model=BatchClipsResponse)
+async def batch_delete_clips(request: BatchDeleteRequest):
+    """批量删除片段（可跨视频，全部成功或全部不生效）"""
+    resolved = resolve_clip_refs(request.clips)
+
+    new_clips = {
+        video_id: [clip for clip in video_store[video_id].clips if clip.id not in targets]
+        for video_id, targets in resolved.items()
+    }
+
+    return commit_clip_lists(new_clips, sum(map(len, resolved.values())))
+
+
+@router.post("/batch/update", response_model=BatchClipsResponse)
+async def batch_update_clips(request: BatchUpdateRequest):
+    """批量修改片段起止时间（可跨视频，任一边界无效则全部不生效）"""
+    resolved = resolve_clip_refs(request.updates)
+
+    for update in request.updates:
+        duration = video_store[update.video_id].duration
+        if update.end_seconds <= update.start_seconds or \
+                (duration and update.end_seconds > duration + 1e-3):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid boundaries for clip {update.clip_id}: "
+                       f"{update.start_seconds}-{update.end_seconds}"
+            )
+
+    new_clips = {video_id: list(video_store[video_id].clips) for video_id in resolved}
+    for update in request.updates:
+        clips = new_clips[update.video_id]
+        index = resolved[update.video_id][update.clip_id]
+        clips[index] = clips[index].model_copy(update={
+            "start_seconds": update.start_seconds,
+            "end_seconds": update.end_seconds,
+            "start_time": seconds_to_time_str(update.start_seconds),
+            "end_time": seconds_to_time_str(update.end_seconds)
+        })
+
+    return commit_clip_lists(new_clips, len(request.updates))
+
+
 @router.get("/{video_id}", response_model=ClipsResponse)
-async def get_clips(video_id: str):
-    """获取视频的精彩片段列表"""
+async def get_clips(video_id: str, request: Request):
+    """获取视频的精彩片段列表（预序列化缓存，片段变更或缩略图URL需重签时重建）"""
     if video_id not in video_store:
         raise HTTPException(status_code=404, detail="Video not found")
 
     video = video_store[video_id]
 
-    return ClipsResponse(
-        video_id=video_id,
-        clips=video.clips,
-        total_count=len(video.clips)
+    def build():
+        refresh_thumbnail_urls(video.clips)
+        return ClipsResponse(video_id=video_id, clips=video.clips, total_count=len(video.clips))
+
+    def expires_at():
+        store = get_storage()
+        keys = [clip.thumbnail_key for clip in video.clips if clip.thumbnail_key]
+        if store is None or not keys:
+            return None
+        return min(store.url_refresh_at(key) for key in keys)
+
+    payload = response_cache.get(
+        "clips", video_id, video_store.versions.get(video_id), build, expires_at
     )
+    return payload_response(request, payload)
 
 
 @router.put("/{video_id}/{clip_id}/select")
@@ -49,6 +189,7 @@ async def toggle_clip_selection(video_id: str, clip_id: str, selected: bool = Tr
     for clip in video.clips:
         if clip.id == clip_id:
             clip.selected = selected
+            video_store.mark_changed(video_id)
             return {"message": f"Clip {clip_id} selection updated", "selected": selected}
 
     raise HTTPException(status_code=404, detail="Clip not found")
@@ -83,7 +224,8 @@ async def get_thumbnail(clip_id: str):
         for clip in video.clips:
             if clip.id == clip_id:
                 if clip.thumbnail_url:
-                    # 如果有OSS URL，返回重定向
+                    # 如果有存储URL，直接返回
+                    refresh_thumbnail_urls([clip])
                     return {"thumbnail_url": clip.thumbnail_url}
 
                 # 否则尝试从本地获取
@@ -94,6 +236,7 @@ async def get_thumbnail(clip_id: str):
                     f"{clip_id}.jpg"
                 )
                 if thumbnail_path.exists():
+                    touch(str(thumbnail_path))
                     return FileResponse(
                         str(thumbnail_path),
                         media_type="image/jpeg"
@@ -119,7 +262,14 @@ async def export_clips(video_id: str, request: ExportRequest):
     if not selected_clips:
         raise HTTPException(status_code=400, detail="No clips selected")
 
+    resolutions = [profile.resolution for profile in request.renditions]
+    if len(set(resolutions)) != len(resolutions):
+        raise HTTPException(status_code=400, detail="Duplicate rendition resolutions")
+    if request.renditions and request.aspect_ratio:
+        raise HTTPException(status_code=400, detail="Renditions cannot be combined with aspect_ratio")
+
     export_id = uuid.uuid4().hex
+    started = time.perf_counter()
 
     try:
         # 准备片段时间列表
@@ -128,61 +278,156 @@ async def export_clips(video_id: str, request: ExportRequest):
             for clip in selected_clips
         ]
 
-        # 导出片段
-        output_path = video_processor.export_clips(
-            video.file_path,
-            clips_times,
-            merge=request.merge,
-            resolution=request.resolution
-        )
-
-        # 上传到OSS（如果配置了）
-        download_url = None
-        oss = get_oss_client()
-        if oss and os.path.exists(output_path):
-            download_url = oss.upload_file(output_path)
+        event_bus.publish("export", video_id, export_id=export_id, stage="started", progress=0)
+
+        def on_progress(stage: str, progress: int) -> None:
+            event_bus.publish("export", video_id, export_id=export_id, stage=stage, progress=progress)
+
+        # 导出片段（阻塞操作放到线程池，进度通过事件推送）
+        if request.renditions:
+            output_paths = await run_in_threadpool(
+                video_processor.export_renditions,
+                video.file_path,
+                clips_times,
+                [profile.model_dump() for profile in request.renditions],
+                on_progress=on_progress
+            )
+        elif request.aspect_ratio:
+            output_paths = await run_in_threadpool(
+                reframer.export,
+                video.file_path,
+                clips_times,
+                aspect=request.aspect_ratio,
+                merge=request.merge,
+                resolution=request.resolution,
+                on_progress=on_progress
+            )
+        else:
+            output_paths = await run_in_threadpool(
+                video_processor.export_clips,
+                video.file_path,
+                clips_times,
+                merge=request.merge,
+                resolution=request.resolution,
+                on_progress=on_progress
+            )
+
+        # 多版本导出每个版本一个文件；合并模式一个文件包含全部片段；分开模式每个片段一个文件
+        all_clip_ids = [clip.id for clip in selected_clips]
+        if request.renditions:
+            file_clip_ids = [all_clip_ids] * len(output_paths)
+            renditions = [profile.resolution for profile in request.renditions]
+        elif len(output_paths) == 1:
+            file_clip_ids = [all_clip_ids]
+            renditions = [None]
         else:
-            # 本地下载链接
-            download_url = f"/api/clips/download/{export_id}"
+            file_clip_ids = [[clip_id] for clip_id in all_clip_ids]
+            renditions = [None] * len(output_paths)
+
+        # 上传到远端存储（如果配置了），否则使用本地下载链接
+        store = get_storage()
+        files = []
+        for index, (output_path, clip_ids, rendition) in enumerate(
+            zip(output_paths, file_clip_ids, renditions)
+        ):
+            if store and store.remote and os.path.exists(output_path):
+                download_url = await run_in_threadpool(store.upload_file, output_path)
+            else:
+                download_url = f"/api/clips/download/{export_id}/{index}"
+            files.append({
+                "index": index,
+                "clip_ids": clip_ids,
+                "rendition": rendition,
+                "output_path": output_path,
+                "download_url": download_url
+            })
+        download_url = files[0]["download_url"] if len(files) == 1 else None
 
         export_store[export_id] = {
             "video_id": video_id,
-            "output_path": output_path,
+            "files": files,
             "download_url": download_url
         }
 
+        event_bus.publish(
+            "export", video_id,
+            export_id=export_id, stage="completed", progress=100, download_url=download_url,
+            files=[
+                {"index": f["index"], "rendition": f["rendition"], "download_url": f["download_url"]}
+                for f in files
+            ]
+        )
+        EXPORT_SECONDS.observe(time.perf_counter() - started, outcome="success")
+
         return ExportResponse(
             export_id=export_id,
             video_id=video_id,
             status="completed",
             download_url=download_url,
-            message="Export completed successfully"
+            files=[ExportFile(**f) for f in files],
+            message=f"Export completed successfully ({len(files)} file{'s' if len(files) > 1 else ''})"
         )
 
     except Exception as e:
+        event_bus.publish("export", video_id, export_id=export_id, stage="error", error=str(e))
+        EXPORT_SECONDS.observe(time.perf_counter() - started, outcome="error")
         logger.error(f"Export error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/download/{export_id}")
-async def download_export(export_id: str):
-    """下载导出的视频"""
-    if export_id not in export_store:
-        raise HTTPException(status_code=404, detail="Export not found")
-
-    export_info = export_store[export_id]
-    output_path = export_info["output_path"]
-
+def export_file_response(export_id: str, export_file: dict) -> FileResponse:
+    output_path = export_file["output_path"]
     if not os.path.exists(output_path):
         raise HTTPException(status_code=404, detail="Export file not found")
 
+    touch(output_path)
+    suffix = ""
+    if export_file["rendition"]:
+        suffix = f"_{export_file['rendition']}"
+    elif len(export_store[export_id]["files"]) > 1:
+        suffix = f"_{export_file['index'] + 1}"
     return FileResponse(
         output_path,
         media_type="video/mp4",
-        filename=f"export_{export_id}.mp4"
+        filename=f"export_{export_id}{suffix}.mp4"
     )
 
 
+@router.get("/download/{export_id}")
+async def download_export(export_id: str):
+    """下载导出的视频（多文件导出返回文件列表）"""
+    if export_id not in export_store:
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    files = export_store[export_id]["files"]
+    if len(files) > 1:
+        return {
+            "export_id": export_id,
+            "files": [
+                {
+                    "index": f["index"],
+                    "clip_ids": f["clip_ids"],
+                    "rendition": f["rendition"],
+                    "download_url": f["download_url"]
+                }
+                for f in files
+            ]
+        }
+    return export_file_response(export_id, files[0])
+
+
+@router.get("/download/{export_id}/{index}")
+async def download_export_file(export_id: str, index: int):
+    """下载导出中的单个文件"""
+    if export_id not in export_store:
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    files = export_store[export_id]["files"]
+    if not 0 <= index < len(files):
+        raise HTTPException(status_code=404, detail="Export file not found")
+    return export_file_response(export_id, files[index])
+
+
 @router.delete("/{video_id}/{clip_id}")
 async def delete_clip(video_id: str, clip_id: str):
     """删除片段"""
@@ -194,6 +439,69 @@ async def delete_clip(video_id: str, clip_id: str):
     for i, clip in enumerate(video.clips):
         if clip.id == clip_id:
             video.clips.pop(i)
+            video_store.mark_changed(video_id)
             return {"message": f"Clip {clip_id} deleted"}
 
     raise HTTPException(status_code=404, detail="Clip not found")
+
+
+# 以下区间查询路由放在最后，避免 /{video_id}/... 抢先匹配 /download/... 等固定前缀路由
+
+@router.get("/{video_id}/at", response_model=ClipsResponse)
+async def get_clips_at(video_id: str, t: float = Query(..., ge=0, description="时间点（秒）")):
+    """查询覆盖某一时间点的片段"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    index = await run_in_threadpool(get_clip_index, video_id)
+    clips = index.at(t)
+    refresh_thumbnail_urls(clips)
+    return ClipsResponse(video_id=video_id, clips=clips, total_count=len(clips))
+
+
+@router.get("/{video_id}/overlapping", response_model=ClipsResponse)
+async def get_overlapping_clips(
+    video_id: str,
+    start: float = Query(..., ge=0, description="区间开始（秒）"),
+    end: float = Query(..., gt=0, description="区间结束（秒）")
+):
+    """查询与时间区间重叠的片段（按开始时间排序）"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+
+    index = await run_in_threadpool(get_clip_index, video_id)
+    clips = index.overlapping(start, end)
+    refresh_thumbnail_urls(clips)
+    return ClipsResponse(video_id=video_id, clips=clips, total_count=len(clips))
+
+
+@router.post("/{video_id}/dedupe", response_model=ClipDedupeResponse)
+async def dedupe_clips(video_id: str, request: ClipDedupeRequest = None):
+    """对重叠片段做非极大值抑制或合并，apply 为 true 时替换片段列表"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+    request = request or ClipDedupeRequest()
+
+    def dedupe():
+        index = get_clip_index(video_id)
+        if request.mode == "merge":
+            return index.merge(request.gap)
+        return index.suppress(request.threshold, request.metric)
+
+    version = clip_list_version(video_id)
+    clips, removed = await run_in_threadpool(dedupe)
+
+    if request.apply and removed:
+        # 去重在线程池中执行期间片段列表可能已被修改，此时不覆盖
+        if video_id not in video_store or clip_list_version(video_id) != version:
+            raise HTTPException(status_code=409, detail="Clips changed during dedupe, retry")
+        commit_clip_lists({video_id: clips}, len(removed))
+    return ClipDedupeResponse(
+        video_id=video_id,
+        clips=clips,
+        removed=removed,
+        total_count=len(clips),
+        applied=request.apply and bool(removed)
+    )
@@ -0,0 +1,76 @@
+import logging
+from pathlib import Path
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+
+from app.routers.video import video_store
+from app.routers.clips import export_store
+from app.services.disk_manager import DiskManager
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/disk", tags=["disk"])
+
+
+# (缓存标识, 被引用的存储对象键)
+_referenced_objects = (None, frozenset())
+
+
+def referenced_objects() -> frozenset:
+    """
+    视频和片段仍在引用的存储对象键
+
+    分析过程中上传得到的 storage_key 不会更新视频存储版本号，因此缓存标识同时包含
+    版本号和各视频当前的 storage_key；片段（含缩略图键）变化时版本号会更新。
+    """
+    global _referenced_objects
+    videos = list(video_store.values())
+    marker = (video_store.version, tuple(v.storage_key for v in videos))
+    if _referenced_objects[0] != marker:
+        keys = set()
+        for video in videos:
+            if video.storage_key:
+                keys.add(video.storage_key)
+            keys.update(clip.thumbnail_key for clip in video.clips if clip.thumbnail_key)
+        _referenced_objects = (marker, frozenset(keys))
+    return _referenced_objects[1]
+
+
+def owner_alive(category: str, owner: Optional[str], path: Path) -> bool:
+    """产物的所属视频或导出任务是否仍存在；存储对象为是否仍被引用"""
+    if category == "storage":
+        return owner in referenced_objects()
+    if category == "exports":
+        return any(
+            Path(f["output_path"]) == path for e in export_store.values() for f in e["files"]
+        )
+    return owner in video_store
+
+
+disk_manager = DiskManager(owner_alive=owner_alive)
+
+
+@router.get("/usage")
+async def get_disk_usage(refresh: bool = False):
+    """按类别查看输出目录占用，refresh=true 时重新扫描"""
+    if refresh or disk_manager.last_scan is None:
+        await run_in_threadpool(disk_manager.scan)
+    return disk_manager.usage()
+
+
+@router.get("/artifacts")
+async def list_artifacts(category: Optional[str] = None, owner: Optional[str] = None):
+    """列出追踪的产物（按最近访问时间倒序）"""
+    artifacts = [
+        a for a in disk_manager.artifacts
+        if (category is None or a.category == category) and (owner is None or a.owner == owner)
+    ]
+    artifacts.sort(key=lambda a: a.last_access, reverse=True)
+    return [a.to_dict() for a in artifacts]
+
+
+@router.post("/sweep")
+async def sweep_disk():
+    """立即清理孤儿产物并执行配额"""
+    return await run_in_threadpool(disk_manager.sweep)
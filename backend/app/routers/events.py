@@ -0,0 +1,124 @@
+import json
+import asyncio
+import logging
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+
+from app.routers.video import video_store, event_bus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+# SSE 心跳间隔（秒），防止代理断开空闲连接
+HEARTBEAT_INTERVAL = 15
+
+
+def parse_video_ids(video_ids: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的视频ID列表，空表示关注全部"""
+    if not video_ids:
+        return None
+    return [v for v in video_ids.split(',') if v]
+
+
+def snapshot_events(video_ids: Optional[List[str]]) -> List[dict]:
+    """连接建立时推送所关注视频的当前状态"""
+    ids = video_ids if video_ids is not None else list(video_store.keys())
+    events = []
+    for video_id in ids:
+        video = video_store.get(video_id)
+        if video is None:
+            continue
+        events.append({
+            "id": 0,
+            "type": "status",
+            "video_id": video_id,
+            "status": video.status.value,
+            "progress": video.progress,
+            "stage": video.stage
+        })
+    return events
+
+
+@router.get("")
+async def stream_events(request: Request, video_ids: Optional[str] = None):
+    """
+    SSE 事件流
+
+    一个连接可通过 video_ids=a,b,c 同时关注多个视频，不传则接收全部视频的事件。
+    事件类型：status、progress、clips、export、hls、video_created
+    """
+    ids = parse_video_ids(video_ids)
+    subscription = event_bus.subscribe(ids)
+
+    async def event_generator():
+        try:
+            for event in snapshot_events(ids):
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=HEARTBEAT_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield (
+                    f"id: {event['id']}\n"
+                    f"event: {event['type']}\n"
+                    f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+                )
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket):
+    """
+    WebSocket 事件通道
+
+    客户端发送 {"action": "subscribe"|"unsubscribe", "video_ids": [...]} 调整关注的视频，
+    初始不关注任何视频；服务端推送与 SSE 相同格式的事件 JSON。
+    """
+    await websocket.accept()
+    subscription = event_bus.subscribe()
+    subscription.video_ids = set()
+
+    async def receive_commands():
+        while True:
+            message = await websocket.receive_json()
+            ids = message.get("video_ids") or []
+            action = message.get("action")
+            if action == "subscribe":
+                subscription.watch(ids)
+                for event in snapshot_events(ids):
+                    await websocket.send_json(event)
+            elif action == "unsubscribe":
+                subscription.unwatch(ids)
+
+    async def send_events():
+        while True:
+            event = await subscription.queue.get()
+            await websocket.send_json(event)
+
+    tasks = [asyncio.create_task(receive_commands()), asyncio.create_task(send_events())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            exception = task.exception()
+            if exception and not isinstance(exception, WebSocketDisconnect):
+                logger.error(f"WebSocket events error: {exception}")
+    finally:
+        event_bus.unsubscribe(subscription)
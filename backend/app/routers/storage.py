@@ -0,0 +1,33 @@
+import mimetypes
+import logging
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.routers.video import get_storage
+from app.services.disk_manager import touch
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/storage", tags=["storage"])
+
+
+@router.get("/{object_key:path}")
+async def get_object(object_key: str, expires: int, signature: str):
+    """本地存储对象下载（需有效签名）"""
+    store = get_storage()
+    if store is None or store.remote:
+        raise HTTPException(status_code=404, detail="Local storage not enabled")
+
+    if not store.verify(object_key, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    try:
+        path = store.object_path(object_key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid object key")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Object not found")
+
+    touch(str(path))
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    return FileResponse(str(path), media_type=media_type)
@@ -0,0 +1,57 @@
+import logging
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+
+from app.services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/traces", tags=["traces"])
+
+
+def get_trace_or_404(trace_id: str):
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+
+@router.get("")
+async def list_traces(video_id: Optional[str] = None, kind: Optional[str] = None):
+    """列出作业追踪（最新的在前），可按视频或作业类型筛选"""
+    traces = tracer.list(video_id)
+    if kind:
+        traces = [t for t in traces if t.kind == kind]
+    return [t.summary() for t in reversed(traces)]
+
+
+@router.get("/{trace_id}")
+async def get_trace(trace_id: str, format: str = Query("json", pattern="^(json|chrome)$")):
+    """
+    获取作业时间线
+
+    format=chrome 返回 Chrome trace 格式，可直接导入 chrome://tracing 或 Perfetto
+    """
+    trace = get_trace_or_404(trace_id)
+    if format == "chrome":
+        return trace.to_chrome()
+    return trace.to_dict()
+
+
+@router.get("/{trace_id}/profile")
+async def get_trace_profile(
+    trace_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$")
+):
+    """
+    获取采样分析结果
+
+    format=collapsed 返回火焰图折叠栈文本（flamegraph.pl / speedscope 可直接读取）
+    """
+    trace = get_trace_or_404(trace_id)
+    if trace.profile is None:
+        raise HTTPException(status_code=404, detail="Trace was not profiled or is still running")
+    if format == "collapsed":
+        return PlainTextResponse("\n".join(trace.profile["collapsed"]) + "\n")
+    return trace.profile
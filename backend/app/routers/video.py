@@ -1,11 +1,18 @@
 import os
+import json
 import uuid
+import base64
+import hashlib
 import aiofiles
 import logging
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from datetime import datetime
+from fastapi import (
+    APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Query, Header, Request, Response
+)
 from fastapi.responses import FileResponse
-from typing import Dict
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, List, Optional
 
 from app.models.schemas import (
     VideoUploadResponse,
@@ -15,43 +22,99 @@ from app.models.schemas import (
     AnalyzeRequest
 )
 from app.config import settings
-from app.services.oss_client import OSSClient
+from app.prompts import PROMPT_TEMPLATES, TEMPLATE_ANALYSIS_MODES
+from app.services.storage import create_storage
 from app.services.llm_client import ZhipuVideoAnalyzer
+from app.services.llm_transport import create_transport
 from app.services.video_processor import VideoProcessor
-from app.services.video_analyzer import VideoAnalyzer
+from app.services.video_analyzer import TemplateSpec, VideoAnalyzer
+from app.services.analysis_scheduler import AnalysisScheduler
+from app.services.hls_packager import HLSPackager, MASTER_PLAYLIST
+from app.services.proxy_generator import ProxyGenerator
+from app.services.feature_extractor import FeatureExtractor
+from app.services.audio_prefilter import AudioPrefilter
+from app.services.frame_sampler import FrameSampler
+from app.services.reframer import Reframer, parse_aspect
+from app.services.event_bus import EventBus
+from app.services.video_store import VideoStore
+from app.services.response_cache import CachedPayload, response_cache, payload_response
+from app.services.disk_manager import touch
+from app.services.metrics import ANALYSES_IN_FLIGHT, BACKGROUND_TASKS, tracked
+from app.services.tracing import tracer, span
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/videos", tags=["videos"])
 
 # 内存存储（生产环境应使用数据库）
-video_store: Dict[str, VideoInfo] = {}
+video_store = VideoStore()
 
 # 初始化服务
-oss_client = None
+storage = None
 llm_client = None
 video_processor = VideoProcessor()
 video_analyzer = None
-
-
-def get_oss_client():
-    global oss_client
-    if oss_client is None and settings.OSS_ACCESS_KEY_ID:
-        oss_client = OSSClient(
-            access_key_id=settings.OSS_ACCESS_KEY_ID,
-            access_key_secret=settings.OSS_ACCESS_KEY_SECRET,
-            endpoint=settings.OSS_ENDPOINT,
-            bucket_name=settings.OSS_BUCKET_NAME
-        )
-    return oss_client
+hls_packager = HLSPackager()
+proxy_generator = ProxyGenerator(video_processor)
+feature_extractor = FeatureExtractor(video_processor)
+audio_prefilter = AudioPrefilter()
+frame_sampler = FrameSampler(video_processor)
+reframer = Reframer(video_processor)
+event_bus = EventBus()
+# 全局分析调度：单个和批量分析共享同一并发上限
+analysis_scheduler = AnalysisScheduler()
+
+# 列表排序字段 -> 排序键（须可 JSON 序列化，用于生成游标）
+VIDEO_SORT_KEYS = {
+    "created_at": lambda v: (v.created_at.timestamp(),),
+    "updated_at": lambda v: (v.updated_at.timestamp(),),
+    "filename": lambda v: (v.filename.lower(),),
+    "duration": lambda v: (v.duration is None, v.duration or 0),
+    "status": lambda v: (v.status.value,)
+}
+
+# 视频文件扩展名对应的 Content-Type
+VIDEO_MEDIA_TYPES = {
+    '.mp4': 'video/mp4',
+    '.mov': 'video/quicktime',
+    '.avi': 'video/x-msvideo',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm'
+}
+
+# HLS文件扩展名对应的 Content-Type
+HLS_MEDIA_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.m4s': 'video/iso.segment',
+    '.mp4': 'video/mp4'
+}
+
+
+def get_storage():
+    global storage
+    if storage is None:
+        storage = create_storage()
+    return storage
 
 
 def get_llm_client():
     global llm_client
-    if llm_client is None and settings.ZHIPU_API_KEY:
+    # 回放模式不访问真实接口，无需密钥
+    replay = settings.LLM_TRANSPORT.lower() == "replay"
+    if llm_client is None and (settings.ZHIPU_API_KEY or replay):
         llm_client = ZhipuVideoAnalyzer(
-            api_key=settings.ZHIPU_API_KEY,
-            model=settings.ZHIPU_MODEL
+            api_key=settings.ZHIPU_API_KEY or "replay",
+            model=settings.ZHIPU_MODEL,
+            base_url=settings.ZHIPU_BASE_URL,
+            transport=create_transport(
+                settings.LLM_TRANSPORT,
+                settings.LLM_CASSETTE_DIR,
+                latency=settings.LLM_REPLAY_LATENCY,
+                error_rate=settings.LLM_REPLAY_ERROR_RATE,
+                chunk_size=settings.LLM_REPLAY_CHUNK_SIZE,
+                chunk_delay=settings.LLM_REPLAY_CHUNK_DELAY,
+                seed=settings.LLM_REPLAY_SEED
+            )
         )
     return llm_client
 
@@ -59,17 +122,174 @@ def get_llm_client():
 def get_video_analyzer():
     global video_analyzer
     if video_analyzer is None:
-        oss = get_oss_client()
+        store = get_storage()
         llm = get_llm_client()
-        if oss and llm:
-            video_analyzer = VideoAnalyzer(llm, oss, video_processor)
+        if store and llm:
+            video_analyzer = VideoAnalyzer(
+                llm, store, video_processor, proxy_generator, audio_prefilter, frame_sampler
+            )
     return video_analyzer
 
 
+def set_video_status(video: VideoInfo, status: VideoStatus, progress: int = None) -> None:
+    """更新视频状态并推送状态变更事件"""
+    video.status = status
+    if progress is not None:
+        video.progress = progress
+    video.stage = None
+    video.updated_at = datetime.now()
+    video_store.mark_changed(video.video_id)
+    event_bus.publish(
+        "status",
+        video.video_id,
+        status=status.value,
+        progress=video.progress,
+        error_message=video.error_message if status == VideoStatus.ERROR else None
+    )
+
+
+def report_video_progress(video: VideoInfo, stage: str, progress: int, clips=None) -> None:
+    """更新处理阶段与进度并推送事件，有新片段时同时推送片段"""
+    video.stage = stage
+    video.progress = max(0, min(100, progress))
+    event_bus.publish("progress", video.video_id, stage=stage, progress=video.progress)
+    if clips:
+        event_bus.publish(
+            "clips",
+            video.video_id,
+            clips=[clip.model_dump() for clip in clips]
+        )
+
+
+@tracked(BACKGROUND_TASKS, task="analysis")
+@tracked(ANALYSES_IN_FLIGHT)
+async def run_video_analysis(
+    video: VideoInfo,
+    analyzer: VideoAnalyzer,
+    prompt: Optional[str] = None,
+    prefilter: Optional[bool] = None,
+    profile: bool = False,
+    mode: Optional[str] = None,
+    templates: Optional[List[TemplateSpec]] = None
+) -> None:
+    """执行一次视频分析并更新状态（由分析调度器调用）"""
+    video_id = video.video_id
+    try:
+        logger.info(f"Starting background analysis for video: {video_id}")
+        report_video_progress(video, "starting", 0)
+        with tracer.trace("analysis", video_id, profile=profile):
+            clips = await analyzer.analyze_video(
+                video,
+                prompt,
+                prefilter,
+                on_progress=lambda stage, progress, clips=None:
+                    report_video_progress(video, stage, progress, clips),
+                mode=mode,
+                templates=templates
+            )
+        video.clips = clips
+        set_video_status(video, VideoStatus.ANALYZED, progress=100)
+        logger.info(f"Analysis completed for video: {video_id}, found {len(clips)} clips")
+    except Exception as e:
+        video.error_message = str(e)
+        set_video_status(video, VideoStatus.ERROR)
+        logger.error(f"Error analyzing video {video_id}: {e}")
+
+
+def queue_video_analysis(
+    video: VideoInfo,
+    analyzer: VideoAnalyzer,
+    prompt: Optional[str] = None,
+    prefilter: Optional[bool] = None,
+    profile: bool = False,
+    priority: int = 0,
+    mode: Optional[str] = None,
+    templates: Optional[List[TemplateSpec]] = None
+) -> Callable[[], bool]:
+    """
+    将视频标记为分析中并提交到全局分析调度器排队
+
+    Args:
+        video: 待分析视频
+        analyzer: 视频分析器
+        prompt: 自定义提示词
+        prefilter: 是否启用音频预筛
+        profile: 是否启用采样分析器
+        priority: 调度优先级，数值越大越先执行
+        mode: 分析模式 video/frames/two_pass
+        templates: 多模板分析 [(模板名, 提示词, 模式), ...]
+
+    Returns:
+        取消函数：分析尚未开始时立即恢复排队前的状态和进度并返回 True，
+        排队中的任务出队后直接跳过；分析已开始或已取消时返回 False
+    """
+    previous = (video.status, video.progress, video.error_message)
+    state = {"started": False, "cancelled": False}
+    video.error_message = None
+    set_video_status(video, VideoStatus.ANALYZING, progress=0)
+    report_video_progress(video, "queued", 0)
+
+    def cancel() -> bool:
+        if state["started"] or state["cancelled"]:
+            return False
+        state["cancelled"] = True
+        status, progress, video.error_message = previous
+        set_video_status(video, status, progress=progress)
+        return True
+
+    async def job():
+        if state["cancelled"]:
+            return
+        state["started"] = True
+        await run_video_analysis(video, analyzer, prompt, prefilter, profile, mode, templates)
+
+    analysis_scheduler.submit(job, priority)
+    return cancel
+
+
+def resolve_analysis_options(request: Optional[AnalyzeRequest]):
+    """
+    根据请求确定提示词和分析模式
+
+    显式 prompt 优先于模板提示词；显式 mode 优先于模板默认模式，
+    都未指定时由分析器使用 ANALYSIS_MODE 配置。
+
+    Returns:
+        (提示词, 分析模式, 多模板列表)；未指定 templates 时多模板列表为 None
+    """
+    if request is None:
+        return None, None, None
+    names = list(dict.fromkeys(request.templates))
+    unknown = [name for name in names + [request.template] if name is not None and name not in PROMPT_TEMPLATES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown templates: {unknown}. Available: {list(PROMPT_TEMPLATES)}"
+        )
+
+    if names:
+        if request.prompt is not None or request.template is not None:
+            raise HTTPException(status_code=400, detail="templates cannot be combined with prompt or template")
+        if request.mode == "two_pass":
+            raise HTTPException(status_code=400, detail="two_pass mode is not supported with multiple templates")
+        templates = [
+            (name, PROMPT_TEMPLATES[name], request.mode or TEMPLATE_ANALYSIS_MODES.get(name))
+            for name in names
+        ]
+        return None, request.mode, templates
+
+    prompt = request.prompt
+    if prompt is None and request.template:
+        prompt = PROMPT_TEMPLATES[request.template]
+    mode = request.mode or TEMPLATE_ANALYSIS_MODES.get(request.template)
+    return prompt, mode, None
+
+
 @router.post("/upload", response_model=VideoUploadResponse)
 async def upload_video(
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None
+    background_tasks: BackgroundTasks = None,
+    profile: bool = Query(False, description="是否对本次上传及其后台任务启用采样分析器")
 ):
     """上传视频文件（超过5分钟自动切分）"""
     if not file.filename:
@@ -90,16 +310,18 @@ async def upload_video(
     # 保存文件
     file_path = str(Path(settings.UPLOAD_DIR) / f"{video_id}{ext}")
 
-    try:
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-    except Exception as e:
-        logger.error(f"Error saving file: {e}")
-        raise HTTPException(status_code=500, detail="Failed to save file")
+    with tracer.trace("upload", video_id, profile=profile, filename=file.filename):
+        try:
+            with span("upload.save_file"):
+                async with aiofiles.open(file_path, 'wb') as f:
+                    content = await file.read()
+                    await f.write(content)
+        except Exception as e:
+            logger.error(f"Error saving file: {e}")
+            raise HTTPException(status_code=500, detail="Failed to save file")
 
-    # 获取视频信息
-    video_info_dict = video_processor.get_video_info(file_path)
+        # 获取视频信息
+        video_info_dict = video_processor.get_video_info(file_path)
     duration = video_info_dict.get('duration', 0)
 
     # 创建原始视频信息
@@ -116,42 +338,67 @@ async def upload_video(
     )
 
     video_store[video_id] = video_info
+    set_video_status(video_info, VideoStatus.UPLOADED, progress=0)
+
+    # 后台打包HLS多码率版本，供编辑端流畅预览
+    if settings.HLS_AUTO_PACKAGE and duration > 0:
+        @tracked(BACKGROUND_TASKS, task="hls")
+        def package_hls_task():
+            event_bus.publish("hls", video_id, status="packaging")
+            try:
+                with tracer.trace("hls", video_id, profile=profile):
+                    hls_packager.package(video_id, file_path, video_info_dict)
+                event_bus.publish("hls", video_id, status="ready")
+            except Exception as e:
+                event_bus.publish("hls", video_id, status="error")
+                logger.error(f"HLS packaging failed for {video_id}: {e}")
+
+        background_tasks.add_task(package_hls_task)
 
     # 如果视频超过5分钟，自动切分
     SEGMENT_THRESHOLD = 300  # 5分钟
     if duration > SEGMENT_THRESHOLD:
         logger.info(f"Video duration {duration}s > {SEGMENT_THRESHOLD}s, splitting into segments")
 
+        @tracked(BACKGROUND_TASKS, task="split")
         def split_video_task():
-            segments = video_processor.split_video(file_path, segment_duration=SEGMENT_THRESHOLD)
-
-            for seg in segments:
-                seg_id = uuid.uuid4().hex
-                seg_info_dict = video_processor.get_video_info(seg["path"])
-
-                # 格式化时间显示
-                start_min = int(seg["start"] // 60)
-                start_sec = int(seg["start"] % 60)
-                end_min = int(seg["end"] // 60)
-                end_sec = int(seg["end"] % 60)
-
-                seg_info = VideoInfo(
-                    video_id=seg_id,
-                    filename=f"{Path(file.filename).stem}_片段{seg['index']+1} ({start_min:02d}:{start_sec:02d}-{end_min:02d}:{end_sec:02d}){ext}",
-                    file_path=seg["path"],
-                    status=VideoStatus.UPLOADED,
-                    duration=seg["duration"],
-                    width=seg_info_dict.get('width'),
-                    height=seg_info_dict.get('height'),
-                    fps=seg_info_dict.get('fps'),
-                    parent_video_id=video_id,
-                    segment_index=seg["index"],
-                    segment_start=seg["start"],
-                    segment_end=seg["end"],
-                    is_segment=True
-                )
-                video_store[seg_id] = seg_info
-                logger.info(f"Created segment: {seg_id} ({seg['index']+1})")
+            with tracer.trace("split", video_id, profile=profile):
+                segments = video_processor.split_video(file_path, segment_duration=SEGMENT_THRESHOLD)
+
+                for seg in segments:
+                    seg_id = uuid.uuid4().hex
+                    seg_info_dict = video_processor.get_video_info(seg["path"])
+
+                    # 格式化时间显示
+                    start_min = int(seg["start"] // 60)
+                    start_sec = int(seg["start"] % 60)
+                    end_min = int(seg["end"] // 60)
+                    end_sec = int(seg["end"] % 60)
+
+                    seg_info = VideoInfo(
+                        video_id=seg_id,
+                        filename=f"{Path(file.filename).stem}_片段{seg['index']+1} ({start_min:02d}:{start_sec:02d}-{end_min:02d}:{end_sec:02d}){ext}",
+                        file_path=seg["path"],
+                        status=VideoStatus.UPLOADED,
+                        duration=seg["duration"],
+                        width=seg_info_dict.get('width'),
+                        height=seg_info_dict.get('height'),
+                        fps=seg_info_dict.get('fps'),
+                        parent_video_id=video_id,
+                        segment_index=seg["index"],
+                        segment_start=seg["start"],
+                        segment_end=seg["end"],
+                        is_segment=True
+                    )
+                    video_store[seg_id] = seg_info
+                    event_bus.publish(
+                        "video_created",
+                        video_id,
+                        segment_id=seg_id,
+                        segment_index=seg["index"],
+                        filename=seg_info.filename
+                    )
+                    logger.info(f"Created segment: {seg_id} ({seg['index']+1})")
 
         background_tasks.add_task(split_video_task)
 
@@ -175,19 +422,16 @@ async def get_video_status(video_id: str):
     return VideoStatusResponse(
         video_id=video_id,
         status=video.status,
-        progress=100 if video.status == VideoStatus.ANALYZED else 0,
+        progress=100 if video.status == VideoStatus.ANALYZED else video.progress,
+        stage=video.stage,
         message=f"Status: {video.status.value}",
         duration=video.duration
     )
 
 
 @router.post("/{video_id}/analyze")
-async def analyze_video(
-    video_id: str,
-    request: AnalyzeRequest = None,
-    background_tasks: BackgroundTasks = None
-):
-    """分析视频，识别精彩片段（后台任务）"""
+async def analyze_video(video_id: str, request: AnalyzeRequest = None):
+    """分析视频，识别精彩片段（进入全局分析队列）"""
     if video_id not in video_store:
         raise HTTPException(status_code=404, detail="Video not found")
 
@@ -201,6 +445,7 @@ async def analyze_video(
             "message": "Video analysis is in progress. Please poll /api/videos/{video_id}/status for updates."
         }
 
+    prompt, mode, templates = resolve_analysis_options(request)
     analyzer = get_video_analyzer()
 
     if analyzer is None:
@@ -209,49 +454,44 @@ async def analyze_video(
             detail="Video analyzer not configured. Check API keys."
         )
 
-    # 更新状态为分析中
-    video.status = VideoStatus.ANALYZING
-
-    # 在后台执行分析任务
-    async def run_analysis():
-        try:
-            prompt = request.prompt if request else None
-            logger.info(f"Starting background analysis for video: {video_id}")
-            clips = await analyzer.analyze_video(video, prompt)
-            video.clips = clips
-            video.status = VideoStatus.ANALYZED
-            logger.info(f"Analysis completed for video: {video_id}, found {len(clips)} clips")
-        except Exception as e:
-            video.status = VideoStatus.ERROR
-            video.error_message = str(e)
-            logger.error(f"Error analyzing video {video_id}: {e}")
-
-    background_tasks.add_task(run_analysis)
+    prefilter = request.prefilter if request else None
+    profile = request.profile if request else False
+    priority = request.priority if request else 0
+    queue_video_analysis(
+        video, analyzer, prompt, prefilter, profile, priority, mode=mode, templates=templates
+    )
 
     return {
         "video_id": video_id,
         "status": "analyzing",
-        "message": "Video analysis started. Poll /api/videos/{video_id}/status for updates."
+        "message": "Video analysis queued. Poll /api/videos/{video_id}/status for updates."
     }
 
 
 @router.get("/{video_id}/info")
-async def get_video_info(video_id: str):
+async def get_video_info(video_id: str, request: Request):
     """获取视频详细信息"""
     if video_id not in video_store:
         raise HTTPException(status_code=404, detail="Video not found")
 
     video = video_store[video_id]
 
-    return {
-        "video_id": video.video_id,
-        "filename": video.filename,
-        "status": video.status,
-        "duration": video.duration,
-        "width": video.width,
-        "height": video.height,
-        "fps": video.fps
-    }
+    payload = response_cache.get(
+        "info",
+        video_id,
+        video_store.versions.get(video_id),
+        lambda: {
+            "video_id": video.video_id,
+            "filename": video.filename,
+            "status": video.status,
+            "duration": video.duration,
+            "width": video.width,
+            "height": video.height,
+            "fps": video.fps,
+            "analysis_stats": video.analysis_stats
+        }
+    )
+    return payload_response(request, payload)
 
 
 @router.get("/{video_id}/stream")
@@ -265,30 +505,321 @@ async def stream_video(video_id: str):
     if not os.path.exists(video.file_path):
         raise HTTPException(status_code=404, detail="Video file not found")
 
+    ext = Path(video.file_path).suffix.lower()
+
     return FileResponse(
         video.file_path,
-        media_type="video/mp4",
+        media_type=VIDEO_MEDIA_TYPES.get(ext, "application/octet-stream"),
         filename=video.filename
     )
 
 
-@router.get("", response_model=list)
-async def list_videos():
-    """获取所有视频列表"""
-    return [
-        {
-            "video_id": v.video_id,
-            "filename": v.filename,
-            "status": v.status,
-            "duration": v.duration,
-            "width": v.width,
-            "height": v.height,
-            "fps": v.fps,
-            "is_segment": v.is_segment,
-            "parent_video_id": v.parent_video_id,
-            "segment_index": v.segment_index,
-            "segment_start": v.segment_start,
-            "segment_end": v.segment_end
+@router.post("/{video_id}/hls")
+async def package_video_hls(video_id: str, background_tasks: BackgroundTasks = None):
+    """启动HLS多码率打包（后台任务）"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    video = video_store[video_id]
+
+    if not os.path.exists(video.file_path):
+        raise HTTPException(status_code=404, detail="Video file not found")
+
+    status = hls_packager.get_status(video_id)
+    if status["status"] in ("packaging", "ready"):
+        return {
+            "video_id": video_id,
+            **status,
+            "master_url": f"/api/videos/{video_id}/hls/{MASTER_PLAYLIST}"
         }
-        for v in video_store.values()
+
+    @tracked(BACKGROUND_TASKS, task="hls")
+    def package_hls_task():
+        event_bus.publish("hls", video_id, status="packaging")
+        try:
+            video_info_dict = video_processor.get_video_info(video.file_path)
+            hls_packager.package(video_id, video.file_path, video_info_dict)
+            event_bus.publish("hls", video_id, status="ready")
+        except Exception as e:
+            event_bus.publish("hls", video_id, status="error")
+            logger.error(f"HLS packaging failed for {video_id}: {e}")
+
+    background_tasks.add_task(package_hls_task)
+
+    return {
+        "video_id": video_id,
+        "status": "packaging",
+        "renditions": [],
+        "master_url": f"/api/videos/{video_id}/hls/{MASTER_PLAYLIST}"
+    }
+
+
+@router.get("/{video_id}/hls")
+async def get_hls_status(video_id: str):
+    """获取HLS打包状态"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    return {
+        "video_id": video_id,
+        **hls_packager.get_status(video_id),
+        "master_url": f"/api/videos/{video_id}/hls/{MASTER_PLAYLIST}"
+    }
+
+
+@router.get("/{video_id}/hls/master.m3u8")
+async def get_hls_master(video_id: str):
+    """获取HLS主播放列表"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    master_path = hls_packager.get_package_dir(video_id) / MASTER_PLAYLIST
+    if not master_path.exists():
+        raise HTTPException(status_code=404, detail="HLS package not found")
+
+    touch(str(master_path))
+    return FileResponse(
+        str(master_path),
+        media_type=HLS_MEDIA_TYPES['.m3u8'],
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.get("/{video_id}/hls/{rendition}/{filename}")
+async def get_hls_file(video_id: str, rendition: str, filename: str):
+    """获取HLS子播放列表、初始化分片或媒体分片"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    ext = Path(filename).suffix.lower()
+    if ext not in HLS_MEDIA_TYPES or Path(filename).name != filename or \
+            Path(rendition).name != rendition or rendition.startswith('.'):
+        raise HTTPException(status_code=400, detail="Invalid HLS file")
+
+    file_path = hls_packager.get_package_dir(video_id) / rendition / filename
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="HLS file not found")
+
+    # 打包期间子播放列表会持续更新，不能缓存；分片生成后不再变化
+    cache_control = "no-cache" if ext == '.m3u8' else "public, max-age=86400"
+
+    return FileResponse(
+        str(file_path),
+        media_type=HLS_MEDIA_TYPES[ext],
+        headers={"Cache-Control": cache_control}
+    )
+
+
+@router.post("/{video_id}/features")
+async def extract_video_features(video_id: str, background_tasks: BackgroundTasks = None):
+    """提取镜头切换、运动能量、音频响度特征（后台任务）"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    video = video_store[video_id]
+
+    if not os.path.exists(video.file_path):
+        raise HTTPException(status_code=404, detail="Video file not found")
+
+    if feature_extractor.is_running(video_id):
+        return {"video_id": video_id, "status": "extracting"}
+
+    @tracked(BACKGROUND_TASKS, task="features")
+    def extract_features_task():
+        try:
+            feature_extractor.extract(video_id, video.file_path)
+        except Exception as e:
+            logger.error(f"Feature extraction failed for {video_id}: {e}")
+
+    background_tasks.add_task(extract_features_task)
+
+    return {"video_id": video_id, "status": "extracting"}
+
+
+@router.get("/{video_id}/features")
+async def get_video_features(video_id: str):
+    """获取视频特征：镜头切换时间戳、逐秒运动能量、逐秒音频响度"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    video = video_store[video_id]
+
+    if feature_extractor.is_running(video_id):
+        return {"video_id": video_id, "status": "extracting"}
+
+    features = feature_extractor.load(video_id, video.file_path)
+    if features is None:
+        raise HTTPException(status_code=404, detail="Features not extracted")
+
+    return {
+        "video_id": video_id,
+        "status": "ready",
+        "meta": features["meta"],
+        "scene_cuts": [round(float(t), 3) for t in features["scene_cuts"]],
+        "motion": [round(float(v), 4) for v in features["motion"]],
+        "loudness": [round(float(v), 4) for v in features["loudness"]]
+    }
+
+
+@router.get("/{video_id}/reframe")
+async def get_reframe_trajectory(
+    video_id: str,
+    start: float = Query(0, ge=0),
+    end: Optional[float] = None,
+    aspect: str = Query("9:16", pattern=r"^[1-9]\d*:[1-9]\d*$")
+):
+    """计算重构图裁剪轨迹，供编辑端预览裁剪框"""
+    if video_id not in video_store:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    video = video_store[video_id]
+    if not video.width or not video.height:
+        raise HTTPException(status_code=400, detail="Video size unknown")
+    end = min(end or video.duration or 0, video.duration or 0)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="Invalid time range")
+
+    crop_w, crop_h, crop_y = reframer.crop_geometry(video.width, video.height, parse_aspect(aspect))
+    times, centers = await run_in_threadpool(
+        reframer.trajectory, video.file_path, start, end, crop_w / video.width
+    )
+    return {
+        "video_id": video_id,
+        "start": start,
+        "end": end,
+        "crop": {"width": crop_w, "height": crop_h, "y": crop_y},
+        "times": [round(float(t) + start, 3) for t in times],
+        "centers": [round(float(c), 4) for c in centers]
+    }
+
+
+def encode_cursor(key: tuple, scope: dict) -> str:
+    """游标包含最后一项的排序键以及生成它的排序方式和过滤条件摘要"""
+    payload = {**scope, "key": key}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, scope: dict) -> tuple:
+    """
+    解析游标并校验其与当前请求的排序方式、过滤条件一致
+
+    Raises:
+        HTTPException: 游标格式错误或来自不同的排序/过滤条件时返回 400
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        key = tuple(payload["key"])
+        matches = all(payload.get(name) == value for name, value in scope.items())
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not matches:
+        raise HTTPException(status_code=400, detail="Cursor does not match the current sort or filters")
+    return key
+
+
+def cursor_scope(sort: str, order: str, filters: dict) -> dict:
+    """游标适用范围：排序字段、方向和过滤条件的摘要"""
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return {"sort": sort, "order": order, "filters": digest}
+
+
+def video_list_item(v: VideoInfo) -> dict:
+    return {
+        "video_id": v.video_id,
+        "filename": v.filename,
+        "status": v.status.value,
+        "duration": v.duration,
+        "width": v.width,
+        "height": v.height,
+        "fps": v.fps,
+        "is_segment": v.is_segment,
+        "parent_video_id": v.parent_video_id,
+        "segment_index": v.segment_index,
+        "segment_start": v.segment_start,
+        "segment_end": v.segment_end,
+        "created_at": v.created_at.isoformat()
+    }
+
+
+# 带游标但未指定 limit 时的每页数量
+DEFAULT_PAGE_SIZE = 100
+
+
+@router.get("")
+async def list_videos(
+    request: Request,
+    status: Optional[List[VideoStatus]] = Query(None, description="按状态过滤，可重复传入"),
+    parent_video_id: Optional[str] = None,
+    is_segment: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort: str = Query("created_at", pattern="^(" + "|".join(VIDEO_SORT_KEYS) + ")$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="每页数量，不传且无游标时返回全部"),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    获取视频列表（游标分页，支持过滤和排序）
+
+    响应体为当前页的视频数组；X-Total-Count 为过滤后的总数，
+    X-Next-Cursor / Link 指向下一页。ETag 由存储版本号生成，列表未变化时返回 304。
+    limit 和 cursor 都不传时不分页，返回全部视频（兼容一次取全量的调用方）。
+    """
+    etag = f'W/"videos-{video_store.version}"'
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    sort_key = VIDEO_SORT_KEYS[sort]
+    statuses = set(status) if status else None
+    videos = [
+        v for v in list(video_store.values())
+        if (statuses is None or v.status in statuses)
+        and (parent_video_id is None or v.parent_video_id == parent_video_id)
+        and (is_segment is None or v.is_segment == is_segment)
+        and (created_after is None or v.created_at >= created_after)
+        and (created_before is None or v.created_at < created_before)
     ]
+    keyed = sorted(
+        ((sort_key(v) + (v.video_id,), v) for v in videos),
+        key=lambda item: item[0],
+        reverse=order == "desc"
+    )
+
+    scope = cursor_scope(sort, order, {
+        "status": sorted(item.value for item in statuses) if statuses else None,
+        "parent_video_id": parent_video_id,
+        "is_segment": is_segment,
+        "created_after": created_after,
+        "created_before": created_before
+    })
+    if cursor:
+        after = decode_cursor(cursor, scope)
+        try:
+            if order == "desc":
+                keyed = [item for item in keyed if item[0] < after]
+            else:
+                keyed = [item for item in keyed if item[0] > after]
+        except TypeError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE if cursor else len(keyed)
+    page = keyed[:limit]
+    # 每个视频的列表项按视频版本号缓存序列化结果，整页只做字节拼接
+    body = b"[" + b",".join(
+        response_cache.get(
+            "list_item", v.video_id, video_store.versions.get(v.video_id),
+            lambda v=v: video_list_item(v)
+        ).body
+        for _, v in page
+    ) + b"]"
+    headers = {"ETag": etag, "X-Total-Count": str(len(videos))}
+    if page and len(keyed) > limit:
+        next_cursor = encode_cursor(page[-1][0], scope)
+        headers["X-Next-Cursor"] = next_cursor
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+
+    return payload_response(request, CachedPayload(video_store.version, body), headers)
@@ -0,0 +1,66 @@
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+AnalysisJob = Callable[[], Awaitable[None]]
+
+
+class AnalysisScheduler:
+    """全局分析调度：所有分析任务按优先级排队，在共享并发上限内执行"""
+
+    def __init__(self, concurrency: int = None):
+        """
+        Args:
+            concurrency: 同时执行的分析数，默认 ANALYSIS_CONCURRENCY
+        """
+        self.concurrency = concurrency or settings.ANALYSIS_CONCURRENCY
+        self.running = 0
+        self._seq = itertools.count()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers = []
+
+    def _ensure_workers(self) -> None:
+        """首次提交时在当前事件循环中启动工作协程"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self.running = 0
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def submit(self, job: AnalysisJob, priority: int = 0) -> None:
+        """
+        提交分析任务（须在事件循环中调用）
+
+        Args:
+            job: 无参协程函数
+            priority: 优先级，数值越大越先执行，同优先级先进先出
+        """
+        self._ensure_workers()
+        self._queue.put_nowait((-priority, next(self._seq), job))
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            self.running += 1
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Analysis job failed: {e}")
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> dict:
+        return {"concurrency": self.concurrency, "running": self.running, "queued": self.queued}
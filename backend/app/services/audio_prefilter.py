@@ -0,0 +1,191 @@
+import ffmpeg
+import os
+import uuid
+import logging
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+
+from app.config import settings
+from app.services.feature_extractor import AUDIO_SAMPLE_RATE, read_pcm
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# 短时分析帧长（秒）
+FRAME_SECONDS = 0.1
+# 人声频段（Hz）
+SPEECH_BAND = (300, 3400)
+# 高于噪声底多少分贝视为有声活动
+ACTIVITY_MARGIN_DB = 10.0
+# 每次做FFT的帧数，限制内存占用
+FFT_BLOCK_FRAMES = 4096
+
+
+class AudioPrefilter:
+    """音频能量预筛：按响度和人声活动对候选窗口排序，只把有价值的窗口送去LLM分析"""
+
+    def __init__(
+        self,
+        output_dir: str = None,
+        window_seconds: float = None,
+        budget_seconds: float = None,
+        min_activity: float = None
+    ):
+        self.output_dir = Path(output_dir or settings.OUTPUT_DIR)
+        self.window_seconds = window_seconds or settings.PREFILTER_WINDOW_SECONDS
+        self.budget_seconds = budget_seconds or settings.PREFILTER_BUDGET_SECONDS
+        self.min_activity = (
+            settings.PREFILTER_MIN_ACTIVITY if min_activity is None else min_activity
+        )
+
+    def frame_features(self, video_path: str) -> dict:
+        """
+        计算短时帧特征
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            {"loudness_db": ndarray, "activity": ndarray, "speech": ndarray}，每帧 FRAME_SECONDS 秒
+        """
+        pcm_path = str(self.output_dir / f"prefilter_{uuid.uuid4().hex}.pcm")
+        try:
+            (
+                ffmpeg
+                .input(video_path)
+                .audio
+                .output(pcm_path, format='s16le', acodec='pcm_s16le', ac=1, ar=AUDIO_SAMPLE_RATE)
+                .overwrite_output()
+                .run(quiet=True)
+            )
+            samples = read_pcm(pcm_path)
+            frame_len = int(AUDIO_SAMPLE_RATE * FRAME_SECONDS)
+            n_frames = len(samples) // frame_len
+            if n_frames == 0:
+                empty = np.zeros(0, dtype=np.float32)
+                return {"loudness_db": empty, "activity": empty, "speech": empty}
+
+            freqs = np.fft.rfftfreq(frame_len, 1.0 / AUDIO_SAMPLE_RATE)
+            band = (freqs >= SPEECH_BAND[0]) & (freqs <= SPEECH_BAND[1])
+
+            loudness_db = np.empty(n_frames, dtype=np.float32)
+            band_ratio = np.empty(n_frames, dtype=np.float32)
+            for start in range(0, n_frames, FFT_BLOCK_FRAMES):
+                stop = min(start + FFT_BLOCK_FRAMES, n_frames)
+                frames = np.asarray(
+                    samples[start * frame_len:stop * frame_len], dtype=np.float32
+                ).reshape(-1, frame_len) / 32768.0
+                rms = np.sqrt(np.square(frames).mean(axis=1))
+                loudness_db[start:stop] = 20 * np.log10(np.maximum(rms, 1e-5))
+                power = np.square(np.abs(np.fft.rfft(frames, axis=1)))
+                band_ratio[start:stop] = power[:, band].sum(axis=1) / np.maximum(power.sum(axis=1), 1e-12)
+            del samples
+        finally:
+            if os.path.exists(pcm_path):
+                os.remove(pcm_path)
+
+        # 以低分位响度作为噪声底，超过噪声底一定幅度视为有效声音
+        noise_floor = np.percentile(loudness_db, 10)
+        activity = (loudness_db > noise_floor + ACTIVITY_MARGIN_DB).astype(np.float32)
+        # 有声且能量主要集中在人声频段，视为说话
+        speech = activity * (band_ratio > 0.6)
+
+        return {"loudness_db": loudness_db, "activity": activity, "speech": speech}
+
+    @traced("prefilter.rank_windows")
+    def rank_windows(self, video_path: str, duration: float) -> List[dict]:
+        """
+        对候选窗口打分排序，并在预算内挑选窗口
+
+        Args:
+            video_path: 视频文件路径
+            duration: 视频时长（秒）
+
+        Returns:
+            按时间排序的窗口列表 [{"start": float, "end": float, "score": float}, ...]，
+            相邻入选窗口会合并；未按声音活动筛选时窗口带 "fallback" 字段说明原因
+        """
+        features = self.frame_features(video_path)
+        loudness_db = features["loudness_db"]
+        if len(loudness_db) == 0:
+            logger.info(f"No audio track, analyzing whole video: {video_path}")
+            return [{"start": 0.0, "end": duration, "score": 1.0, "fallback": "no_audio"}]
+
+        frames_per_window = max(1, int(round(self.window_seconds / FRAME_SECONDS)))
+        hop = max(1, frames_per_window // 2)
+
+        # 响度归一化到 0-1（噪声底到峰值）
+        low, high = np.percentile(loudness_db, [10, 99])
+        loudness = np.clip((loudness_db - low) / max(high - low, 1e-6), 0, 1)
+
+        # 用前缀和一次性求所有窗口均值
+        n_frames = len(loudness_db)
+        starts = np.arange(0, max(1, n_frames - frames_per_window + 1), hop)
+        # 保证最后一段音频也被某个窗口覆盖
+        if n_frames > frames_per_window and starts[-1] + frames_per_window < n_frames:
+            starts = np.append(starts, n_frames - frames_per_window)
+        ends = np.minimum(starts + frames_per_window, n_frames)
+
+        def window_mean(values: np.ndarray) -> np.ndarray:
+            cumsum = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+            return (cumsum[ends] - cumsum[starts]) / (ends - starts)
+
+        activity = window_mean(features["activity"])
+        scores = (
+            0.4 * window_mean(loudness)
+            + 0.3 * activity
+            + 0.3 * window_mean(features["speech"])
+        )
+
+        def select(min_activity: float):
+            """贪心选取高分且互不重叠的窗口，直到用完预算"""
+            taken = np.zeros(n_frames, dtype=bool)
+            chosen = []
+            total = 0.0
+            for i in np.argsort(-scores):
+                if activity[i] < min_activity:
+                    continue
+                if taken[starts[i]:ends[i]].any():
+                    continue
+                window_duration = (ends[i] - starts[i]) * FRAME_SECONDS
+                if total + window_duration > self.budget_seconds:
+                    continue
+                taken[starts[i]:ends[i]] = True
+                total += window_duration
+                chosen.append({
+                    "start": float(starts[i] * FRAME_SECONDS),
+                    "end": float(min(ends[i] * FRAME_SECONDS, duration)),
+                    "score": float(scores[i])
+                })
+            return chosen, total
+
+        selected, used = select(self.min_activity)
+        if not selected:
+            # 持续响亮的音轨（人群噪声、背景音乐）几乎没有帧高出噪声底，
+            # 活动度全部低于阈值；此时忽略活动度，直接按分数在预算内选取
+            logger.warning(
+                f"No window reached min activity {self.min_activity}, "
+                f"falling back to top-scored windows: {video_path}"
+            )
+            selected, used = select(0.0)
+            for window in selected:
+                window["fallback"] = "low_activity"
+
+        selected.sort(key=lambda w: w["start"])
+        merged = []
+        for window in selected:
+            if merged and window["start"] <= merged[-1]["end"] + 1e-6:
+                merged[-1]["end"] = window["end"]
+                merged[-1]["score"] = max(merged[-1]["score"], window["score"])
+            else:
+                merged.append(dict(window))
+
+        logger.info(
+            f"Prefilter selected {len(merged)} windows, {used:.0f}s of {duration:.0f}s: {video_path}"
+        )
+        return merged
+
+    def should_prefilter(self, duration: Optional[float]) -> bool:
+        """视频时长超过预算时才值得预筛"""
+        return bool(duration) and duration > self.budget_seconds
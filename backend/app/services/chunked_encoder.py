@@ -0,0 +1,199 @@
+import os
+import uuid
+import ffmpeg
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from app.config import settings
+from app.services.metrics import VIDEO_PROCESSOR_SECONDS, timed
+from app.services.tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+# 所有块使用完全相同的编码参数，保证拼接时可直接流复制
+VIDEO_ENCODE_ARGS = {
+    'vcodec': 'libx264',
+    'crf': 18,
+    'preset': 'veryfast',
+    'pix_fmt': 'yuv420p',
+    'video_track_timescale': 90000
+}
+AUDIO_ENCODE_ARGS = {'acodec': 'aac', 'audio_bitrate': '192k'}
+
+# 分块边界与区间首尾的最小距离（秒），避免产生过短的块
+MIN_BOUNDARY_GAP = 1.0
+
+
+class ChunkedEncoder:
+    """
+    并行分块转码：把需要重新编码的时间区间在关键帧处切成多个块，
+    多个 ffmpeg 进程并发编码视频，音频单独一次编码，最后以流复制拼接
+    """
+
+    def __init__(self, video_processor, workers: int = None, min_chunk_seconds: float = None):
+        """
+        Args:
+            video_processor: 用于读取视频信息和关键帧索引
+            workers: 并发编码进程数，默认 TRANSCODE_WORKERS（0 表示 CPU 核数）
+            min_chunk_seconds: 每块最短时长，默认 TRANSCODE_MIN_CHUNK_SECONDS
+        """
+        self.video_processor = video_processor
+        self.workers = workers or settings.TRANSCODE_WORKERS or os.cpu_count() or 1
+        self.min_chunk_seconds = min_chunk_seconds or settings.TRANSCODE_MIN_CHUNK_SECONDS
+
+    def plan_chunks(
+        self,
+        video_path: str,
+        ranges: List[Tuple[float, float]],
+        workers: Optional[int] = None
+    ) -> List[Tuple[float, float]]:
+        """
+        规划分块：总时长按并发数均分，块内部边界对齐到源视频关键帧
+
+        每块从关键帧开始解码，相邻块首尾相接，既不重复也不遗漏帧。
+
+        Args:
+            video_path: 源视频路径
+            ranges: 需要编码的时间区间 [(start, end), ...]
+            workers: 并发编码进程数，默认实例配置
+
+        Returns:
+            按输出顺序排列的块 [(start, end), ...]
+        """
+        total = sum(end - start for start, end in ranges)
+        target = max(self.min_chunk_seconds, total / (workers or self.workers))
+
+        chunks = []
+        for start, end in ranges:
+            count = max(1, round((end - start) / target))
+            boundaries = [start]
+            for k in range(1, count):
+                boundary = self.video_processor.snap_to_keyframe(
+                    video_path, start + (end - start) * k / count, mode="nearest"
+                )
+                if boundary - boundaries[-1] >= MIN_BOUNDARY_GAP and end - boundary >= MIN_BOUNDARY_GAP:
+                    boundaries.append(boundary)
+            boundaries.append(end)
+            chunks.extend(zip(boundaries, boundaries[1:]))
+        return chunks
+
+    def _temp_path(self, name: str) -> str:
+        return str(Path(self.video_processor.output_dir) / name)
+
+    @traced("chunked_encoder.encode_chunk")
+    def encode_chunk(
+        self,
+        video_path: str,
+        start: float,
+        end: float,
+        output_path: str,
+        height: Optional[int] = None,
+        threads: int = 0
+    ) -> str:
+        """编码一个视频块（不含音频）"""
+        stream = ffmpeg.input(video_path, ss=start, t=end - start).video
+        if height:
+            stream = stream.filter('scale', -2, height)
+        (
+            ffmpeg
+            .output(stream, output_path, an=None, threads=threads, **VIDEO_ENCODE_ARGS)
+            .overwrite_output()
+            .run(quiet=True)
+        )
+        return output_path
+
+    @traced("chunked_encoder.encode_audio")
+    def encode_audio(self, video_path: str, ranges: List[Tuple[float, float]], output_path: str) -> str:
+        """把所有区间的音频按顺序拼接后一次编码，避免每块各自带编码器前导静音"""
+        streams = [ffmpeg.input(video_path, ss=start, t=end - start).audio for start, end in ranges]
+        audio = streams[0] if len(streams) == 1 else ffmpeg.concat(*streams, v=0, a=1)
+        (
+            ffmpeg
+            .output(audio, output_path, vn=None, **AUDIO_ENCODE_ARGS)
+            .overwrite_output()
+            .run(quiet=True)
+        )
+        return output_path
+
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="chunked_transcode")
+    @traced("chunked_encoder.transcode")
+    def transcode(
+        self,
+        video_path: str,
+        ranges: List[Tuple[float, float]],
+        output_path: str,
+        height: Optional[int] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+        concurrency: int = 1
+    ) -> str:
+        """
+        重新编码并按顺序拼接多个时间区间
+
+        Args:
+            video_path: 源视频路径
+            ranges: 时间区间 [(start, end), ...]
+            output_path: 输出路径
+            height: 缩放到的高度（宽度按比例），不传则保持原尺寸
+            on_progress: 进度回调 (0-100)
+            concurrency: 同时进行的转码任务数，并发进程数和编码线程数按此均分
+
+        Returns:
+            输出文件路径
+        """
+        report = on_progress or (lambda progress: None)
+        budget = max(1, self.workers // concurrency)
+        chunks = self.plan_chunks(video_path, ranges, budget)
+        has_audio = self.video_processor.get_video_info(video_path).get('has_audio', False)
+        workers = min(budget, len(chunks))
+        # 进程数少于核数时让每个编码器多用几个线程
+        threads = max(1, (os.cpu_count() or 1) // (workers * concurrency))
+
+        token = uuid.uuid4().hex
+        chunk_paths = [self._temp_path(f"chunk_{i}_{token}.mp4") for i in range(len(chunks))]
+        audio_path = self._temp_path(f"chunk_audio_{token}.m4a") if has_audio else None
+        list_file = self._temp_path(f"concat_{token}.txt")
+        logger.info(f"Chunked transcode: {len(chunks)} chunks, {workers} workers, {threads} threads each")
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers + (1 if has_audio else 0)) as executor:
+                futures = [
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        self.encode_chunk, video_path, start, end, path, height, threads
+                    )
+                    for (start, end), path in zip(chunks, chunk_paths)
+                ]
+                if has_audio:
+                    futures.append(executor.submit(
+                        contextvars.copy_context().run,
+                        self.encode_audio, video_path, ranges, audio_path
+                    ))
+                for done, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    report(95 * done // len(futures))
+
+            with open(list_file, 'w') as f:
+                for path in chunk_paths:
+                    f.write(f"file '{path}'\n")
+
+            with span("chunked_encoder.concat", chunks=len(chunks)):
+                video = ffmpeg.input(list_file, format='concat', safe=0).video
+                streams = [video, ffmpeg.input(audio_path).audio] if has_audio else [video]
+                (
+                    ffmpeg
+                    .output(*streams, output_path, c='copy', movflags='+faststart')
+                    .overwrite_output()
+                    .run(quiet=True)
+                )
+            report(100)
+            return output_path
+        except Exception as e:
+            logger.error(f"Error in chunked transcode: {e}")
+            raise
+        finally:
+            for path in chunk_paths + [audio_path, list_file]:
+                if path and os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,205 @@
+import bisect
+import threading
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.models.schemas import ClipInfo
+
+OVERLAP_METRICS = ("iou", "shorter")
+
+# 缓存的索引数上限，超出时整体清空
+MAX_INDEXES = 1024
+
+
+def clip_overlap(a: ClipInfo, b: ClipInfo, metric: str = "shorter") -> float:
+    """
+    两个片段的重叠程度
+
+    Args:
+        a: 片段
+        b: 片段
+        metric: iou（交集/并集）或 shorter（交集/较短片段时长）
+
+    Returns:
+        0-1 之间的重叠比例
+    """
+    intersection = min(a.end_seconds, b.end_seconds) - max(a.start_seconds, b.start_seconds)
+    if intersection <= 0:
+        return 0.0
+    length_a = a.end_seconds - a.start_seconds
+    length_b = b.end_seconds - b.start_seconds
+    if metric == "iou":
+        denominator = length_a + length_b - intersection
+    else:
+        denominator = min(length_a, length_b)
+    return intersection / denominator if denominator > 0 else 0.0
+
+
+class ClipIndex:
+    """
+    片段区间索引（不可变，片段列表变化后重建）
+
+    片段按开始时间排序，并在排序后的数组上建一棵记录区间内最大结束时间的
+    线段树。查询时先用二分找出开始时间满足条件的前缀，再在线段树上只下探
+    最大结束时间满足条件的子树，时间复杂度 O(log n + k)（k 为结果数）。
+    """
+
+    def __init__(self, clips: List[ClipInfo]):
+        self.clips = sorted(clips, key=lambda clip: (clip.start_seconds, clip.end_seconds))
+        self.starts = [clip.start_seconds for clip in self.clips]
+        ends = [clip.end_seconds for clip in self.clips]
+
+        self.size = 1
+        while self.size < max(len(self.clips), 1):
+            self.size *= 2
+        self.max_end = [float("-inf")] * (2 * self.size)
+        self.max_end[self.size:self.size + len(ends)] = ends
+        for node in range(self.size - 1, 0, -1):
+            self.max_end[node] = max(self.max_end[2 * node], self.max_end[2 * node + 1])
+
+    def __len__(self) -> int:
+        return len(self.clips)
+
+    def _collect(self, limit: int, threshold: float, inclusive: bool) -> List[ClipInfo]:
+        """返回排序位置小于 limit 且结束时间大于（或等于）threshold 的片段，按开始时间排序"""
+        result = []
+        if limit <= 0:
+            return result
+        # 栈中为 (节点, 覆盖区间起点, 覆盖区间终点)，先压右子树以保证输出有序
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit:
+                continue
+            best = self.max_end[node]
+            if best < threshold or (best == threshold and not inclusive):
+                continue
+            if node >= self.size:
+                result.append(self.clips[lo])
+                continue
+            middle = (lo + hi) // 2
+            stack.append((2 * node + 1, middle, hi))
+            stack.append((2 * node, lo, middle))
+        return result
+
+    def at(self, t: float) -> List[ClipInfo]:
+        """覆盖时间点 t 的片段（start <= t <= end）"""
+        return self._collect(bisect.bisect_right(self.starts, t), t, inclusive=True)
+
+    def overlapping(self, start: float, end: float) -> List[ClipInfo]:
+        """与区间 (start, end) 有正时长重叠的片段"""
+        candidates = self._collect(bisect.bisect_left(self.starts, end), start, inclusive=False)
+        # 零时长片段（或零时长查询）满足开区间条件但交集为 0，需要剔除
+        return [
+            clip for clip in candidates
+            if min(end, clip.end_seconds) - max(start, clip.start_seconds) > 0
+        ]
+
+    def suppress(
+        self,
+        threshold: float,
+        metric: str = "iou"
+    ) -> Tuple[List[ClipInfo], Dict[str, str]]:
+        """
+        非极大值抑制：按分数从高到低保留片段，与已保留片段重叠达到阈值的片段被抑制
+
+        Args:
+            threshold: 重叠阈值（0-1）
+            metric: 重叠度量 iou/shorter
+
+        Returns:
+            (保留的片段（按开始时间排序）, 被抑制片段ID -> 抑制它的片段ID)
+        """
+        suppressed: Dict[str, str] = {}
+        kept = set()
+        for clip in sorted(self.clips, key=lambda c: c.score, reverse=True):
+            if clip.id in suppressed:
+                continue
+            kept.add(clip.id)
+            for other in self.overlapping(clip.start_seconds, clip.end_seconds):
+                if other.id in kept or other.id in suppressed:
+                    continue
+                if clip_overlap(clip, other, metric) >= threshold:
+                    suppressed[other.id] = clip.id
+        return [clip for clip in self.clips if clip.id in kept], suppressed
+
+    def merge(self, gap: float = 0.0) -> Tuple[List[ClipInfo], Dict[str, str]]:
+        """
+        合并重叠（或间隔不超过 gap 秒）的片段为一个覆盖并集的片段
+
+        合并后的片段沿用组内分数最高片段的ID、描述和类型，分数取组内最高分。
+
+        Returns:
+            (合并后的片段（按开始时间排序）, 被合并片段ID -> 合并后片段ID)
+        """
+        groups: List[List[ClipInfo]] = []
+        group_end = float("-inf")
+        for clip in self.clips:
+            if groups and clip.start_seconds <= group_end + gap:
+                groups[-1].append(clip)
+                group_end = max(group_end, clip.end_seconds)
+            else:
+                groups.append([clip])
+                group_end = clip.end_seconds
+
+        merged = []
+        absorbed: Dict[str, str] = {}
+        for group in groups:
+            best = max(group, key=lambda c: c.score)
+            if len(group) == 1:
+                merged.append(best)
+                continue
+            start = group[0].start_seconds
+            end = max(clip.end_seconds for clip in group)
+            merged.append(best.model_copy(update={
+                "start_seconds": start,
+                "end_seconds": end,
+                "start_time": group[0].start_time,
+                "end_time": max(group, key=lambda c: c.end_seconds).end_time
+            }))
+            for clip in group:
+                if clip.id != best.id:
+                    absorbed[clip.id] = best.id
+        return merged, absorbed
+
+
+class ClipIndexCache:
+    """按视频缓存片段索引，视频版本号变化（片段被修改）后下次查询时重建"""
+
+    def __init__(self, max_entries: int = MAX_INDEXES):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[Hashable, ClipIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, video_id: str, version: Hashable, clips: List[ClipInfo]) -> ClipIndex:
+        """
+        获取视频的片段索引
+
+        Args:
+            video_id: 视频ID
+            version: 视频当前版本号
+            clips: 视频当前片段列表
+
+        Returns:
+            片段索引
+        """
+        with self._lock:
+            entry = self._entries.get(video_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        index = ClipIndex(clips)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[video_id] = (version, index)
+        return index
+
+    def invalidate(self, video_id: Optional[str] = None) -> None:
+        with self._lock:
+            if video_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(video_id, None)
+
+
+clip_indexes = ClipIndexCache()
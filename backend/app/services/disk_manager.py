@@ -0,0 +1,313 @@
+import os
+import re
+import time
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 目录型产物：OUTPUT_DIR 下的子目录 -> 类别；目录下每个条目为一个产物，条目名即所属者
+# （storage 例外：每个对象文件为一个产物，所属者为对象键）
+DIRECTORY_CATEGORIES = {
+    "thumbnails": "thumbnails",
+    "hls": "hls",
+    "features": "features",
+    "proxies": "proxies",
+    "storage": "storage",
+    "segments": "segments"
+}
+
+# OUTPUT_DIR 根目录下的文件名规则 -> 类别
+FILE_PATTERNS = [
+    (re.compile(r"^temp_clip_\d+_[0-9a-f]+\.mp4$"), "temp"),
+    (re.compile(r"^concat_[0-9a-f]+\.txt$"), "temp"),
+    (re.compile(r"^chunk_(\d+|audio)_[0-9a-f]+\.(mp4|m4a)$"), "temp"),
+    (re.compile(r"^prefilter_[0-9a-f]+\.pcm$"), "temp"),
+    (re.compile(r"^reframe_[0-9a-f]+_\d+\.cmd$"), "temp"),
+    (re.compile(r"^frames_[0-9a-f]+\.txt$"), "temp"),
+    (re.compile(r"^preview_[0-9a-f]+\.mp4$"), "previews"),
+    (re.compile(r"^(merged|clip)_[0-9a-f]+\.mp4$"), "exports"),
+    (re.compile(r"^rendition_[0-9a-f]+_\w+\.mp4$"), "exports")
+]
+
+# 写入中的临时文件
+TEMP_FILE_PATTERN = re.compile(r"\.tmp(\.\w+)?$")
+
+# 从不自动删除的类别（分段是视频本身）
+PROTECTED_CATEGORIES = {"segments"}
+
+# 超过最大存活时间即视为孤儿的类别
+EPHEMERAL_CATEGORIES = {"temp", "previews"}
+
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(value: str) -> int:
+    """解析 500M、20G 这样的容量，0 表示不限"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", value.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_quotas(quotas: str) -> Dict[str, int]:
+    """解析 "previews:2G,exports:20G" 格式的类别配额"""
+    result = {}
+    for item in quotas.split(","):
+        if not item.strip():
+            continue
+        category, size = item.split(":")
+        result[category.strip()] = parse_size(size)
+    return result
+
+
+def touch(path: str) -> None:
+    """记录一次访问（只更新 atime，不影响依赖 mtime 的缓存校验）"""
+    try:
+        stat = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    except OSError:
+        pass
+
+
+class Artifact:
+    """OUTPUT_DIR 中的一个产物（文件或目录）"""
+
+    __slots__ = ("path", "category", "owner", "size", "last_access", "is_dir")
+
+    def __init__(self, path: Path, category: str, owner: Optional[str], is_dir: bool):
+        self.path = path
+        self.category = category
+        self.owner = owner
+        self.is_dir = is_dir
+        self.size = 0
+        self.last_access = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "path": str(self.path),
+            "category": self.category,
+            "owner": self.owner,
+            "size": self.size,
+            "last_access": self.last_access
+        }
+
+
+class DiskManager:
+    """OUTPUT_DIR 空间管理：追踪产物，按类别和全局配额做 LRU 淘汰，清理孤儿文件"""
+
+    def __init__(
+        self,
+        output_dir: str = None,
+        quotas: Optional[Dict[str, int]] = None,
+        total_quota: Optional[int] = None,
+        min_age: float = None,
+        temp_max_age: float = None,
+        owner_alive: Optional[Callable[[str, Optional[str], Path], bool]] = None
+    ):
+        """
+        Args:
+            output_dir: 管理的目录，默认 OUTPUT_DIR
+            quotas: 类别 -> 配额字节数，默认 DISK_QUOTAS
+            total_quota: 全局配额字节数，0 表示不限，默认 DISK_QUOTA_TOTAL
+            min_age: 最近访问或修改不足该秒数的产物不会被删除（可能正在使用）
+            temp_max_age: 临时文件和预览超过该秒数视为孤儿
+            owner_alive: (类别, 所属者, 路径) -> 所属者是否仍存在，用于识别孤儿；
+                对 storage 类别表示对象是否仍被视频或片段引用，被引用的对象不会被淘汰
+        """
+        self.output_dir = Path(output_dir or settings.OUTPUT_DIR)
+        self.quotas = parse_quotas(settings.DISK_QUOTAS) if quotas is None else quotas
+        self.total_quota = parse_size(settings.DISK_QUOTA_TOTAL) if total_quota is None else total_quota
+        self.min_age = settings.DISK_MIN_AGE_SECONDS if min_age is None else min_age
+        self.temp_max_age = settings.DISK_TEMP_MAX_AGE_SECONDS if temp_max_age is None else temp_max_age
+        self.owner_alive = owner_alive
+        self.artifacts: List[Artifact] = []
+        self.last_scan: Optional[float] = None
+        self.last_sweep: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def classify(self, path: Path) -> Optional[Artifact]:
+        """根据路径判断产物类别和所属者"""
+        relative = path.relative_to(self.output_dir)
+        parts = relative.parts
+        if len(parts) >= 2 and parts[0] == "storage" and path.is_file():
+            if TEMP_FILE_PATTERN.search(parts[-1]):
+                return Artifact(path, "temp", None, False)
+            return Artifact(path, "storage", "/".join(parts[1:]), False)
+        if len(parts) == 2 and parts[0] in DIRECTORY_CATEGORIES:
+            category = DIRECTORY_CATEGORIES[parts[0]]
+            name = parts[1]
+            if TEMP_FILE_PATTERN.search(name):
+                return Artifact(path, "temp", None, path.is_dir())
+            owner = name
+            if category == "segments":
+                # segment_{序号}_{分段ID}.mp4
+                owner = Path(name).stem.split("_")[-1]
+            elif category == "proxies":
+                owner = None
+            return Artifact(path, category, owner, path.is_dir())
+        if len(parts) == 1 and path.is_file():
+            for pattern, category in FILE_PATTERNS:
+                if pattern.match(parts[0]):
+                    return Artifact(path, category, None, False)
+            if TEMP_FILE_PATTERN.search(parts[0]):
+                return Artifact(path, "temp", None, False)
+            return Artifact(path, "other", None, False)
+        return None
+
+    def _measure(self, artifact: Artifact) -> None:
+        paths = [artifact.path]
+        if artifact.is_dir:
+            paths = [Path(root) / name for root, _, files in os.walk(artifact.path) for name in files]
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            artifact.size += stat.st_size
+            artifact.last_access = max(artifact.last_access, stat.st_atime, stat.st_mtime)
+        if not paths:
+            stat = artifact.path.stat()
+            artifact.last_access = stat.st_mtime
+
+    def scan(self) -> List[Artifact]:
+        """扫描 OUTPUT_DIR，重建产物列表"""
+        artifacts = []
+        candidates = []
+        for entry in self.output_dir.iterdir():
+            if entry.is_dir() and entry.name == "storage":
+                candidates.extend(Path(root) / name for root, _, files in os.walk(entry) for name in files)
+            elif entry.is_dir() and entry.name in DIRECTORY_CATEGORIES:
+                candidates.extend(entry.iterdir())
+            elif entry.is_file():
+                candidates.append(entry)
+
+        for path in candidates:
+            try:
+                artifact = self.classify(path)
+                if artifact is not None:
+                    self._measure(artifact)
+                    artifacts.append(artifact)
+            except OSError:
+                # 扫描期间被其他任务删除
+                continue
+
+        with self._lock:
+            self.artifacts = artifacts
+            self.last_scan = time.time()
+        return artifacts
+
+    def usage(self) -> dict:
+        """按类别统计占用（基于最近一次扫描）"""
+        with self._lock:
+            artifacts = list(self.artifacts)
+        categories: Dict[str, dict] = {}
+        for artifact in artifacts:
+            entry = categories.setdefault(artifact.category, {"bytes": 0, "count": 0})
+            entry["bytes"] += artifact.size
+            entry["count"] += 1
+        for category, entry in categories.items():
+            entry["quota"] = self.quotas.get(category, 0)
+        return {
+            "total_bytes": sum(a.size for a in artifacts),
+            "total_quota": self.total_quota,
+            "categories": categories,
+            "last_scan": self.last_scan,
+            "last_sweep": self.last_sweep
+        }
+
+    def _removable(self, artifact: Artifact, now: float) -> bool:
+        if artifact.category in PROTECTED_CATEGORIES or now - artifact.last_access < self.min_age:
+            return False
+        # 仍被视频（storage_key）或片段（thumbnail_key）引用的存储对象删除后无法自动重建
+        if artifact.category == "storage" and self.owner_alive is not None:
+            return not self.owner_alive(artifact.category, artifact.owner, artifact.path)
+        return True
+
+    def _is_orphan(self, artifact: Artifact, now: float) -> bool:
+        age = now - artifact.last_access
+        if artifact.category in EPHEMERAL_CATEGORIES:
+            return age >= self.temp_max_age
+        if self.owner_alive is None or artifact.category in ("proxies", "storage", "other"):
+            return False
+        if artifact.category == "exports" and age < self.temp_max_age:
+            return False
+        return not self.owner_alive(artifact.category, artifact.owner, artifact.path)
+
+    def _remove(self, artifact: Artifact) -> bool:
+        try:
+            if artifact.is_dir:
+                shutil.rmtree(artifact.path)
+            else:
+                artifact.path.unlink()
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger.warning(f"Failed to remove {artifact.path}: {e}")
+            return False
+
+    def sweep(self) -> dict:
+        """
+        清理孤儿产物并执行配额
+
+        Returns:
+            本次清理的统计
+        """
+        started = time.perf_counter()
+        now = time.time()
+        artifacts = self.scan()
+        removed: Dict[str, dict] = {}
+
+        def remove(artifact: Artifact, reason: str) -> None:
+            if self._remove(artifact):
+                entry = removed.setdefault(reason, {"bytes": 0, "count": 0})
+                entry["bytes"] += artifact.size
+                entry["count"] += 1
+                artifacts.remove(artifact)
+
+        # 孤儿：临时文件超时、所属视频或导出已不存在
+        for artifact in list(artifacts):
+            if self._removable(artifact, now) and self._is_orphan(artifact, now):
+                remove(artifact, "orphan")
+
+        # 类别配额：最久未访问的先淘汰
+        for category, quota in self.quotas.items():
+            if not quota:
+                continue
+            members = sorted(
+                (a for a in artifacts if a.category == category), key=lambda a: a.last_access
+            )
+            used = sum(a.size for a in members)
+            for artifact in members:
+                if used <= quota:
+                    break
+                if self._removable(artifact, now):
+                    remove(artifact, f"quota:{category}")
+                    used -= artifact.size
+
+        # 全局配额：跨类别 LRU
+        if self.total_quota:
+            used = sum(a.size for a in artifacts)
+            for artifact in sorted(artifacts, key=lambda a: a.last_access):
+                if used <= self.total_quota:
+                    break
+                if artifact.category != "other" and self._removable(artifact, now):
+                    remove(artifact, "quota:total")
+                    used -= artifact.size
+
+        with self._lock:
+            self.artifacts = artifacts
+        self.last_sweep = {
+            "timestamp": now,
+            "seconds": round(time.perf_counter() - started, 3),
+            "removed": removed
+        }
+        if removed:
+            logger.info(f"Disk sweep removed: {removed}")
+        return self.last_sweep
@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 每个订阅者的事件队列上限，慢客户端溢出时丢弃最旧的事件
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """单个客户端连接的订阅，可同时关注多个视频"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, video_ids: Optional[Iterable[str]] = None):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # None 表示关注所有视频
+        self.video_ids: Optional[Set[str]] = set(video_ids) if video_ids else None
+
+    def watch(self, video_ids: Iterable[str]) -> None:
+        """增加关注的视频"""
+        if self.video_ids is None:
+            self.video_ids = set()
+        self.video_ids.update(video_ids)
+
+    def unwatch(self, video_ids: Iterable[str]) -> None:
+        """取消关注的视频"""
+        if self.video_ids is not None:
+            self.video_ids.difference_update(video_ids)
+
+    def matches(self, video_id: Optional[str]) -> bool:
+        return self.video_ids is None or video_id is None or video_id in self.video_ids
+
+    def _put(self, event: dict) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    """进程内事件总线：线程安全发布，按订阅的视频分发到各连接的事件循环"""
+
+    def __init__(self):
+        self._subscriptions: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, video_ids: Optional[Iterable[str]] = None) -> Subscription:
+        """创建订阅（须在事件循环中调用）"""
+        subscription = Subscription(asyncio.get_running_loop(), video_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """取消订阅"""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event_type: str, video_id: Optional[str] = None, **data) -> None:
+        """
+        发布事件（可在任意线程调用）
+
+        Args:
+            event_type: 事件类型，如 status、progress、clips、export
+            video_id: 相关视频ID，None 表示广播
+            **data: 事件数据
+        """
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "video_id": video_id,
+            "timestamp": time.time(),
+            **data
+        }
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.matches(video_id)]
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # 事件循环已关闭，连接已失效
+                self.unsubscribe(subscription)
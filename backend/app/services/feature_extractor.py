@@ -0,0 +1,312 @@
+import ffmpeg
+import os
+import json
+import time
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from app.config import settings
+from app.services.disk_manager import touch
+
+logger = logging.getLogger(__name__)
+
+# 解码参数：极低分辨率灰度帧 + 低采样率单声道PCM
+FRAME_WIDTH = 64
+FRAME_HEIGHT = 36
+ANALYSIS_FPS = 4
+AUDIO_SAMPLE_RATE = 8000
+
+# 每次从管道读取的帧数
+CHUNK_FRAMES = 1024
+
+# 镜头切换判定：相邻帧灰度直方图差异阈值（0-1）及最小间隔（秒）
+SCENE_THRESHOLD = 0.35
+SCENE_MIN_GAP = 1.0
+HISTOGRAM_BINS = 16
+
+
+def decode_streams(
+    video_path: str,
+    audio_path: str,
+    fps: float = ANALYSIS_FPS,
+    width: int = FRAME_WIDTH,
+    height: int = FRAME_HEIGHT,
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    has_audio: bool = True,
+    start: Optional[float] = None,
+    duration: Optional[float] = None
+) -> Iterator[np.ndarray]:
+    """
+    单次解码：视频缩放为灰度小图经管道输出，音频同时写入原始PCM文件
+
+    Args:
+        video_path: 视频文件路径
+        audio_path: PCM输出路径（s16le 单声道）
+        fps: 抽帧帧率
+        width: 帧宽
+        height: 帧高
+        sample_rate: 音频采样率
+        has_audio: 是否有音轨（为 False 时不输出音频，audio_path 可为 None）
+        start: 解码起点（秒），不传则从头开始
+        duration: 解码时长（秒），不传则到结尾
+
+    Yields:
+        形状为 (n, height, width) 的 uint8 帧数组块
+    """
+    input_args = {}
+    if start is not None:
+        input_args['ss'] = start
+    if duration is not None:
+        input_args['t'] = duration
+    source = ffmpeg.input(video_path, **input_args)
+    outputs = [
+        source.video
+        .filter('fps', fps=fps)
+        .filter('scale', width, height, flags='fast_bilinear')
+        .output('pipe:', format='rawvideo', pix_fmt='gray')
+    ]
+    if has_audio:
+        outputs.append(
+            source.audio.output(
+                audio_path, format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate
+            )
+        )
+
+    process = (
+        ffmpeg
+        .merge_outputs(*outputs)
+        .global_args('-nostats', '-loglevel', 'error')
+        .overwrite_output()
+        .run_async(pipe_stdout=True)
+    )
+
+    frame_size = width * height
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(frame_size * CHUNK_FRAMES)
+            if not data:
+                break
+            usable = len(data) - len(data) % frame_size
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.uint8).reshape(-1, height, width)
+        finished = True
+    finally:
+        process.stdout.close()
+        if not finished:
+            # 调用方提前停止或处理出错：结束进程，不用解码错误掩盖原异常
+            process.kill()
+            process.wait()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg decode failed for {video_path}")
+
+
+def read_pcm(audio_path: str) -> np.ndarray:
+    """以内存映射方式读取 s16le PCM 文件"""
+    if not os.path.exists(audio_path) or os.path.getsize(audio_path) < 2:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(audio_path, dtype=np.int16, mode='r')
+
+
+def window_rms(samples: np.ndarray, window: int) -> np.ndarray:
+    """
+    按固定窗口计算RMS响度（0-1，按窗口分块处理以限制内存）
+
+    Args:
+        samples: int16 PCM 采样
+        window: 窗口采样数
+
+    Returns:
+        每个窗口的RMS，最后不足一个窗口的部分单独计算
+    """
+    n_windows = int(np.ceil(len(samples) / window)) if len(samples) else 0
+    rms = np.zeros(n_windows, dtype=np.float32)
+    block = window * 600
+    for start in range(0, len(samples), block):
+        chunk = np.asarray(samples[start:start + block], dtype=np.float32) / 32768.0
+        full = len(chunk) // window
+        first = start // window
+        if full:
+            squared = np.square(chunk[:full * window]).reshape(full, window)
+            rms[first:first + full] = np.sqrt(squared.mean(axis=1))
+        if len(chunk) % window:
+            rms[first + full] = np.sqrt(np.square(chunk[full * window:]).mean())
+    return rms
+
+
+class FeatureExtractor:
+    """低成本视频信号提取：镜头切换、逐秒运动能量、逐秒音频响度"""
+
+    def __init__(self, video_processor, output_dir: str = None):
+        self.video_processor = video_processor
+        self.output_dir = Path(output_dir or settings.OUTPUT_DIR) / "features"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.running = set()
+        self._lock = threading.Lock()
+
+    def get_feature_dir(self, video_id: str) -> Path:
+        """获取视频的特征存储目录"""
+        return self.output_dir / video_id
+
+    def is_running(self, video_id: str) -> bool:
+        """是否正在提取"""
+        with self._lock:
+            return video_id in self.running
+
+    def extract(self, video_id: str, video_path: str) -> dict:
+        """
+        提取视频特征并保存为 .npy 数组（阻塞执行，应在后台任务中调用）
+
+        Args:
+            video_id: 视频ID
+            video_path: 视频文件路径
+
+        Returns:
+            特征元信息
+        """
+        with self._lock:
+            self.running.add(video_id)
+        try:
+            return self._extract(video_id, video_path)
+        finally:
+            with self._lock:
+                self.running.discard(video_id)
+
+    def _extract(self, video_id: str, video_path: str) -> dict:
+        started = time.perf_counter()
+        video_info = self.video_processor.get_video_info(video_path)
+        duration = video_info.get('duration', 0)
+
+        feature_dir = self.get_feature_dir(video_id)
+        feature_dir.mkdir(parents=True, exist_ok=True)
+        audio_path = str(feature_dir / "audio.pcm.tmp")
+
+        frame_diffs = []
+        histograms = []
+        previous = None
+        n_frames = 0
+
+        try:
+            for frames in decode_streams(
+                video_path, audio_path, has_audio=video_info.get('has_audio', True)
+            ):
+                frames = frames.astype(np.int16)
+                chained = frames if previous is None else np.concatenate([previous, frames])
+                # 相邻帧平均绝对差，归一化到 0-1
+                frame_diffs.append(
+                    np.abs(np.diff(chained, axis=0)).mean(axis=(1, 2)) / 255.0
+                )
+                histograms.append(self._histograms(frames))
+                previous = frames[-1:]
+                n_frames += len(frames)
+
+            diffs = np.concatenate(frame_diffs) if frame_diffs else np.zeros(0)
+            hists = np.concatenate(histograms) if histograms else np.zeros((0, HISTOGRAM_BINS))
+
+            # 帧时间戳（秒），diffs[i] 对应第 i+1 帧
+            n_seconds = int(np.ceil(duration)) if duration else int(np.ceil(n_frames / ANALYSIS_FPS))
+            motion = self._per_second(diffs, np.arange(1, n_frames) / ANALYSIS_FPS, n_seconds)
+            scene_cuts = self._scene_cuts(hists)
+
+            samples = read_pcm(audio_path)
+            loudness = window_rms(samples, AUDIO_SAMPLE_RATE)
+            loudness = np.pad(loudness, (0, max(0, n_seconds - len(loudness))))[:n_seconds]
+            del samples
+        finally:
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+
+        np.save(feature_dir / "motion.npy", motion.astype(np.float32))
+        np.save(feature_dir / "loudness.npy", loudness.astype(np.float32))
+        np.save(feature_dir / "scene_cuts.npy", scene_cuts.astype(np.float32))
+
+        elapsed = time.perf_counter() - started
+        stat = os.stat(video_path)
+        meta = {
+            "video_id": video_id,
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "duration": duration,
+            "fps": ANALYSIS_FPS,
+            "frame_size": [FRAME_WIDTH, FRAME_HEIGHT],
+            "audio_sample_rate": AUDIO_SAMPLE_RATE,
+            "frames": n_frames,
+            "scene_cut_count": int(len(scene_cuts)),
+            "elapsed_seconds": round(elapsed, 3),
+            "realtime_factor": round(duration / elapsed, 1) if elapsed > 0 else None
+        }
+        (feature_dir / "meta.json").write_text(json.dumps(meta))
+
+        logger.info(
+            f"Features extracted for {video_id}: {n_frames} frames, "
+            f"{len(scene_cuts)} scene cuts, {meta['realtime_factor']}x realtime"
+        )
+        return meta
+
+    def load(self, video_id: str, video_path: Optional[str] = None) -> Optional[Dict]:
+        """
+        读取已提取的特征（数组以内存映射方式打开）
+
+        Args:
+            video_id: 视频ID
+            video_path: 源视频路径，传入时会校验源文件未变化
+
+        Returns:
+            {"meta": dict, "motion": ndarray, "loudness": ndarray, "scene_cuts": ndarray}，
+            不存在或已过期时返回 None
+        """
+        feature_dir = self.get_feature_dir(video_id)
+        meta_path = feature_dir / "meta.json"
+        if not meta_path.exists():
+            return None
+
+        meta = json.loads(meta_path.read_text())
+        touch(str(meta_path))
+        if video_path and os.path.exists(video_path):
+            stat = os.stat(video_path)
+            if stat.st_size != meta["source_size"] or stat.st_mtime_ns != meta["source_mtime_ns"]:
+                return None
+
+        return {
+            "meta": meta,
+            "motion": np.load(feature_dir / "motion.npy", mmap_mode='r'),
+            "loudness": np.load(feature_dir / "loudness.npy", mmap_mode='r'),
+            "scene_cuts": np.load(feature_dir / "scene_cuts.npy", mmap_mode='r')
+        }
+
+    @staticmethod
+    def _histograms(frames: np.ndarray) -> np.ndarray:
+        """批量计算每帧归一化灰度直方图"""
+        n = len(frames)
+        bins = frames.reshape(n, -1).astype(np.int64) * HISTOGRAM_BINS >> 8
+        offsets = (np.arange(n) * HISTOGRAM_BINS)[:, None]
+        counts = np.bincount((bins + offsets).ravel(), minlength=n * HISTOGRAM_BINS)
+        return counts.reshape(n, HISTOGRAM_BINS) / bins.shape[1]
+
+    @staticmethod
+    def _per_second(values: np.ndarray, times: np.ndarray, n_seconds: int) -> np.ndarray:
+        """按秒聚合取均值"""
+        if n_seconds <= 0:
+            return np.zeros(0)
+        index = np.minimum(times.astype(np.int64), n_seconds - 1)
+        sums = np.bincount(index, weights=values, minlength=n_seconds)
+        counts = np.bincount(index, minlength=n_seconds)
+        return sums / np.maximum(counts, 1)
+
+    @staticmethod
+    def _scene_cuts(histograms: np.ndarray) -> np.ndarray:
+        """根据相邻帧直方图差异检测镜头切换，返回切换时间戳（秒）"""
+        if len(histograms) < 2:
+            return np.zeros(0)
+        distance = 0.5 * np.abs(np.diff(histograms, axis=0)).sum(axis=1)
+        candidates = np.flatnonzero(distance > SCENE_THRESHOLD) + 1
+        if len(candidates) == 0:
+            return np.zeros(0)
+
+        times = candidates / ANALYSIS_FPS
+        # 合并间隔过近的切换点，保留每组第一个
+        keep = np.concatenate([[True], np.diff(times) >= SCENE_MIN_GAP])
+        return times[keep]
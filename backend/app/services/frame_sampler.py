@@ -0,0 +1,189 @@
+import os
+import re
+import uuid
+import base64
+import ffmpeg
+import logging
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+
+from app.config import settings
+from app.services.metrics import VIDEO_PROCESSOR_SECONDS, timed
+from app.services.tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_MODES = ("scene", "uniform")
+
+# 场景模式下每个入选帧对应的候选帧数（候选帧率 = 预算 * 该值 / 时长）
+CANDIDATES_PER_FRAME = 8
+# JPEG 质量（ffmpeg q:v，2-31，越小越好）
+JPEG_QUALITY = 5
+
+JPEG_START = b"\xff\xd8\xff"
+METADATA_FRAME = re.compile(r"^frame:(\d+)\s+pts:\S+\s+pts_time:(\S+)")
+METADATA_SCORE = re.compile(r"^lavfi\.scene_score=(\S+)")
+
+
+class SampledFrame:
+    """抽取的一帧：源视频时间戳、JPEG 数据和场景变化分数"""
+
+    __slots__ = ("time", "image", "score")
+
+    def __init__(self, time: float, image: bytes, score: float = 0.0):
+        self.time = time
+        self.image = image
+        self.score = score
+
+    def data_url(self) -> str:
+        return "data:image/jpeg;base64," + base64.b64encode(self.image).decode()
+
+
+def split_jpegs(data: bytes) -> List[bytes]:
+    """把 image2pipe 输出的连续 JPEG 流拆成单帧"""
+    starts = [m.start() for m in re.finditer(re.escape(JPEG_START), data)]
+    return [data[a:b] for a, b in zip(starts, starts[1:] + [len(data)])]
+
+
+def parse_scene_scores(path: str) -> dict:
+    """解析 metadata 滤镜输出，返回 帧序号 -> (时间戳, 场景分数)"""
+    frames = {}
+    current = None
+    with open(path) as f:
+        for line in f:
+            match = METADATA_FRAME.match(line)
+            if match:
+                current = int(match.group(1))
+                frames[current] = (float(match.group(2)), 0.0)
+                continue
+            match = METADATA_SCORE.match(line)
+            if match and current is not None:
+                frames[current] = (frames[current][0], float(match.group(1)))
+    return frames
+
+
+class FrameSampler:
+    """
+    关键帧抽样：一次解码得到按预算挑选的代表帧，供以图片方式送模型分析
+
+    场景模式按候选帧率解码，由 select 滤镜计算相邻候选帧的场景变化分数；
+    时间轴均分为预算个区间，每个区间取变化最大的一帧，与上一入选帧几乎
+    相同的帧（幻灯片停留、口播）直接丢弃，实际帧数可少于预算。
+    均匀模式直接按 预算/时长 的帧率抽帧。
+    """
+
+    def __init__(self, video_processor, budget: int = None, width: int = None):
+        """
+        Args:
+            video_processor: 用于读取视频信息和输出目录
+            budget: 每次分析最多抽取的帧数，默认 FRAME_BUDGET
+            width: 输出图片宽度（不放大），默认 FRAME_WIDTH
+        """
+        self.video_processor = video_processor
+        self.budget = budget or settings.FRAME_BUDGET
+        self.width = width or settings.FRAME_WIDTH
+
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="sample_frames")
+    @traced("frame_sampler.sample")
+    def sample(
+        self,
+        video_path: str,
+        mode: str = "scene",
+        budget: Optional[int] = None
+    ) -> List[SampledFrame]:
+        """
+        抽取代表帧
+
+        Args:
+            video_path: 视频路径
+            mode: scene（场景变化）或 uniform（均匀）
+            budget: 最多帧数，不传使用实例默认值
+
+        Returns:
+            按时间排序的帧列表（时间戳为源视频时间）
+        """
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        budget = budget or self.budget
+        info = self.video_processor.get_video_info(video_path)
+        duration = info.get('duration') or 0
+        if duration <= 0:
+            raise RuntimeError(f"Cannot read video duration: {video_path}")
+
+        if mode == "uniform":
+            rate = budget / duration
+        else:
+            rate = min(settings.FRAME_SAMPLE_FPS, budget * CANDIDATES_PER_FRAME / duration)
+
+        token = uuid.uuid4().hex
+        metadata_path = str(Path(self.video_processor.output_dir) / f"frames_{token}.txt")
+        stream = ffmpeg.input(video_path).video.filter('fps', fps=rate)
+        if mode == "scene":
+            stream = (
+                stream
+                .filter('select', 'gte(scene,0)')
+                .filter('metadata', mode='print', key='lavfi.scene_score', file=metadata_path)
+            )
+        if (info.get('width') or 0) > self.width:
+            stream = stream.filter('scale', self.width, -2)
+
+        try:
+            with span("frame_sampler.decode", mode=mode, rate=round(rate, 3)):
+                data, _ = (
+                    ffmpeg
+                    .output(stream, 'pipe:', format='image2pipe', vcodec='mjpeg', **{'q:v': JPEG_QUALITY})
+                    .global_args('-nostats', '-loglevel', 'error')
+                    .run(capture_stdout=True, capture_stderr=True)
+                )
+            images = split_jpegs(data)
+            scores = parse_scene_scores(metadata_path) if mode == "scene" else {}
+        finally:
+            if os.path.exists(metadata_path):
+                os.remove(metadata_path)
+
+        frames = []
+        for i, image in enumerate(images):
+            time, score = scores.get(i, (i / rate, 0.0))
+            frames.append(SampledFrame(min(time, duration), image, 1.0 if i == 0 else score))
+
+        if mode == "scene":
+            frames = self.select(frames, budget, duration)
+        logger.info(
+            f"Sampled {len(frames)} frames ({mode}) from {len(images)} candidates, "
+            f"{sum(len(f.image) for f in frames)} bytes"
+        )
+        return frames
+
+    @staticmethod
+    def select(frames: List[SampledFrame], budget: int, duration: float) -> List[SampledFrame]:
+        """
+        从候选帧中挑选不超过预算的代表帧
+
+        Args:
+            frames: 按时间排序的候选帧
+            budget: 最多帧数
+            duration: 视频时长（秒）
+
+        Returns:
+            入选帧（按时间排序）
+        """
+        if len(frames) <= 1:
+            return frames
+        times = np.array([f.time for f in frames])
+        scores = np.array([f.score for f in frames])
+
+        # 每个区间内取场景变化最大的候选帧
+        bins = np.minimum((times / duration * budget).astype(int), budget - 1)
+        chosen = []
+        for b in np.unique(bins):
+            members = np.flatnonzero(bins == b)
+            chosen.append(members[scores[members].argmax()])
+
+        # 与上一入选帧之间累计变化过小的帧视为重复
+        cumulative = np.cumsum(scores)
+        selected = [chosen[0]]
+        for i in chosen[1:]:
+            if cumulative[i] - cumulative[selected[-1]] >= settings.FRAME_MIN_CHANGE:
+                selected.append(i)
+        return [frames[i] for i in selected]
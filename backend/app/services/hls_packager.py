@@ -0,0 +1,224 @@
+import ffmpeg
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 打包完成标记文件，用于重启后判断是否已完成
+COMPLETE_MARKER = ".complete"
+MASTER_PLAYLIST = "master.m3u8"
+
+
+def parse_ladder(ladder: str) -> List[dict]:
+    """
+    解析码率阶梯配置
+
+    Args:
+        ladder: 形如 "1080:5000,720:2800,480:1400" 的字符串（高度:视频码率kbps）
+
+    Returns:
+        按高度从高到低排序的阶梯列表 [{"name": "720p", "height": 720, "bitrate": 2800}, ...]
+    """
+    rungs = []
+    for item in ladder.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        height, bitrate = item.split(':')
+        rungs.append({
+            "name": f"{int(height)}p",
+            "height": int(height),
+            "bitrate": int(bitrate)
+        })
+    return sorted(rungs, key=lambda r: r["height"], reverse=True)
+
+
+class HLSPackager:
+    """HLS自适应码率打包服务（fMP4分片）"""
+
+    def __init__(self, output_dir: str = None, ladder: str = None):
+        self.output_dir = Path(output_dir or settings.OUTPUT_DIR) / "hls"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ladder = parse_ladder(ladder or settings.HLS_LADDER)
+        self.segment_seconds = settings.HLS_SEGMENT_SECONDS
+        self.audio_bitrate = settings.HLS_AUDIO_BITRATE
+        # 正在打包的任务 video_id -> 状态
+        self.jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def get_package_dir(self, video_id: str) -> Path:
+        """获取视频的HLS输出目录"""
+        return self.output_dir / video_id
+
+    def select_renditions(self, source_height: Optional[int]) -> List[dict]:
+        """
+        根据源视频高度选择码率阶梯（不放大，至少保留最低一档）
+
+        Args:
+            source_height: 源视频高度
+
+        Returns:
+            实际使用的阶梯列表
+        """
+        if not source_height:
+            return self.ladder[-1:]
+        rungs = [r for r in self.ladder if r["height"] <= source_height]
+        return rungs or self.ladder[-1:]
+
+    def get_status(self, video_id: str) -> dict:
+        """
+        获取打包状态
+
+        Returns:
+            {"status": "none"|"packaging"|"ready"|"error", "renditions": [...]}
+        """
+        with self._lock:
+            job = self.jobs.get(video_id)
+            if job is not None:
+                return dict(job)
+
+        package_dir = self.get_package_dir(video_id)
+        if (package_dir / COMPLETE_MARKER).exists():
+            renditions = sorted(
+                p.name for p in package_dir.iterdir()
+                if p.is_dir() and (p / "index.m3u8").exists()
+            )
+            return {"status": "ready", "renditions": renditions}
+        return {"status": "none", "renditions": []}
+
+    def write_master_playlist(
+        self,
+        package_dir: Path,
+        renditions: List[dict],
+        width: int,
+        height: int,
+        has_audio: bool
+    ) -> str:
+        """
+        写入主播放列表
+
+        主播放列表在打包开始前写入，各档位的子播放列表随分片生成逐步更新，
+        因此打包过程中即可开始播放。
+
+        Returns:
+            主播放列表路径
+        """
+        audio_kbps = int(self.audio_bitrate.rstrip('k')) if has_audio else 0
+        codecs = "avc1.640028,mp4a.40.2" if has_audio else "avc1.640028"
+
+        lines = ["#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-INDEPENDENT-SEGMENTS"]
+        for rung in renditions:
+            rung_width = int(round(width * rung["height"] / height / 2)) * 2 if height else 0
+            bandwidth = (rung["bitrate"] + audio_kbps) * 1000
+            info = f"BANDWIDTH={bandwidth},CODECS=\"{codecs}\""
+            if rung_width:
+                info += f",RESOLUTION={rung_width}x{rung['height']}"
+            lines.append(f"#EXT-X-STREAM-INF:{info}")
+            lines.append(f"{rung['name']}/index.m3u8")
+
+        master_path = package_dir / MASTER_PLAYLIST
+        master_path.write_text("\n".join(lines) + "\n")
+        return str(master_path)
+
+    def package(self, video_id: str, video_path: str, video_info: dict) -> str:
+        """
+        将视频打包为多码率fMP4 HLS（阻塞执行，应在后台任务中调用）
+
+        Args:
+            video_id: 视频ID
+            video_path: 源视频路径
+            video_info: VideoProcessor.get_video_info 返回的视频信息
+
+        Returns:
+            主播放列表路径
+        """
+        width = video_info.get('width') or 0
+        height = video_info.get('height') or 0
+        has_audio = video_info.get('has_audio', True)
+        renditions = self.select_renditions(height)
+
+        with self._lock:
+            job = self.jobs.get(video_id)
+            if job is not None and job["status"] == "packaging":
+                return str(self.get_package_dir(video_id) / MASTER_PLAYLIST)
+            self.jobs[video_id] = {
+                "status": "packaging",
+                "renditions": [r["name"] for r in renditions]
+            }
+
+        package_dir = self.get_package_dir(video_id)
+        package_dir.mkdir(parents=True, exist_ok=True)
+        (package_dir / COMPLETE_MARKER).unlink(missing_ok=True)
+        for rung in renditions:
+            (package_dir / rung["name"]).mkdir(exist_ok=True)
+
+        master_path = self.write_master_playlist(
+            package_dir, renditions, width, height, has_audio
+        )
+
+        source = ffmpeg.input(video_path)
+        scaled = source.video.filter_multi_output('split', len(renditions))
+
+        streams = []
+        stream_map = []
+        codec_args = {}
+        for i, rung in enumerate(renditions):
+            streams.append(scaled[i].filter('scale', -2, rung["height"]))
+            codec_args[f'b:v:{i}'] = f"{rung['bitrate']}k"
+            codec_args[f'maxrate:v:{i}'] = f"{int(rung['bitrate'] * 1.07)}k"
+            codec_args[f'bufsize:v:{i}'] = f"{rung['bitrate'] * 2}k"
+            if has_audio:
+                streams.append(source.audio)
+                stream_map.append(f"v:{i},a:{i},name:{rung['name']}")
+            else:
+                stream_map.append(f"v:{i},name:{rung['name']}")
+
+        if has_audio:
+            codec_args['c:a'] = 'aac'
+            codec_args['b:a'] = self.audio_bitrate
+            codec_args['ac'] = 2
+
+        try:
+            (
+                ffmpeg
+                .output(
+                    *streams,
+                    str(package_dir / "%v" / "index.m3u8"),
+                    vcodec='libx264',
+                    preset='veryfast',
+                    pix_fmt='yuv420p',
+                    # 各档位关键帧对齐，保证码率切换无缝
+                    force_key_frames=f"expr:gte(t,n_forced*{self.segment_seconds})",
+                    sc_threshold=0,
+                    f='hls',
+                    hls_time=self.segment_seconds,
+                    # event 类型播放列表随分片生成持续追加，打包期间即可播放
+                    hls_playlist_type='event',
+                    hls_segment_type='fmp4',
+                    hls_fmp4_init_filename='init.mp4',
+                    hls_segment_filename=str(package_dir / "%v" / "seg_%05d.m4s"),
+                    hls_flags='independent_segments+temp_file',
+                    var_stream_map=' '.join(stream_map),
+                    **codec_args
+                )
+                .overwrite_output()
+                .run(quiet=True)
+            )
+            (package_dir / COMPLETE_MARKER).touch()
+            with self._lock:
+                self.jobs.pop(video_id, None)
+            logger.info(f"HLS packaging completed: {video_id} ({len(renditions)} renditions)")
+            return master_path
+        except Exception as e:
+            with self._lock:
+                self.jobs[video_id] = {
+                    "status": "error",
+                    "renditions": [r["name"] for r in renditions],
+                    "error": str(e)
+                }
+            logger.error(f"Error packaging HLS for {video_id}: {e}")
+            raise
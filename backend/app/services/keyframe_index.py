@@ -0,0 +1,136 @@
+import os
+import struct
+import logging
+import subprocess
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 索引文件后缀，与媒体文件放在同一目录
+INDEX_SUFFIX = ".kfidx"
+# 文件头：魔数、源文件大小、源文件修改时间（ns）、关键帧数量
+HEADER = struct.Struct("<4sQqI")
+MAGIC = b"KFI1"
+
+
+class KeyframeIndex:
+    """视频关键帧时间索引（array 存储，二分查找）"""
+
+    def __init__(self, times: array, source_size: int = 0, source_mtime_ns: int = 0):
+        self.times = times
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @staticmethod
+    def index_path(video_path: str) -> str:
+        """获取视频对应的索引文件路径"""
+        return video_path + INDEX_SUFFIX
+
+    @classmethod
+    def build(cls, video_path: str) -> "KeyframeIndex":
+        """
+        通过一次 ffprobe 包扫描构建关键帧索引
+
+        时间戳已减去容器起始时间，与 ffmpeg -ss 的时间基准一致。
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            关键帧索引
+        """
+        process = subprocess.Popen(
+            [
+                "ffprobe", "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,dts_time,flags:format=start_time",
+                "-of", "csv=p=0",
+                video_path
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+
+        times = array('d')
+        start_time = 0.0
+        for line in process.stdout:
+            fields = line.strip().split(',')
+            if len(fields) == 1:
+                # format 段只有 start_time 一个字段
+                try:
+                    start_time = float(fields[0])
+                except ValueError:
+                    pass
+                continue
+            if len(fields) < 3 or 'K' not in fields[-1]:
+                continue
+            value = fields[0] if fields[0] not in ('', 'N/A') else fields[1]
+            try:
+                times.append(float(value))
+            except ValueError:
+                continue
+
+        if process.wait() != 0:
+            raise RuntimeError(f"ffprobe packet scan failed for {video_path}")
+
+        times = array('d', sorted(t - start_time for t in times))
+        stat = os.stat(video_path)
+        logger.info(f"Keyframe index built: {video_path} ({len(times)} keyframes)")
+        return cls(times, stat.st_size, stat.st_mtime_ns)
+
+    def save(self, video_path: str) -> None:
+        """将索引保存到媒体文件旁"""
+        index_path = self.index_path(video_path)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.source_size, self.source_mtime_ns, len(self.times)))
+            self.times.tofile(f)
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def load(cls, video_path: str) -> Optional["KeyframeIndex"]:
+        """
+        读取媒体文件旁的索引，源文件已变化或索引损坏时返回 None
+        """
+        index_path = cls.index_path(video_path)
+        if not os.path.exists(index_path):
+            return None
+
+        try:
+            stat = os.stat(video_path)
+            with open(index_path, 'rb') as f:
+                magic, size, mtime_ns, count = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                    return None
+                times = array('d')
+                times.fromfile(f, count)
+            return cls(times, size, mtime_ns)
+        except (OSError, struct.error, EOFError) as e:
+            logger.warning(f"Invalid keyframe index {index_path}: {e}")
+            return None
+
+    def floor(self, timestamp: float) -> Optional[float]:
+        """不晚于 timestamp 的最后一个关键帧"""
+        i = bisect_right(self.times, timestamp + 1e-6)
+        return self.times[i - 1] if i > 0 else None
+
+    def ceil(self, timestamp: float) -> Optional[float]:
+        """不早于 timestamp 的第一个关键帧"""
+        i = bisect_left(self.times, timestamp - 1e-6)
+        return self.times[i] if i < len(self.times) else None
+
+    def nearest(self, timestamp: float) -> Optional[float]:
+        """距离 timestamp 最近的关键帧"""
+        before = self.floor(timestamp)
+        after = self.ceil(timestamp)
+        if before is None:
+            return after
+        if after is None:
+            return before
+        return before if timestamp - before <= after - timestamp else after
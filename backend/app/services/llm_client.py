@@ -2,36 +2,54 @@ from openai import OpenAI
 import httpx
 import json
 import re
+import time
 import logging
-from typing import Optional
+import threading
+from typing import List, Optional, Tuple
 
-from app.prompts import HIGHLIGHT_DETECTION_PROMPT
+from app.prompts import FRAME_ANALYSIS_PREAMBLE, HIGHLIGHT_DETECTION_PROMPT
+from app.services.metrics import LLM_REQUEST_SECONDS, LLM_RETRIES
+from app.services.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
 # 配置超时时间（秒）
 DEFAULT_TIMEOUT = 300  # 5分钟
 MAX_RETRIES = 3
+DEFAULT_BASE_URL = "https://open.bigmodel.cn/api/paas/v4/"
 
 
 class ZhipuVideoAnalyzer:
     """智谱AI GLM-4.6V 视频分析客户端"""
 
-    def __init__(self, api_key: str, model: str = "glm-4.6v"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "glm-4.6v",
+        base_url: str = DEFAULT_BASE_URL,
+        transport: Optional[httpx.BaseTransport] = None
+    ):
         """
         初始化智谱AI客户端
 
         Args:
             api_key: 智谱AI API密钥
             model: 模型名称，默认 glm-4.6v
+            base_url: 接口地址，可指向兼容 OpenAI 协议的本地模拟服务
+            transport: 自定义 HTTP 传输层（录制/回放），不传则直连
         """
+        # 每个线程内当前调用已发出的HTTP请求数，用于统计重试次数
+        self._attempts = threading.local()
+
         # 创建自定义 httpx 客户端，设置长超时
         http_client = httpx.Client(
-            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=60.0)
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=60.0),
+            transport=transport,
+            event_hooks={"request": [self._count_attempt]}
         )
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://open.bigmodel.cn/api/paas/v4/",
+            base_url=base_url,
             http_client=http_client,
             max_retries=MAX_RETRIES
         )
@@ -58,7 +76,7 @@ class ZhipuVideoAnalyzer:
         logger.info(f"Analyzing video: {video_url}")
 
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[
                     {
@@ -87,6 +105,72 @@ class ZhipuVideoAnalyzer:
             logger.error(f"Error analyzing video: {e}")
             raise
 
+    def analyze_frames(
+        self,
+        frames: List[Tuple[float, str]],
+        prompt: Optional[str] = None
+    ) -> dict:
+        """
+        以一组带时间戳的关键帧图片代替整段视频进行分析
+
+        Args:
+            frames: [(源视频时间戳秒, 图片URL或data URL), ...]，按时间排序
+            prompt: 自定义分析提示词，不传则使用默认提示词
+
+        Returns:
+            解析后的精彩片段列表（时间为图片标注的源视频时间）
+        """
+        if prompt is None:
+            prompt = HIGHLIGHT_DETECTION_PROMPT
+
+        logger.info(f"Analyzing {len(frames)} frames")
+
+        content = []
+        for timestamp, image_url in frames:
+            seconds = int(timestamp)
+            content.append({
+                "type": "text",
+                "text": f"[{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}]"
+            })
+            content.append({"type": "image_url", "image_url": {"url": image_url}})
+        content.append({"type": "text", "text": FRAME_ANALYSIS_PREAMBLE + prompt})
+
+        try:
+            response = self._create_completion(
+                model=self.model,
+                messages=[{"role": "user", "content": content}]
+            )
+
+            content = response.choices[0].message.content
+            logger.info(f"LLM response: {content}")
+            return self._parse_response(content)
+
+        except Exception as e:
+            logger.error(f"Error analyzing frames: {e}")
+            raise
+
+    def _count_attempt(self, request) -> None:
+        self._attempts.count = getattr(self._attempts, "count", 0) + 1
+
+    def _create_completion(self, **kwargs):
+        """调用模型接口，记录延迟和重试次数"""
+        self._attempts.count = 0
+        started = time.perf_counter()
+        outcome = "error"
+        with span("llm.chat_completion", model=kwargs.get("model")) as current:
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+                outcome = "success"
+                return response
+            finally:
+                LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+                retries = self._attempts.count - 1
+                if retries > 0:
+                    LLM_RETRIES.inc(retries)
+                if current is not None:
+                    current.attributes["attempts"] = self._attempts.count
+
+    @traced("llm.parse_response")
     def _parse_response(self, content: str) -> dict:
         """
         解析LLM返回的内容
@@ -128,7 +212,7 @@ class ZhipuVideoAnalyzer:
         logger.info(f"Analyzing video with thinking mode: {video_url}")
 
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[
                     {
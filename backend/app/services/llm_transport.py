@@ -0,0 +1,380 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 合成结果中片段的类型
+SYNTHETIC_HIGHLIGHT_TYPES = ("精彩瞬间", "高潮", "搞笑", "感人", "知识点")
+
+
+def request_key(body: bytes) -> str:
+    """
+    计算请求的匹配键
+
+    签名URL每次上传都不同，匹配时只看模型名和文本内容，忽略视频/图片URL。
+    """
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return hashlib.sha1(body).hexdigest()
+
+    texts = []
+    for message in payload.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                texts.append(part.get("text", ""))
+            else:
+                texts.append(part.get("type", ""))
+    normalized = json.dumps(
+        {"model": payload.get("model"), "texts": texts, "extra": payload.get("thinking")},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def synthetic_completion(body: bytes, seed: int = 0, video_duration: float = 300.0) -> dict:
+    """
+    生成确定性的合成模型响应（相同请求和种子得到相同结果）
+
+    Args:
+        body: 请求体
+        seed: 随机种子
+        video_duration: 片段时间戳的取值范围（秒）
+
+    Returns:
+        OpenAI chat.completion 格式的响应
+    """
+    key = request_key(body)
+    rng = random.Random(f"{seed}:{key}")
+    clips = []
+    cursor = 0.0
+    for _ in range(rng.randint(2, 6)):
+        start = cursor + rng.uniform(5, max(6.0, video_duration / 6))
+        end = start + rng.uniform(5, 30)
+        if end > video_duration:
+            break
+        clips.append({
+            "start_time": f"{int(start // 3600):02d}:{int(start % 3600 // 60):02d}:{int(start % 60):02d}",
+            "end_time": f"{int(end // 3600):02d}:{int(end % 3600 // 60):02d}:{int(end % 60):02d}",
+            "description": f"合成片段 {len(clips) + 1}",
+            "highlight_type": rng.choice(SYNTHETIC_HIGHLIGHT_TYPES),
+            "score": round(rng.uniform(0.5, 1.0), 2)
+        })
+        cursor = end
+
+    model = json.loads(body or b"{}").get("model", "mock")
+    return {
+        "id": f"chatcmpl-{key[:24]}",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": json.dumps({"clips": clips}, ensure_ascii=False)},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+
+def sse_chunks(completion: dict, chunk_chars: int) -> List[bytes]:
+    """将完整响应拆成 chat.completion.chunk 流式事件"""
+    content = completion["choices"][0]["message"]["content"] or ""
+    step = max(1, chunk_chars)
+    events = []
+    for i in range(0, max(len(content), 1), step):
+        delta = {"content": content[i:i + step]}
+        if i == 0:
+            delta["role"] = "assistant"
+        events.append({
+            "id": completion["id"],
+            "object": "chat.completion.chunk",
+            "created": completion["created"],
+            "model": completion["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+        })
+    events.append({
+        "id": completion["id"],
+        "object": "chat.completion.chunk",
+        "created": completion["created"],
+        "model": completion["model"],
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+    })
+    return [
+        f"data: {json.dumps(e, ensure_ascii=False)}\n\n".encode() for e in events
+    ] + [b"data: [DONE]\n\n"]
+
+
+def assemble_sse(body: str) -> dict:
+    """将录制的 chat.completion.chunk 流式事件还原为完整的 chat.completion 响应"""
+    completion = {"id": "", "object": "chat.completion", "created": 0, "model": ""}
+    content = []
+    finish_reason = None
+    usage = None
+    for line in body.splitlines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            continue
+        event = json.loads(data)
+        for field in ("id", "created", "model"):
+            completion[field] = event.get(field) or completion[field]
+        usage = event.get("usage") or usage
+        for choice in event.get("choices", []):
+            content.append(choice.get("delta", {}).get("content") or "")
+            finish_reason = choice.get("finish_reason") or finish_reason
+    completion["choices"] = [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "".join(content)},
+        "finish_reason": finish_reason or "stop"
+    }]
+    completion["usage"] = usage or {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    return completion
+
+
+def recorded_completion(recorded: dict) -> dict:
+    """录制的成功响应对应的完整 chat.completion（兼容未保存 completion 的流式录制）"""
+    if "completion" in recorded:
+        return recorded["completion"]
+    if recorded.get("content_type", "").startswith("text/event-stream"):
+        return assemble_sse(recorded["body"])
+    return json.loads(recorded["body"])
+
+
+class ChunkedStream(httpx.SyncByteStream):
+    """按块交付响应体，块间可加延迟，模拟慢速网络或流式输出"""
+
+    def __init__(self, chunks: List[bytes], delay: float = 0.0):
+        self.chunks = chunks
+        self.delay = delay
+
+    def __iter__(self) -> Iterator[bytes]:
+        for i, chunk in enumerate(self.chunks):
+            if i and self.delay:
+                time.sleep(self.delay)
+            yield chunk
+
+
+class ResponseShaper:
+    """注入延迟、错误并按块交付响应，录制回放和模拟服务共用"""
+
+    def __init__(
+        self,
+        latency: Optional[float] = 0.0,
+        error_rate: float = 0.0,
+        chunk_size: int = 0,
+        chunk_delay: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency: 每次请求的延迟（秒），None 表示使用录制时的耗时
+            error_rate: 返回 5xx/429 错误的概率
+            chunk_size: 分块大小，流式请求按字符、非流式按字节，0 表示整体返回
+            chunk_delay: 块间延迟（秒）
+            seed: 随机种子，保证错误注入可复现
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay_seconds(self, recorded: float = 0.0) -> float:
+        return recorded if self.latency is None else self.latency
+
+    def injected_error(self) -> Optional[int]:
+        """按错误率抽样，返回要注入的状态码"""
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            return self._random.choice((429, 500, 502, 503))
+
+    def body_chunks(self, completion: dict, stream: bool) -> List[bytes]:
+        if stream:
+            return sse_chunks(completion, self.chunk_size or 16)
+        body = json.dumps(completion, ensure_ascii=False).encode()
+        if not self.chunk_size:
+            return [body]
+        return [body[i:i + self.chunk_size] for i in range(0, len(body), self.chunk_size)]
+
+
+def _error_body(status: int) -> dict:
+    return {"error": {"code": str(status), "message": f"Injected error {status}"}}
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """透传真实请求，并将请求/响应对写入录制目录"""
+
+    def __init__(self, cassette_dir: str, inner: Optional[httpx.BaseTransport] = None):
+        self.cassette_dir = Path(cassette_dir)
+        self.cassette_dir.mkdir(parents=True, exist_ok=True)
+        self.inner = inner or httpx.HTTPTransport()
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        started = time.perf_counter()
+        response = self.inner.handle_request(request)
+        content = response.read()
+        elapsed = time.perf_counter() - started
+
+        key = request_key(body)
+        recorded = {
+            "status_code": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json"),
+            "body": content.decode("utf-8", errors="replace")
+        }
+        # 流式响应额外保存拼装后的完整响应，回放时按当前配置重新分块
+        if response.status_code == 200 and recorded["content_type"].startswith("text/event-stream"):
+            recorded["completion"] = assemble_sse(recorded["body"])
+        with self._lock:
+            index = len(list(self.cassette_dir.glob(f"{key}_*.json")))
+            path = self.cassette_dir / f"{key}_{index:04d}.json"
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps({
+                "key": key,
+                "request": {
+                    "method": request.method,
+                    "path": request.url.path,
+                    "body": body.decode("utf-8", errors="replace")
+                },
+                "response": recorded,
+                "elapsed": elapsed
+            }, ensure_ascii=False, indent=2))
+            os.replace(temp_path, path)
+        logger.info(f"Recorded LLM exchange: {path.name} ({elapsed:.1f}s)")
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=content,
+            request=request
+        )
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """从录制目录确定性地回放响应，可注入延迟、错误和分块流式输出"""
+
+    def __init__(
+        self,
+        cassette_dir: str,
+        shaper: Optional[ResponseShaper] = None,
+        strict: bool = False,
+        video_duration: float = 300.0
+    ):
+        """
+        Args:
+            cassette_dir: 录制目录
+            shaper: 延迟/错误/分块配置
+            strict: 没有匹配录制时返回错误；否则生成合成响应
+            video_duration: 合成响应中片段时间戳的取值范围（秒）
+        """
+        self.shaper = shaper or ResponseShaper()
+        self.strict = strict
+        self.video_duration = video_duration
+        self._cassettes = defaultdict(list)
+        self._cursor = defaultdict(int)
+        self._lock = threading.Lock()
+
+        for path in sorted(Path(cassette_dir).glob("*.json")):
+            try:
+                cassette = json.loads(path.read_text())
+                self._cassettes[cassette["key"]].append(cassette)
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping invalid cassette {path}: {e}")
+        logger.info(f"Loaded {sum(map(len, self._cassettes.values()))} LLM cassettes from {cassette_dir}")
+
+    def _next_cassette(self, key: str) -> Optional[dict]:
+        """同一请求多次录制时按顺序轮流回放"""
+        with self._lock:
+            cassettes = self._cassettes.get(key)
+            if not cassettes:
+                return None
+            cassette = cassettes[self._cursor[key] % len(cassettes)]
+            self._cursor[key] += 1
+            return cassette
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        cassette = self._next_cassette(request_key(body))
+
+        time.sleep(self.shaper.delay_seconds(cassette["elapsed"] if cassette else 0.0))
+
+        status = self.shaper.injected_error()
+        if status is not None:
+            return httpx.Response(status, json=_error_body(status), request=request)
+
+        if cassette is None:
+            if self.strict:
+                return httpx.Response(404, json=_error_body(404), request=request)
+            completion = synthetic_completion(body, video_duration=self.video_duration)
+        else:
+            recorded = cassette["response"]
+            if recorded["status_code"] != 200:
+                return httpx.Response(
+                    recorded["status_code"],
+                    headers={"content-type": recorded["content_type"]},
+                    content=recorded["body"].encode(),
+                    request=request
+                )
+            completion = recorded_completion(recorded)
+
+        stream = bool(json.loads(body or b"{}").get("stream"))
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream" if stream else "application/json"},
+            stream=ChunkedStream(self.shaper.body_chunks(completion, stream), self.shaper.chunk_delay),
+            request=request
+        )
+
+
+def create_transport(
+    mode: str,
+    cassette_dir: str,
+    latency: Optional[float] = 0.0,
+    error_rate: float = 0.0,
+    chunk_size: int = 0,
+    chunk_delay: float = 0.0,
+    seed: int = 0
+) -> Optional[httpx.BaseTransport]:
+    """
+    按模式创建模型客户端的 HTTP 传输层
+
+    Args:
+        mode: http（直连）、record（录制）、replay（回放）
+        cassette_dir: 录制目录
+
+    Returns:
+        传输层，http 模式返回 None 使用 httpx 默认传输
+    """
+    mode = mode.lower()
+    if mode == "http":
+        return None
+    if mode == "record":
+        return RecordingTransport(cassette_dir)
+    if mode == "replay":
+        return ReplayTransport(
+            cassette_dir,
+            ResponseShaper(latency, error_rate, chunk_size, chunk_delay, seed)
+        )
+    raise ValueError(f"Unknown LLM transport: {mode}")
@@ -0,0 +1,316 @@
+import os
+import time
+import asyncio
+import functools
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 默认直方图分桶（秒），覆盖从毫秒级 ffprobe 到分钟级模型调用
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600
+)
+
+# 后台刷新目录占用统计的间隔（秒），抓取指标时只读取缓存值
+DISK_USAGE_REFRESH_SECONDS = 30
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """指标基类"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        ...
+
+
+class Counter(Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """某一标签组合的当前值"""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def total(self) -> float:
+        """所有标签组合的合计值"""
+        with self._lock:
+            return sum(self._values.values())
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Metric):
+    """可增可减的仪表，也可在抓取时通过回调取值"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        if self._callback is not None:
+            items = list(self._callback().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(Metric):
+    """分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # 每组标签: [各桶计数（非累计）, 总和, 总数]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """计时上下文管理器"""
+        return _Timer(self, labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(e[0]), e[1], e[2])) for key, e in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        self.histogram.observe(self.elapsed, **self.labels)
+
+
+class Registry:
+    """指标注册表，输出 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram, **labels):
+    """函数计时装饰器，支持同步和异步函数"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def tracked(gauge: Gauge, **labels):
+    """执行期间将仪表加一的装饰器，用于统计进行中的任务"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                gauge.inc(**labels)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    gauge.dec(**labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            gauge.inc(**labels)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                gauge.dec(**labels)
+        return wrapper
+    return decorator
+
+
+# 目录 -> 最近一次统计的占用字节数
+_directory_sizes: Dict[str, int] = {}
+
+
+def measure_directory(path: str) -> int:
+    """遍历目录统计占用字节数并更新缓存（耗时随文件数增长，应在后台线程中调用）"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    _directory_sizes[path] = total
+    return total
+
+
+def directory_size(path: str) -> Optional[int]:
+    """最近一次统计的目录占用字节数，尚未统计时为 None"""
+    return _directory_sizes.get(path)
+
+
+registry = Registry()
+
+FFPROBE_SECONDS = registry.register(Histogram(
+    "ffprobe_seconds", "Duration of ffprobe invocations", ["operation"]
+))
+VIDEO_PROCESSOR_SECONDS = registry.register(Histogram(
+    "video_processor_seconds", "Duration of VideoProcessor operations", ["operation"]
+))
+OSS_UPLOAD_SECONDS = registry.register(Histogram(
+    "oss_upload_seconds", "Duration of OSS uploads", ["kind"]
+))
+OSS_UPLOAD_BYTES = registry.register(Counter(
+    "oss_upload_bytes_total", "Bytes uploaded to OSS", ["kind"]
+))
+OSS_UPLOAD_THROUGHPUT = registry.register(Histogram(
+    "oss_upload_throughput_bytes_per_second", "Throughput of OSS uploads", ["kind"],
+    buckets=(1e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8)
+))
+STORAGE_UPLOADS_SKIPPED = registry.register(Counter(
+    "storage_uploads_skipped_total", "Uploads skipped because the object was already stored", ["kind"]
+))
+LLM_REQUEST_SECONDS = registry.register(Histogram(
+    "llm_request_seconds", "Latency of GLM analysis calls including retries", ["outcome"]
+))
+LLM_RETRIES = registry.register(Counter(
+    "llm_retries_total", "HTTP retries performed by the GLM client"
+))
+THUMBNAIL_SECONDS = registry.register(Histogram(
+    "thumbnail_seconds", "Duration of thumbnail generation and upload per clip"
+))
+EXPORT_SECONDS = registry.register(Histogram(
+    "export_seconds", "End-to-end duration of clip exports", ["outcome"]
+))
+ANALYSES_IN_FLIGHT = registry.register(Gauge(
+    "analyses_in_flight", "Video analyses currently running"
+))
+ANALYSES_IN_FLIGHT.set(0)
+BACKGROUND_TASKS = registry.register(Gauge(
+    "background_tasks", "Background tasks currently running", ["task"]
+))
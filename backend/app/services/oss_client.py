@@ -1,14 +1,17 @@
 import oss2
-import uuid
-from pathlib import Path
-from typing import Optional
+import os
+import time
 import logging
 
+from app.services.metrics import OSS_UPLOAD_SECONDS, OSS_UPLOAD_BYTES, OSS_UPLOAD_THROUGHPUT
+from app.services.storage import StorageBackend
+from app.services.tracing import span
+
 logger = logging.getLogger(__name__)
 
 
-class OSSClient:
-    """阿里云OSS客户端封装"""
+class OSSClient(StorageBackend):
+    """阿里云OSS存储后端"""
 
     def __init__(
         self,
@@ -26,50 +29,23 @@ class OSSClient:
             endpoint: OSS端点，如 oss-cn-hangzhou.aliyuncs.com
             bucket_name: Bucket名称
         """
+        super().__init__()
         self.auth = oss2.Auth(access_key_id, access_key_secret)
         self.bucket = oss2.Bucket(self.auth, endpoint, bucket_name)
         self.bucket_name = bucket_name
         self.endpoint = endpoint
 
-    def upload_file(self, local_path: str, object_key: Optional[str] = None) -> str:
-        """
-        上传本地文件到OSS
-
-        Args:
-            local_path: 本地文件路径
-            object_key: OSS中的对象键名，不传则自动生成
-
-        Returns:
-            公网可访问的URL
-        """
-        if object_key is None:
-            suffix = Path(local_path).suffix
-            object_key = f"videos/{uuid.uuid4().hex}{suffix}"
-
-        logger.info(f"Uploading file to OSS: {local_path} -> {object_key}")
-        self.bucket.put_object_from_file(object_key, local_path)
-
-        url = self.get_public_url(object_key)
-        logger.info(f"File uploaded successfully: {url}")
-        return url
-
-    def upload_thumbnail(self, local_path: str, video_id: str, clip_id: str) -> str:
-        """
-        上传缩略图到OSS
-
-        Args:
-            local_path: 本地缩略图路径
-            video_id: 视频ID
-            clip_id: 片段ID
-
-        Returns:
-            公网可访问的URL
-        """
-        suffix = Path(local_path).suffix
-        object_key = f"thumbnails/{video_id}/{clip_id}{suffix}"
-
-        self.bucket.put_object_from_file(object_key, local_path)
-        return self.get_public_url(object_key)
+    def _put_file(self, object_key: str, local_path: str, kind: str) -> None:
+        """上传文件并记录耗时与吞吐"""
+        size = os.path.getsize(local_path)
+        started = time.perf_counter()
+        with span("oss.put_object", kind=kind, bytes=size):
+            self.bucket.put_object_from_file(object_key, local_path)
+        elapsed = time.perf_counter() - started
+        OSS_UPLOAD_SECONDS.observe(elapsed, kind=kind)
+        OSS_UPLOAD_BYTES.inc(size, kind=kind)
+        if elapsed > 0:
+            OSS_UPLOAD_THROUGHPUT.observe(size / elapsed, kind=kind)
 
     def get_public_url(self, object_key: str, expires: int = 3600) -> str:
         """
@@ -88,6 +64,7 @@ class OSSClient:
     def delete_file(self, object_key: str) -> None:
         """删除OSS中的文件"""
         logger.info(f"Deleting file from OSS: {object_key}")
+        self.forget_url(object_key)
         self.bucket.delete_object(object_key)
 
     def file_exists(self, object_key: str) -> bool:
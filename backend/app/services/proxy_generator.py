@@ -0,0 +1,198 @@
+import ffmpeg
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import settings
+from app.services.disk_manager import touch
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# 分析代理档位：仅降低分辨率、帧率和音频码率，不裁剪、不变速，
+# 因此代理上的时间戳与原视频一一对应
+PROXY_PROFILES = {
+    "low": {"height": 360, "fps": 5, "crf": 32, "audio_bitrate": "32k"},
+    "medium": {"height": 480, "fps": 10, "crf": 30, "audio_bitrate": "48k"},
+    "high": {"height": 720, "fps": 15, "crf": 28, "audio_bitrate": "64k"},
+    # 两遍分析的粗筛档位：只需定位候选区域
+    "coarse": {"height": 180, "fps": 2, "crf": 36, "audio_bitrate": "24k"},
+}
+
+# 代理与原视频时长允许的最大偏差（秒），超出则回退到原视频
+MAX_DURATION_DRIFT = 1.0
+
+
+class ProxyGenerator:
+    """分析代理生成服务：生成低码率版本用于上传和LLM分析"""
+
+    def __init__(self, video_processor, output_dir: str = None):
+        self.video_processor = video_processor
+        self.output_dir = Path(output_dir or settings.OUTPUT_DIR) / "proxies"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def get_cache_key(
+        self,
+        video_path: str,
+        profile_name: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> str:
+        """
+        根据源文件身份（路径、大小、修改时间）、档位参数和时间范围生成缓存键
+
+        Args:
+            video_path: 源视频路径
+            profile_name: 代理档位名称
+            start: 窗口开始时间（秒），不传表示整段视频
+            end: 窗口结束时间（秒）
+
+        Returns:
+            缓存键
+        """
+        stat = os.stat(video_path)
+        profile = PROXY_PROFILES[profile_name]
+        identity = "|".join([
+            os.path.realpath(video_path),
+            str(stat.st_size),
+            str(stat.st_mtime_ns),
+            profile_name,
+            ",".join(f"{k}={v}" for k, v in sorted(profile.items())),
+            f"{start}-{end}"
+        ])
+        return hashlib.sha1(identity.encode()).hexdigest()
+
+    @traced("proxy.get_proxy")
+    def get_proxy(
+        self,
+        video_path: str,
+        profile_name: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        获取（必要时生成）分析代理
+
+        指定 start/end 时只编码该时间窗口（精确定位），代理的 0 秒对应源视频的 start。
+
+        Args:
+            video_path: 源视频路径
+            profile_name: 代理档位，不传则使用配置的 ANALYSIS_PROXY_PROFILE
+            start: 窗口开始时间（秒）
+            end: 窗口结束时间（秒）
+
+        Returns:
+            代理文件路径；档位为 off、代理不比原视频小或时长不一致时返回 None
+        """
+        profile_name = profile_name or settings.ANALYSIS_PROXY_PROFILE
+        if profile_name == "off":
+            return None
+        if profile_name not in PROXY_PROFILES:
+            logger.warning(f"Unknown proxy profile: {profile_name}, using source")
+            return None
+
+        cache_key = self.get_cache_key(video_path, profile_name, start, end)
+        proxy_path = self.output_dir / f"{cache_key}.mp4"
+
+        # 同一源视频同一档位只生成一次，不同视频之间互不阻塞
+        with self._lock:
+            key_lock = self._key_locks.setdefault(cache_key, threading.Lock())
+
+        with key_lock:
+            if proxy_path.exists():
+                logger.info(f"Using cached analysis proxy: {proxy_path}")
+                touch(str(proxy_path))
+                return str(proxy_path)
+
+            source_info = self.video_processor.get_video_info(video_path)
+            self._encode(
+                video_path, str(proxy_path), PROXY_PROFILES[profile_name], source_info, start, end
+            )
+
+            expected = source_info.get('duration', 0)
+            if start is not None or end is not None:
+                expected = min(end or expected, expected) - (start or 0)
+            proxy_info = self.video_processor.get_video_info(str(proxy_path))
+            drift = abs(proxy_info.get('duration', 0) - expected)
+            if drift > MAX_DURATION_DRIFT:
+                logger.warning(
+                    f"Proxy duration drift {drift:.2f}s exceeds limit, using source: {video_path}"
+                )
+                proxy_path.unlink(missing_ok=True)
+                return None
+
+            if start is None and end is None and \
+                    os.path.getsize(proxy_path) >= os.path.getsize(video_path):
+                logger.info(f"Proxy is not smaller than source, using source: {video_path}")
+                proxy_path.unlink(missing_ok=True)
+                return None
+
+        return str(proxy_path)
+
+    def _encode(
+        self,
+        video_path: str,
+        proxy_path: str,
+        profile: dict,
+        source_info: dict,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> None:
+        """编码代理文件，先写临时文件再原子重命名，避免并发读到半成品"""
+        temp_path = f"{proxy_path}.{os.getpid()}.tmp.mp4"
+
+        # 源视频比目标档位还小时不放大
+        height = profile["height"]
+        if source_info.get('height') and source_info['height'] < height:
+            height = source_info['height']
+
+        input_args = {}
+        if start is not None:
+            input_args['ss'] = start
+        if end is not None:
+            input_args['t'] = end - (start or 0)
+
+        source = ffmpeg.input(video_path, **input_args)
+        video = (
+            source.video
+            .filter('fps', fps=profile["fps"])
+            .filter('scale', -2, height)
+        )
+        streams = [video]
+        audio_args = {}
+        if source_info.get('has_audio', True):
+            streams.append(source.audio)
+            audio_args = {
+                'acodec': 'aac',
+                'audio_bitrate': profile["audio_bitrate"],
+                'ac': 1
+            }
+
+        try:
+            (
+                ffmpeg
+                .output(
+                    *streams,
+                    temp_path,
+                    vcodec='libx264',
+                    crf=profile["crf"],
+                    preset='veryfast',
+                    pix_fmt='yuv420p',
+                    movflags='+faststart',
+                    **audio_args
+                )
+                .overwrite_output()
+                .run(quiet=True)
+            )
+            os.replace(temp_path, proxy_path)
+            logger.info(f"Analysis proxy generated: {proxy_path}")
+        except Exception as e:
+            logger.error(f"Error generating analysis proxy: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
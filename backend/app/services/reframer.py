@@ -0,0 +1,298 @@
+import os
+import uuid
+import time
+import ffmpeg
+import logging
+import numpy as np
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from app.services.chunked_encoder import AUDIO_ENCODE_ARGS, VIDEO_ENCODE_ARGS
+from app.services.feature_extractor import decode_streams
+from app.services.metrics import VIDEO_PROCESSOR_SECONDS, timed
+from app.services.tracing import span, traced
+from app.services.video_processor import RESOLUTIONS
+
+logger = logging.getLogger(__name__)
+
+# 轨迹分析用的小图尺寸与帧率
+TRACK_WIDTH = 96
+TRACK_HEIGHT = 54
+TRACK_FPS = 4
+# 显著性中运动与边缘对比度的权重
+MOTION_WEIGHT = 0.7
+# 相邻帧平均灰度差超过该值（0-1）视为镜头切换，裁剪框在切换处直接跳转而不平移
+SCENE_CUT_DIFF = 0.25
+# 平滑：中值滤波窗口（帧）与滑动平均时长（秒）
+MEDIAN_FRAMES = 5
+SMOOTH_SECONDS = 1.5
+# 列显著性起伏小于该比例时认为画面无明显主体，沿用上一位置
+FLAT_PROFILE_RATIO = 0.05
+# 渲染时发送给 crop 滤镜的位置更新频率（每秒次数）
+COMMAND_RATE = 15
+
+
+def parse_aspect(aspect: str) -> float:
+    """解析 "9:16" 形式的宽高比，返回 宽/高"""
+    width, height = (float(v) for v in aspect.split(":"))
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid aspect ratio: {aspect}")
+    return width / height
+
+
+def even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+def _median_filter(values: np.ndarray, size: int) -> np.ndarray:
+    if len(values) < size:
+        return values
+    pad = size // 2
+    padded = np.pad(values, pad, mode='edge')
+    return np.median(np.lib.stride_tricks.sliding_window_view(padded, size), axis=1)
+
+
+def _moving_average(values: np.ndarray, size: int) -> np.ndarray:
+    if size <= 1 or len(values) < 2:
+        return values
+    pad = size // 2
+    padded = np.pad(values, (pad, size - 1 - pad), mode='edge')
+    return np.convolve(padded, np.ones(size) / size, mode='valid')
+
+
+class Reframer:
+    """
+    竖屏自动重构图：在极低分辨率帧上用运动和边缘对比度估计显著区域，
+    得到平滑的裁剪轨迹，再用随时间变化的 crop 滤镜一次渲染
+    """
+
+    def __init__(self, video_processor):
+        self.video_processor = video_processor
+
+    @traced("reframer.trajectory")
+    def trajectory(
+        self,
+        video_path: str,
+        start: float,
+        end: float,
+        crop_fraction: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算一个时间区间内的水平裁剪轨迹
+
+        Args:
+            video_path: 源视频路径
+            start: 开始时间（秒）
+            end: 结束时间（秒）
+            crop_fraction: 裁剪框宽度占画面宽度的比例
+
+        Returns:
+            (相对区间起点的时间数组, 裁剪框中心的水平位置数组，0-1)
+        """
+        frames = [
+            chunk for chunk in decode_streams(
+                video_path, None, fps=TRACK_FPS, width=TRACK_WIDTH, height=TRACK_HEIGHT,
+                has_audio=False, start=start, duration=end - start
+            )
+        ]
+        if not frames:
+            return np.zeros(1), np.full(1, 0.5)
+        frames = np.concatenate(frames).astype(np.float32) / 255.0
+
+        # 显著性：帧间运动 + 水平/垂直梯度
+        motion = np.zeros_like(frames)
+        motion[1:] = np.abs(np.diff(frames, axis=0))
+        contrast = np.zeros_like(frames)
+        contrast[:, :, 1:] += np.abs(np.diff(frames, axis=2))
+        contrast[:, 1:, :] += np.abs(np.diff(frames, axis=1))
+
+        def normalize(values: np.ndarray) -> np.ndarray:
+            return values / (values.mean(axis=(1, 2), keepdims=True) + 1e-6)
+
+        saliency = MOTION_WEIGHT * normalize(motion) + (1 - MOTION_WEIGHT) * normalize(contrast)
+        columns = saliency.sum(axis=1)
+
+        # 滑动窗口求和，取显著性总和最大的裁剪位置
+        window = max(1, min(TRACK_WIDTH, int(round(TRACK_WIDTH * crop_fraction))))
+        cumulative = np.concatenate([np.zeros((len(columns), 1)), np.cumsum(columns, axis=1)], axis=1)
+        sums = cumulative[:, window:] - cumulative[:, :-window]
+        best = sums.argmax(axis=1)
+        flat = (sums.max(axis=1) - sums.min(axis=1)) < FLAT_PROFILE_RATIO * (sums.max(axis=1) + 1e-6)
+
+        # 以最佳窗口内的显著性质心为中心，避免主体小于窗口时偏向窗口一侧
+        offsets = best[:, None] + np.arange(window)[None, :]
+        weights = np.take_along_axis(columns, offsets, axis=1)
+        raw = ((weights * (offsets + 0.5)).sum(axis=1) / (weights.sum(axis=1) + 1e-6)) / TRACK_WIDTH
+        for i in np.flatnonzero(flat):
+            raw[i] = raw[i - 1] if i > 0 else 0.5
+
+        # 按镜头切分后分别平滑
+        frame_diff = np.zeros(len(frames))
+        frame_diff[1:] = np.abs(np.diff(frames, axis=0)).mean(axis=(1, 2))
+        cuts = [0] + list(np.flatnonzero(frame_diff > SCENE_CUT_DIFF)) + [len(frames)]
+        smooth_frames = max(1, int(SMOOTH_SECONDS * TRACK_FPS))
+        centers = np.empty(len(frames))
+        for a, b in zip(cuts, cuts[1:]):
+            if b > a:
+                centers[a:b] = _moving_average(_median_filter(raw[a:b], MEDIAN_FRAMES), smooth_frames)
+
+        half = window / 2 / TRACK_WIDTH
+        centers = np.clip(centers, half, 1 - half)
+        times = np.arange(len(frames)) / TRACK_FPS
+        return times, centers
+
+    def crop_geometry(self, width: int, height: int, aspect: float) -> Tuple[int, int, int]:
+        """
+        计算裁剪尺寸
+
+        Returns:
+            (裁剪宽, 裁剪高, 垂直偏移)；源画面比目标更窄时只做居中的垂直裁剪
+        """
+        crop_w = even(min(width, height * aspect))
+        crop_h = height
+        y = 0
+        if crop_w >= width:
+            crop_w = even(width)
+            crop_h = even(min(height, width / aspect))
+            y = even((height - crop_h) / 2) if height > crop_h else 0
+        return crop_w, crop_h, y
+
+    def write_commands(
+        self,
+        path: str,
+        target: str,
+        times: np.ndarray,
+        centers: np.ndarray,
+        width: int,
+        crop_w: int,
+        duration: float
+    ) -> int:
+        """
+        写出 sendcmd 命令文件，按 COMMAND_RATE 插值更新裁剪框水平位置
+
+        Returns:
+            首帧的裁剪框水平偏移
+        """
+        samples = np.arange(0, max(duration, 1.0 / COMMAND_RATE), 1.0 / COMMAND_RATE)
+        interpolated = np.interp(samples, times, centers)
+        xs = np.clip(interpolated * width - crop_w / 2, 0, width - crop_w).astype(int) // 2 * 2
+        with open(path, 'w') as f:
+            previous = None
+            for t, x in zip(samples, xs):
+                if x != previous:
+                    f.write(f"{t:.3f} {target} x {x};\n")
+                    previous = x
+        return int(xs[0])
+
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="reframe_export")
+    @traced("reframer.export")
+    def export(
+        self,
+        video_path: str,
+        clips: List[Tuple[float, float]],
+        aspect: str = "9:16",
+        merge: bool = True,
+        resolution: str = "1080p",
+        on_progress: Optional[Callable[[str, int], None]] = None
+    ) -> List[str]:
+        """
+        重构图导出
+
+        Args:
+            video_path: 源视频路径
+            clips: 片段列表 [(start, end), ...]
+            aspect: 输出宽高比，如 9:16
+            merge: 是否合并为单个视频
+            resolution: 输出分辨率（按短边计，仅在裁剪后更大时缩小）
+            on_progress: 进度回调 (stage, progress)
+
+        Returns:
+            输出文件路径列表：合并模式只有一个文件，分开模式与 clips 一一对应
+        """
+        report = on_progress or (lambda stage, progress: None)
+        info = self.video_processor.get_video_info(video_path)
+        width, height = info.get('width') or 0, info.get('height') or 0
+        if not width or not height:
+            raise RuntimeError(f"Cannot read video size: {video_path}")
+        crop_w, crop_h, crop_y = self.crop_geometry(width, height, parse_aspect(aspect))
+        target = RESOLUTIONS.get(resolution, RESOLUTIONS["1080p"])[1]
+
+        # 轨迹分析（极低分辨率，远快于实时）
+        started = time.perf_counter()
+        trajectories = []
+        for i, (start, end) in enumerate(clips):
+            report("tracking", 30 * i // len(clips))
+            if crop_w < width:
+                trajectories.append(self.trajectory(video_path, start, end, crop_w / width))
+            else:
+                trajectories.append((np.zeros(1), np.full(1, 0.5)))
+        tracked_seconds = sum(end - start for start, end in clips)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Reframe trajectory: {tracked_seconds:.1f}s of video in {elapsed:.2f}s "
+            f"({tracked_seconds / elapsed if elapsed > 0 else 0:.0f}x realtime)"
+        )
+
+        token = uuid.uuid4().hex
+        command_files = [
+            str(Path(self.video_processor.output_dir) / f"reframe_{token}_{i}.cmd") for i in range(len(clips))
+        ]
+        has_audio = info.get('has_audio', False)
+
+        def render(indexes: List[int], output_path: str) -> None:
+            parts = []
+            for i in indexes:
+                start, end = clips[i]
+                times, centers = trajectories[i]
+                name = f"crop@reframe{i}"
+                x0 = self.write_commands(command_files[i], name, times, centers, width, crop_w, end - start)
+                source = ffmpeg.input(video_path, ss=start, t=end - start)
+                video = (
+                    source.video
+                    .filter('sendcmd', f=command_files[i])
+                    .filter(name, crop_w, crop_h, x0, crop_y)
+                )
+                short_side = min(crop_w, crop_h)
+                if short_side > target:
+                    scale = (target, -2) if crop_w <= crop_h else (-2, target)
+                    video = video.filter('scale', *scale)
+                parts.append((video, source.audio) if has_audio else (video,))
+
+            if len(parts) == 1:
+                streams = list(parts[0])
+            else:
+                joined = ffmpeg.concat(
+                    *[s for part in parts for s in part], v=1, a=1 if has_audio else 0
+                ).node
+                streams = [joined[0], joined[1]] if has_audio else [joined[0]]
+            args = dict(VIDEO_ENCODE_ARGS, movflags='+faststart')
+            if has_audio:
+                args.update(AUDIO_ENCODE_ARGS)
+            with span("reframer.render", clips=len(indexes)):
+                ffmpeg.output(*streams, output_path, **args).overwrite_output().run(quiet=True)
+
+        output_paths = []
+        try:
+            if merge or len(clips) == 1:
+                prefix = "merged" if len(clips) > 1 else "clip"
+                output_path = str(Path(self.video_processor.output_dir) / f"{prefix}_{token}.mp4")
+                report("encoding", 30)
+                output_paths.append(output_path)
+                render(list(range(len(clips))), output_path)
+            else:
+                for i in range(len(clips)):
+                    report("encoding", 30 + 65 * i // len(clips))
+                    output_path = str(Path(self.video_processor.output_dir) / f"clip_{uuid.uuid4().hex}.mp4")
+                    output_paths.append(output_path)
+                    render([i], output_path)
+        except Exception as e:
+            logger.error(f"Error in reframe export: {e}")
+            for path in output_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        finally:
+            for path in command_files:
+                if os.path.exists(path):
+                    os.remove(path)
+        return output_paths
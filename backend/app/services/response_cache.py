@@ -0,0 +1,178 @@
+import gzip
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只协商 gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# 缓存条目上限，超出时整体清空
+MAX_ENTRIES = 4096
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """orjson 序列化（支持 Pydantic 模型、枚举、datetime、numpy）"""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(Response):
+    """使用 orjson 编码的 JSON 响应"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class CachedPayload:
+    """预序列化的响应体，压缩结果按需生成并一同缓存"""
+
+    __slots__ = ("version", "body", "expires_at", "_encoded", "_lock")
+
+    def __init__(self, version: Hashable, body: bytes, expires_at: Optional[float] = None):
+        self.version = version
+        self.body = body
+        self.expires_at = expires_at
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def valid(self, version: Hashable) -> bool:
+        return self.version == version and (self.expires_at is None or time.time() < self.expires_at)
+
+    def encoded(self, encoding: str) -> bytes:
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == "br":
+                    data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                self._encoded[encoding] = data
+            return data
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """按 Accept-Encoding 选择压缩算法（优先 br，其次 gzip）"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class ResponseCache:
+    """
+    按 (类型, 对象ID) 缓存预序列化的 JSON 响应体
+
+    版本号变化（对象被修改）或超过 expires_at 时重新序列化。
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, Hashable], CachedPayload] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        kind: str,
+        key: Hashable,
+        version: Hashable,
+        build: Callable[[], Any],
+        expires_at: Callable[[], Optional[float]] = None
+    ) -> CachedPayload:
+        """
+        获取缓存的响应体，未命中时序列化 build() 的结果
+
+        Args:
+            kind: 响应类型
+            key: 对象ID
+            version: 对象当前版本号
+            build: 生成响应内容
+            expires_at: 生成后调用，返回内容失效的时间戳（如签名URL需重新签发的时刻）
+
+        Returns:
+            预序列化的响应体
+        """
+        cache_key = (kind, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+        if entry is not None and entry.valid(version):
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        body = dumps(build())
+        entry = CachedPayload(version, body, expires_at() if expires_at else None)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[cache_key] = entry
+        return entry
+
+    def invalidate(self, kind: str = None, key: Hashable = None) -> None:
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+                return
+            for cache_key in [k for k in self._entries if k[0] == kind and (key is None or k[1] == key)]:
+                del self._entries[cache_key]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def payload_response(request: Request, payload: CachedPayload, headers: Dict[str, str] = None) -> Response:
+    """
+    返回预序列化的响应体，按客户端支持协商 br/gzip 压缩
+
+    Args:
+        request: 当前请求
+        payload: 预序列化响应体
+        headers: 额外响应头
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    body = payload.body
+    if len(body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            body = payload.encoded(encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,279 @@
+import os
+import hmac
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import posixpath
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from app.config import settings
+from app.services.metrics import STORAGE_UPLOADS_SKIPPED
+from app.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 签名URL有效期（秒）
+URL_EXPIRES = 3600
+# 距过期不足该时长（秒）时重新签名，保证交给模型的URL在整个调用期间有效
+RESIGN_MARGIN = 900
+# 内容哈希缓存条数上限
+DIGEST_CACHE_SIZE = 1024
+
+_digest_cache: Dict[Tuple[str, int, int], str] = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """
+    计算文件内容的 SHA-256（按路径、大小、修改时间缓存，同一文件只读一遍）
+    """
+    stat = os.stat(path)
+    cache_key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        cached = _digest_cache.get(cache_key)
+    if cached:
+        return cached
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digest_lock:
+        if len(_digest_cache) >= DIGEST_CACHE_SIZE:
+            _digest_cache.clear()
+        _digest_cache[cache_key] = digest
+    return digest
+
+
+class StorageBackend(ABC):
+    """对象存储接口：上传本地文件并返回可供模型和前端访问的URL"""
+
+    # 是否为远端存储（本地存储无需再上传导出文件）
+    remote = True
+
+    def __init__(self):
+        # 对象键 -> (签名URL, 过期时间戳)
+        self._url_cache: Dict[str, Tuple[str, float]] = {}
+        self._url_lock = threading.Lock()
+
+    @staticmethod
+    def content_key(local_path: str, prefix: str = "videos") -> str:
+        """按文件内容生成对象键，相同内容只存一份"""
+        return f"{prefix}/{file_digest(local_path)}{Path(local_path).suffix}"
+
+    @staticmethod
+    def thumbnail_key(video_id: str, clip_id: str, suffix: str = ".jpg") -> str:
+        return f"thumbnails/{video_id}/{clip_id}{suffix}"
+
+    def put_file(self, local_path: str, object_key: Optional[str] = None, kind: str = "video") -> str:
+        """
+        上传本地文件，对象已存在时跳过
+
+        Args:
+            local_path: 本地文件路径
+            object_key: 对象键名，不传则按文件内容哈希生成
+            kind: 统计用的对象类型
+
+        Returns:
+            对象键名
+        """
+        if object_key is None:
+            object_key = self.content_key(local_path)
+        if self.file_exists(object_key):
+            STORAGE_UPLOADS_SKIPPED.inc(kind=kind)
+            logger.info(f"Object already stored, skipping upload: {object_key}")
+            return object_key
+
+        logger.info(f"Uploading file to storage: {local_path} -> {object_key}")
+        self._put_file(object_key, local_path, kind=kind)
+        return object_key
+
+    def upload_file(self, local_path: str, object_key: Optional[str] = None) -> str:
+        """
+        上传本地文件（已存在则跳过）
+
+        Args:
+            local_path: 本地文件路径
+            object_key: 对象键名，不传则按文件内容哈希生成
+
+        Returns:
+            可访问的URL
+        """
+        return self.get_url(self.put_file(local_path, object_key))
+
+    def upload_thumbnail(self, local_path: str, video_id: str, clip_id: str) -> str:
+        """
+        上传缩略图
+
+        Args:
+            local_path: 本地缩略图路径
+            video_id: 视频ID
+            clip_id: 片段ID
+
+        Returns:
+            可访问的URL
+        """
+        object_key = self.thumbnail_key(video_id, clip_id, Path(local_path).suffix)
+        self._put_file(object_key, local_path, kind="thumbnail")
+        return self.get_url(object_key)
+
+    def get_url(self, object_key: str) -> str:
+        """
+        获取对象的签名URL，缓存的URL临近过期时重新签名
+
+        Args:
+            object_key: 对象键名
+
+        Returns:
+            至少还有 RESIGN_MARGIN 秒有效期的签名URL
+        """
+        now = time.time()
+        with self._url_lock:
+            cached = self._url_cache.get(object_key)
+            if cached and cached[1] - now > RESIGN_MARGIN:
+                return cached[0]
+
+        url = self.get_public_url(object_key, URL_EXPIRES)
+        with self._url_lock:
+            self._url_cache[object_key] = (url, now + URL_EXPIRES)
+        return url
+
+    def url_refresh_at(self, object_key: str) -> float:
+        """缓存的签名URL将被重新签发的时间戳（未缓存时为0），用于让依赖该URL的缓存及时失效"""
+        with self._url_lock:
+            cached = self._url_cache.get(object_key)
+        return cached[1] - RESIGN_MARGIN if cached else 0.0
+
+    @abstractmethod
+    def _put_file(self, object_key: str, local_path: str, kind: str) -> None:
+        ...
+
+    @abstractmethod
+    def get_public_url(self, object_key: str, expires: int = 3600) -> str:
+        ...
+
+    @abstractmethod
+    def delete_file(self, object_key: str) -> None:
+        ...
+
+    def forget_url(self, object_key: str) -> None:
+        """删除对象时清除缓存的签名URL"""
+        with self._url_lock:
+            self._url_cache.pop(object_key, None)
+
+    @abstractmethod
+    def file_exists(self, object_key: str) -> bool:
+        ...
+
+
+class LocalStorage(StorageBackend):
+    """本地文件存储：对象保存在磁盘上，由本服务通过 HMAC 签名、带有效期的URL提供下载"""
+
+    remote = False
+
+    def __init__(self, root_dir: str = None, base_url: str = None, secret: str = None):
+        """
+        初始化本地存储
+
+        Args:
+            root_dir: 对象存放目录，默认 OUTPUT_DIR/storage
+            base_url: 生成URL使用的服务地址，默认 PUBLIC_BASE_URL
+            secret: URL签名密钥，默认 STORAGE_SECRET
+        """
+        super().__init__()
+        self.root_dir = Path(root_dir or Path(settings.OUTPUT_DIR) / "storage")
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.base_url = (base_url or settings.PUBLIC_BASE_URL).rstrip("/")
+        secret = secret or settings.STORAGE_SECRET
+        if not secret:
+            # 未配置密钥时每次启动随机生成，重启后旧URL失效
+            logger.warning("STORAGE_SECRET not set, signed URLs will not survive a restart")
+            secret = os.urandom(32).hex()
+        self.secret = secret.encode()
+
+    def object_path(self, object_key: str) -> Path:
+        """对象键对应的磁盘路径，拒绝越出存储目录的键"""
+        normalized = posixpath.normpath(object_key)
+        if normalized.startswith(("/", "..")) or normalized == ".":
+            raise ValueError(f"Invalid object key: {object_key}")
+        return self.root_dir / normalized
+
+    def _put_file(self, object_key: str, local_path: str, kind: str) -> None:
+        target = self.object_path(object_key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with span("storage.put_local", kind=kind):
+            temp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                # 同一文件系统上硬链接，避免复制大文件
+                os.link(local_path, temp_path)
+            except OSError:
+                shutil.copyfile(local_path, temp_path)
+            os.replace(temp_path, target)
+
+    def sign(self, object_key: str, expires_at: int) -> str:
+        message = f"{object_key}\n{expires_at}".encode()
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def verify(self, object_key: str, expires_at: int, signature: str) -> bool:
+        """校验签名且未过期"""
+        if expires_at < time.time():
+            return False
+        return hmac.compare_digest(self.sign(object_key, expires_at), signature)
+
+    def get_public_url(self, object_key: str, expires: int = 3600) -> str:
+        """
+        获取签名URL
+
+        Args:
+            object_key: 对象键名
+            expires: 有效期（秒），默认1小时
+
+        Returns:
+            签名URL
+        """
+        expires_at = int(time.time()) + expires
+        query = urlencode({"expires": expires_at, "signature": self.sign(object_key, expires_at)})
+        return f"{self.base_url}/api/storage/{quote(object_key)}?{query}"
+
+    def delete_file(self, object_key: str) -> None:
+        logger.info(f"Deleting file from local storage: {object_key}")
+        self.forget_url(object_key)
+        path = self.object_path(object_key)
+        if path.exists():
+            path.unlink()
+
+    def file_exists(self, object_key: str) -> bool:
+        return self.object_path(object_key).is_file()
+
+
+def create_storage() -> Optional[StorageBackend]:
+    """
+    按 STORAGE_BACKEND 配置创建存储后端
+
+    auto: 配置了OSS密钥时使用OSS，否则使用本地存储
+    """
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "auto":
+        backend = "oss" if settings.OSS_ACCESS_KEY_ID else "local"
+
+    if backend == "local":
+        return LocalStorage()
+    if backend == "oss":
+        if not settings.OSS_ACCESS_KEY_ID:
+            return None
+        from app.services.oss_client import OSSClient
+        return OSSClient(
+            access_key_id=settings.OSS_ACCESS_KEY_ID,
+            access_key_secret=settings.OSS_ACCESS_KEY_SECRET,
+            endpoint=settings.OSS_ENDPOINT,
+            bucket_name=settings.OSS_BUCKET_NAME
+        )
+    raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
@@ -0,0 +1,287 @@
+import os
+import sys
+import time
+import uuid
+import asyncio
+import functools
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+# 内存中保留的追踪数量
+MAX_TRACES = 500
+# 采样时记录的最大调用栈深度
+MAX_STACK_DEPTH = 64
+
+
+class Span:
+    """一次计时的操作"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_us", "end_us", "thread_id", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_us = time.time_ns() // 1000
+        self.end_us: Optional[int] = None
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_us": self.start_us,
+            "duration_us": (self.end_us - self.start_us) if self.end_us else None,
+            "thread_id": self.thread_id,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class Trace:
+    """一个作业（上传、分析等）的全部 span"""
+
+    def __init__(self, kind: str, video_id: Optional[str] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.kind = kind
+        self.video_id = video_id
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self.profile: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> dict:
+        root = self.spans[0] if self.spans else None
+        return {
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            "video_id": self.video_id,
+            "started_at": self.started_at,
+            "duration_us": (root.end_us - root.start_us) if root and root.end_us else None,
+            "span_count": len(self.spans),
+            "profiled": self.profile is not None
+        }
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {**self.summary(), "spans": spans}
+
+    def to_chrome(self) -> dict:
+        """转换为 Chrome trace 格式（chrome://tracing / Perfetto 可直接打开）"""
+        with self._lock:
+            spans = list(self.spans)
+        events = []
+        for span in spans:
+            if span.end_us is None:
+                continue
+            events.append({
+                "name": span.name,
+                "cat": self.kind,
+                "ph": "X",
+                "ts": span.start_us,
+                "dur": span.end_us - span.start_us,
+                "pid": os.getpid(),
+                "tid": span.thread_id,
+                "args": {**span.attributes, **({"error": span.error} if span.error else {})}
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _in_event_loop() -> bool:
+    """当前线程是否正在运行事件循环"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class SamplingProfiler:
+    """
+    采样分析器：定期抓取正在执行该作业 span 的工作线程调用栈
+
+    事件循环线程在多个作业的协程之间交替执行，无法归属到单个作业，不参与采样。
+    """
+
+    def __init__(self, tracer: "Tracer", trace: Trace, interval: float):
+        self.tracer = tracer
+        self.trace = trace
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        return self.result()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            threads = self.tracer.threads_for(self.trace.trace_id)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.samples[tuple(reversed(stack))] += 1
+                self.sample_count += 1
+
+    def result(self) -> dict:
+        self_counts: Counter = Counter()
+        for stack, count in self.samples.items():
+            self_counts[stack[-1]] += count
+        return {
+            "interval": self.interval,
+            "samples": self.sample_count,
+            # 火焰图折叠格式：调用栈以分号分隔 + 样本数
+            "collapsed": [
+                f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()
+            ],
+            "top": [
+                {"function": name, "self_samples": count}
+                for name, count in self_counts.most_common(30)
+            ]
+        }
+
+
+class Tracer:
+    """作业级 span 追踪"""
+
+    def __init__(self, max_traces: int = MAX_TRACES):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        # 工作线程 -> 正在执行的追踪，用于采样分析器筛选线程（不含事件循环线程）
+        self._thread_traces: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, kind: str, video_id: Optional[str] = None, profile: bool = False, **attributes):
+        """
+        开始一个作业追踪，作业根 span 名称为 kind
+
+        Args:
+            kind: 作业类型，如 upload、analysis
+            video_id: 关联视频ID
+            profile: 是否启用采样分析器
+        """
+        trace = Trace(kind, video_id)
+        with self._lock:
+            self._traces[trace.trace_id] = trace
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        profiler = None
+        if profile:
+            profiler = SamplingProfiler(self, trace, settings.PROFILE_SAMPLE_INTERVAL)
+            profiler.start()
+        try:
+            with self.span(kind, video_id=video_id, **attributes):
+                yield trace
+        finally:
+            if profiler is not None:
+                trace.profile = profiler.stop()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """记录一个 span；当前上下文没有追踪时不做任何事"""
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(name, parent.span_id if parent else None, attributes)
+        trace.add(span)
+        token = _current_span.set(span)
+
+        # 只登记工作线程（to_thread / 线程池中的同步代码），它们一次只执行一个作业
+        thread_id = span.thread_id if not _in_event_loop() else None
+        if thread_id is not None:
+            with self._lock:
+                previous = self._thread_traces.get(thread_id)
+                self._thread_traces[thread_id] = trace.trace_id
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_us = time.time_ns() // 1000
+            _current_span.reset(token)
+            if thread_id is not None:
+                with self._lock:
+                    if previous is None:
+                        self._thread_traces.pop(thread_id, None)
+                    else:
+                        self._thread_traces[thread_id] = previous
+
+    def traced(self, name: str):
+        """将函数调用记录为 span 的装饰器，支持同步和异步函数"""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def threads_for(self, trace_id: str) -> List[int]:
+        with self._lock:
+            return [tid for tid, tr in self._thread_traces.items() if tr == trace_id]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def list(self, video_id: Optional[str] = None) -> List[Trace]:
+        with self._lock:
+            traces = list(self._traces.values())
+        if video_id is not None:
+            traces = [t for t in traces if t.video_id == video_id]
+        return traces
+
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
@@ -1,16 +1,40 @@
+import os
+import time
+import asyncio
 import uuid
+import bisect
 import logging
-from typing import List, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime
 
 from app.models.schemas import ClipInfo, VideoInfo, VideoStatus
 from app.services.llm_client import ZhipuVideoAnalyzer
-from app.services.oss_client import OSSClient
+from app.services.storage import StorageBackend
 from app.services.video_processor import VideoProcessor
+from app.services.proxy_generator import ProxyGenerator
+from app.services.audio_prefilter import AudioPrefilter
+from app.services.clip_index import ClipIndex
+from app.services.frame_sampler import FrameSampler, SampledFrame
+from app.services.metrics import THUMBNAIL_SECONDS
+from app.services.tracing import span, traced
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 进度回调：on_progress(stage, progress, clips=None)
+ProgressCallback = Callable[..., None]
+
+# 分析模式：video 上传整段视频，frames 只发送抽取的关键帧，
+# two_pass 先用粗糙代理找候选区域，再对候选窗口精细分析
+ANALYSIS_MODES = ("video", "frames", "two_pass")
+
+# 多模板分析的一项：(模板名, 提示词, 分析模式)，模式为 None 时使用 ANALYSIS_MODE
+TemplateSpec = Tuple[str, Optional[str], Optional[str]]
+# 多模板分析支持的模式（共用一次上传或一次抽帧）
+TEMPLATE_MODES = ("video", "frames")
+
 
 def time_str_to_seconds(time_str: str) -> float:
     """将时间字符串转换为秒数 (HH:MM:SS -> seconds)"""
@@ -25,23 +49,61 @@ def time_str_to_seconds(time_str: str) -> float:
         return float(parts[0])
 
 
+def seconds_to_time_str(seconds: float) -> str:
+    """将秒数转换为时间字符串 (seconds -> HH:MM:SS)"""
+    seconds = max(0, int(round(seconds)))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def merge_clips(clips: List[ClipInfo], min_overlap: float) -> List[ClipInfo]:
+    """
+    合并多个模板的片段：按分数从高到低保留，与已保留片段重叠比例达到
+    min_overlap 的视为重复，其模板和分数并入保留片段的 template_scores
+
+    Args:
+        clips: 各模板的片段（template 和 template_scores 已填写）
+        min_overlap: 判定为重复的最小重叠比例（相对较短片段）
+
+    Returns:
+        去重后的片段，按开始时间排序
+    """
+    by_id = {clip.id: clip for clip in clips}
+    kept, suppressed = ClipIndex(clips).suppress(min_overlap, metric="shorter")
+    for clip_id, keeper_id in suppressed.items():
+        keeper = by_id[keeper_id]
+        for template, score in by_id[clip_id].template_scores.items():
+            keeper.template_scores[template] = max(keeper.template_scores.get(template, 0.0), score)
+    return kept
+
+
 class VideoAnalyzer:
     """视频分析服务"""
 
     def __init__(
         self,
         llm_client: ZhipuVideoAnalyzer,
-        oss_client: OSSClient,
-        video_processor: VideoProcessor
+        storage: StorageBackend,
+        video_processor: VideoProcessor,
+        proxy_generator: Optional[ProxyGenerator] = None,
+        audio_prefilter: Optional[AudioPrefilter] = None,
+        frame_sampler: Optional[FrameSampler] = None
     ):
         self.llm_client = llm_client
-        self.oss_client = oss_client
+        self.storage = storage
         self.video_processor = video_processor
+        self.proxy_generator = proxy_generator
+        self.audio_prefilter = audio_prefilter
+        self.frame_sampler = frame_sampler or FrameSampler(video_processor)
 
+    @traced("analyzer.analyze_video")
     async def analyze_video(
         self,
         video_info: VideoInfo,
-        prompt: Optional[str] = None
+        prompt: Optional[str] = None,
+        prefilter: Optional[bool] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        mode: Optional[str] = None,
+        templates: Optional[List[TemplateSpec]] = None
     ) -> List[ClipInfo]:
         """
         分析视频并返回精彩片段列表
@@ -49,34 +111,526 @@ class VideoAnalyzer:
         Args:
             video_info: 视频信息
             prompt: 自定义分析提示词
+            prefilter: 是否启用音频预筛，不传则使用 PREFILTER_ENABLED 配置
+            on_progress: 进度回调 (stage, progress, clips=None)，在工作线程中调用
+            mode: 分析模式 video/frames/two_pass，不传则使用 ANALYSIS_MODE 配置
+            templates: 多模板分析 [(模板名, 提示词, 模式), ...]，传入时忽略 prompt/mode/prefilter
 
         Returns:
             精彩片段列表
         """
+        # 上传、模型调用、缩略图均为阻塞操作，放到线程中执行以免阻塞事件循环
+        return await asyncio.to_thread(
+            self._run_analysis, video_info, prompt, prefilter, on_progress, mode, templates
+        )
+
+    @traced("analyzer.run_analysis")
+    def _run_analysis(
+        self,
+        video_info: VideoInfo,
+        prompt: Optional[str],
+        prefilter: Optional[bool],
+        on_progress: Optional[ProgressCallback],
+        mode: Optional[str] = None,
+        templates: Optional[List[TemplateSpec]] = None
+    ) -> List[ClipInfo]:
         logger.info(f"Starting video analysis for: {video_info.video_id}")
+        started = time.perf_counter()
+        mode = mode or settings.ANALYSIS_MODE
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        stats = {"mode": mode, "proxy_profile": None}
+        report = on_progress or (lambda stage, progress, **data: None)
+
+        if prefilter is None:
+            prefilter = settings.PREFILTER_ENABLED
+
+        if templates:
+            stats["mode"] = "templates"
+            clips = self._analyze_templates(video_info, templates, stats, report)
+        elif mode == "frames":
+            clips = self._analyze_frames(video_info, prompt, stats, report)
+        elif mode == "two_pass":
+            clips = self._analyze_two_pass(video_info, prompt, stats, report)
+        elif prefilter and self.audio_prefilter and \
+                self.audio_prefilter.should_prefilter(video_info.duration):
+            clips = self._analyze_windows(video_info, prompt, stats, report)
+        else:
+            clips = self._analyze_full(video_info, prompt, stats, report)
+
+        logger.info(f"Found {len(clips)} clips for video: {video_info.video_id}")
+
+        self._generate_thumbnails(video_info, clips, report)
+
+        stats["total_seconds"] = round(time.perf_counter() - started, 3)
+        video_info.analysis_stats = stats
+        logger.info(f"Analysis stats for {video_info.video_id}: {stats}")
+
+        return clips
 
-        # 上传视频到OSS获取公网URL
-        if not video_info.oss_url:
-            video_info.oss_url = self.oss_client.upload_file(video_info.file_path)
-            logger.info(f"Video uploaded to OSS: {video_info.oss_url}")
+    @traced("analyzer.analyze_full")
+    def _analyze_full(
+        self,
+        video_info: VideoInfo,
+        prompt: Optional[str],
+        stats: dict,
+        report: ProgressCallback
+    ) -> List[ClipInfo]:
+        """整段视频送LLM分析"""
+        video_url = self._prepare_upload(video_info, stats, report)
 
         # 调用LLM分析视频
-        result = self.llm_client.analyze_video(video_info.oss_url, prompt)
+        report("llm", 40)
+        llm_started = time.perf_counter()
+        with span("analyzer.llm"):
+            result = self.llm_client.analyze_video(video_url, prompt)
+        stats["llm_seconds"] = round(time.perf_counter() - llm_started, 3)
+
+        clips = self._build_clips(video_info, result)
+        report("llm", 85, clips=clips)
+        return clips
+
+    def _prepare_upload(self, video_info: VideoInfo, stats: dict, report: ProgressCallback) -> str:
+        """
+        上传待分析视频并返回可访问URL
+
+        Returns:
+            视频URL（同一视频的多次分析共用一个存储对象）
+        """
+        # 上传视频到存储获取可访问URL（优先上传低码率分析代理，时间戳与原视频一致）
+        # 记录对象键而非URL，重新分析时复用已上传的对象并签发新URL；对象已被清理时重新上传
+        if video_info.storage_key and not self.storage.file_exists(video_info.storage_key):
+            logger.warning(f"Stored object missing, uploading again: {video_info.storage_key}")
+            video_info.storage_key = None
+        if not video_info.storage_key:
+            upload_path = video_info.file_path
+            if self.proxy_generator:
+                report("proxy", 5)
+                proxy_started = time.perf_counter()
+                try:
+                    proxy_path = self.proxy_generator.get_proxy(video_info.file_path)
+                except Exception as e:
+                    logger.error(f"Proxy generation failed, uploading source: {e}")
+                    proxy_path = None
+                stats["proxy_seconds"] = round(time.perf_counter() - proxy_started, 3)
+                if proxy_path:
+                    upload_path = proxy_path
+                    stats["proxy_profile"] = settings.ANALYSIS_PROXY_PROFILE
+
+            source_bytes = os.path.getsize(video_info.file_path)
+            upload_bytes = os.path.getsize(upload_path)
+            report("oss", 20)
+            upload_started = time.perf_counter()
+            video_info.storage_key = self.storage.put_file(upload_path)
+            upload_seconds = time.perf_counter() - upload_started
+            logger.info(f"Video stored as: {video_info.storage_key}")
+
+            stats.update({
+                "source_bytes": source_bytes,
+                "upload_bytes": upload_bytes,
+                "bytes_saved": source_bytes - upload_bytes,
+                "upload_seconds": round(upload_seconds, 3)
+            })
+            # 按实测上传吞吐估算直接上传原视频需多花的时间
+            if upload_seconds > 0 and upload_bytes > 0:
+                throughput = upload_bytes / upload_seconds
+                stats["upload_seconds_saved_estimate"] = round(
+                    (source_bytes - upload_bytes) / throughput, 3
+                )
+
+        video_info.oss_url = self.storage.get_url(video_info.storage_key)
+        return video_info.oss_url
+
+    @traced("analyzer.analyze_templates")
+    def _analyze_templates(
+        self,
+        video_info: VideoInfo,
+        templates: List[TemplateSpec],
+        stats: dict,
+        report: ProgressCallback
+    ) -> List[ClipInfo]:
+        """
+        多个模板并发分析同一视频，结果按重叠去重合并
+
+        视频只上传一次（或只抽帧一次），各模板的模型调用并发执行；
+        每个片段记录产生它的模板，被合并的重复片段的模板和分数保留在 template_scores。
+        """
+        specs = [(name, prompt, mode or settings.ANALYSIS_MODE) for name, prompt, mode in templates]
+        for name, _, mode in specs:
+            if mode not in TEMPLATE_MODES:
+                raise ValueError(f"Mode {mode} is not supported for multi-template analysis ({name})")
+
+        modes = {mode for _, _, mode in specs}
+        video_url = self._prepare_upload(video_info, stats, report) if "video" in modes else None
+        frames = self._prepare_frames(video_info, stats, report) if "frames" in modes else None
+
+        def analyze(name: str, prompt: Optional[str], mode: str):
+            llm_started = time.perf_counter()
+            with span("analyzer.llm", template=name, mode=mode):
+                if mode == "frames":
+                    result = self.llm_client.analyze_frames(
+                        [(frame.time, frame.data_url()) for frame in frames], prompt
+                    )
+                else:
+                    result = self.llm_client.analyze_video(video_url, prompt)
+            clips = self._build_clips(video_info, result)
+            if mode == "frames":
+                self._align_to_frames(
+                    clips, [frame.time for frame in frames], video_info.duration or frames[-1].time
+                )
+            for clip in clips:
+                clip.template = name
+                clip.template_scores = {name: clip.score}
+            return clips, time.perf_counter() - llm_started
+
+        report("llm", 40)
+        llm_started = time.perf_counter()
+        template_stats = {}
+        all_clips = []
+        with ThreadPoolExecutor(max_workers=len(specs)) as executor:
+            futures = {
+                executor.submit(contextvars.copy_context().run, analyze, *spec): spec
+                for spec in specs
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                name, _, mode = futures[future]
+                clips, seconds = future.result()
+                all_clips.extend(clips)
+                template_stats[name] = {"mode": mode, "llm_seconds": round(seconds, 3), "clips": len(clips)}
+                report("llm", 40 + 45 * done // len(specs), clips=clips)
+
+        merged = merge_clips(all_clips, settings.CLIP_MERGE_OVERLAP)
+        stats.update({
+            "llm_seconds": round(time.perf_counter() - llm_started, 3),
+            "llm_calls": len(specs),
+            "templates": template_stats,
+            "duplicates_merged": len(all_clips) - len(merged)
+        })
+        return merged
+
+    @traced("analyzer.analyze_windows")
+    def _analyze_windows(
+        self,
+        video_info: VideoInfo,
+        prompt: Optional[str],
+        stats: dict,
+        report: ProgressCallback
+    ) -> List[ClipInfo]:
+        """只把音频预筛选出的窗口剪出并送LLM分析，片段时间映射回源视频"""
+        report("prefilter", 5)
+        prefilter_started = time.perf_counter()
+        windows = self.audio_prefilter.rank_windows(video_info.file_path, video_info.duration)
+        stats["prefilter_seconds"] = round(time.perf_counter() - prefilter_started, 3)
+        stats["prefilter_windows"] = [
+            {"start": round(w["start"], 1), "end": round(w["end"], 1), "score": round(w["score"], 3)}
+            for w in windows
+        ]
+        # 无音轨或活动度不足时未按声音活动筛选，记录回退原因
+        stats["prefilter_fallback"] = windows[0].get("fallback") if windows else None
+        analyzed_seconds = sum(w["end"] - w["start"] for w in windows)
+        stats["analyzed_seconds"] = round(analyzed_seconds, 1)
+        stats["coverage"] = round(analyzed_seconds / video_info.duration, 3) if video_info.duration else None
+
+        cost = {"upload_bytes": 0, "upload_seconds": 0.0, "llm_seconds": 0.0}
+        clips = []
+        for n, window in enumerate(windows):
+            # 窗口分析占 20%-85% 的进度区间
+            window_clips = self._analyze_window(
+                video_info, window["start"], window["end"], prompt, cost, len(clips), report,
+                (20 + 65 * n // len(windows), 20 + 65 * (n + 1) // len(windows))
+            )
+            clips.extend(window_clips)
+
+        stats.update({
+            "source_bytes": os.path.getsize(video_info.file_path),
+            "upload_bytes": cost["upload_bytes"],
+            "upload_seconds": round(cost["upload_seconds"], 3),
+            "llm_seconds": round(cost["llm_seconds"], 3),
+            "llm_calls": len(windows)
+        })
+        return clips
+
+    def _analyze_window(
+        self,
+        video_info: VideoInfo,
+        start: float,
+        end: float,
+        prompt: Optional[str],
+        cost: dict,
+        start_index: int,
+        report: ProgressCallback,
+        progress: Tuple[int, int]
+    ) -> List[ClipInfo]:
+        """
+        剪出一个窗口上传并送LLM分析，片段时间映射回源视频
+
+        Args:
+            video_info: 视频信息
+            start: 窗口开始时间（秒）
+            end: 窗口结束时间（秒）
+            prompt: 分析提示词
+            cost: 累计 upload_bytes/upload_seconds/llm_seconds
+            start_index: 片段序号起始值
+            report: 进度回调
+            progress: 本窗口占用的进度区间 (开始, 结束)
 
-        # 解析结果并生成ClipInfo列表
+        Returns:
+            窗口内的片段
+        """
+        report("oss", progress[0])
+        window_path, temporary = self._cut_window(video_info.file_path, start, end)
+        try:
+            cost["upload_bytes"] += os.path.getsize(window_path)
+            upload_started = time.perf_counter()
+            window_url = self.storage.upload_file(window_path)
+            cost["upload_seconds"] += time.perf_counter() - upload_started
+        finally:
+            if temporary and os.path.exists(window_path):
+                os.remove(window_path)
+
+        report("llm", (progress[0] + progress[1]) // 2)
+        llm_started = time.perf_counter()
+        with span("analyzer.llm", window_start=start, window_end=end):
+            result = self.llm_client.analyze_video(window_url, prompt)
+        cost["llm_seconds"] += time.perf_counter() - llm_started
+
+        window_clips = self._build_clips(
+            video_info, result, offset=start, limit=end, start_index=start_index
+        )
+        report("llm", progress[1], clips=window_clips)
+        return window_clips
+
+    @traced("analyzer.analyze_two_pass")
+    def _analyze_two_pass(
+        self,
+        video_info: VideoInfo,
+        prompt: Optional[str],
+        stats: dict,
+        report: ProgressCallback
+    ) -> List[ClipInfo]:
+        """
+        由粗到细的两遍分析
+
+        第一遍把整段视频的粗糙代理（COARSE_PROXY_PROFILE）送LLM，按分数取前
+        TWO_PASS_CANDIDATES 个片段作为候选；第二遍把候选前后各扩展
+        TWO_PASS_PADDING_SECONDS 秒（重叠的窗口合并）后以正常分析质量重新分析，
+        修正边界和分数。精细分析没有返回片段的窗口保留粗筛结果。
+        """
+        coarse_path = None
+        if self.proxy_generator:
+            report("proxy", 5)
+            try:
+                coarse_path = self.proxy_generator.get_proxy(
+                    video_info.file_path, settings.COARSE_PROXY_PROFILE
+                )
+            except Exception as e:
+                logger.error(f"Coarse proxy generation failed: {e}")
+        if not coarse_path:
+            logger.warning("Coarse proxy unavailable, falling back to single-pass analysis")
+            stats["mode"] = "video"
+            return self._analyze_full(video_info, prompt, stats, report)
+
+        # 第一遍：粗筛
+        coarse_started = time.perf_counter()
+        coarse = {"upload_bytes": os.path.getsize(coarse_path)}
+        report("oss", 10)
+        upload_started = time.perf_counter()
+        coarse_url = self.storage.upload_file(coarse_path)
+        coarse["upload_seconds"] = time.perf_counter() - upload_started
+        report("llm", 15)
+        llm_started = time.perf_counter()
+        with span("analyzer.llm", analysis_pass="coarse"):
+            result = self.llm_client.analyze_video(coarse_url, prompt)
+        coarse["llm_seconds"] = time.perf_counter() - llm_started
+        candidates = sorted(
+            self._build_clips(video_info, result), key=lambda clip: clip.score, reverse=True
+        )[:settings.TWO_PASS_CANDIDATES]
+        coarse.update({
+            "profile": settings.COARSE_PROXY_PROFILE,
+            "analyzed_seconds": video_info.duration,
+            "llm_calls": 1,
+            "candidates": len(candidates),
+            "seconds": time.perf_counter() - coarse_started
+        })
+        report("llm", 30, clips=candidates)
+
+        # 第二遍：候选窗口扩展后合并，精细分析
+        padding = settings.TWO_PASS_PADDING_SECONDS
+        duration = video_info.duration or max((clip.end_seconds for clip in candidates), default=0)
+        windows = []
+        for clip in sorted(candidates, key=lambda c: c.start_seconds):
+            start = max(0.0, clip.start_seconds - padding)
+            end = min(duration, clip.end_seconds + padding)
+            if end <= start:
+                continue
+            if windows and start <= windows[-1]["end"]:
+                windows[-1]["end"] = max(windows[-1]["end"], end)
+                windows[-1]["candidates"].append(clip)
+            else:
+                windows.append({"start": start, "end": end, "candidates": [clip]})
+
+        refine_started = time.perf_counter()
+        refine = {"upload_bytes": 0, "upload_seconds": 0.0, "llm_seconds": 0.0}
+        clips = []
+        for n, window in enumerate(windows):
+            # 精细分析占 30%-85% 的进度区间
+            window_clips = self._analyze_window(
+                video_info, window["start"], window["end"], prompt, refine, len(clips), report,
+                (30 + 55 * n // len(windows), 30 + 55 * (n + 1) // len(windows))
+            )
+            clips.extend(window_clips or window["candidates"])
+        refine.update({
+            "profile": settings.ANALYSIS_PROXY_PROFILE if self.proxy_generator else "source",
+            "analyzed_seconds": round(sum(w["end"] - w["start"] for w in windows), 1),
+            "llm_calls": len(windows),
+            "windows": [{"start": round(w["start"], 1), "end": round(w["end"], 1)} for w in windows],
+            "seconds": time.perf_counter() - refine_started
+        })
+
+        passes = {"coarse": coarse, "refine": refine}
+        for data in passes.values():
+            for key in ("upload_seconds", "llm_seconds", "seconds"):
+                data[key] = round(data[key], 3)
+        stats.update({
+            "source_bytes": os.path.getsize(video_info.file_path),
+            "upload_bytes": coarse["upload_bytes"] + refine["upload_bytes"],
+            "upload_seconds": round(coarse["upload_seconds"] + refine["upload_seconds"], 3),
+            "llm_seconds": round(coarse["llm_seconds"] + refine["llm_seconds"], 3),
+            "llm_calls": 1 + len(windows),
+            "passes": passes
+        })
+        if video_info.duration:
+            stats["coverage"] = round(refine["analyzed_seconds"] / video_info.duration, 3)
+        return clips
+
+    @traced("analyzer.analyze_frames")
+    def _analyze_frames(
+        self,
+        video_info: VideoInfo,
+        prompt: Optional[str],
+        stats: dict,
+        report: ProgressCallback
+    ) -> List[ClipInfo]:
+        """抽取关键帧，以带时间戳的图片送LLM分析，无需上传视频"""
+        frames = self._prepare_frames(video_info, stats, report)
+
+        report("llm", 40)
+        llm_started = time.perf_counter()
+        with span("analyzer.llm", frames=len(frames)):
+            result = self.llm_client.analyze_frames(
+                [(frame.time, frame.data_url()) for frame in frames], prompt
+            )
+        stats["llm_seconds"] = round(time.perf_counter() - llm_started, 3)
+
+        clips = self._build_clips(video_info, result)
+        self._align_to_frames(
+            clips, [frame.time for frame in frames], video_info.duration or frames[-1].time
+        )
+        report("llm", 85, clips=clips)
+        return clips
+
+    def _prepare_frames(self, video_info: VideoInfo, stats: dict, report: ProgressCallback) -> List[SampledFrame]:
+        """抽取关键帧并记录抽帧统计"""
+        report("frames", 5)
+        sample_started = time.perf_counter()
+        frames = self.frame_sampler.sample(video_info.file_path)
+        stats["sample_seconds"] = round(time.perf_counter() - sample_started, 3)
+        if not frames:
+            raise RuntimeError("No frames extracted from video")
+
+        frame_bytes = sum(len(frame.image) for frame in frames)
+        stats.update({
+            "source_bytes": os.path.getsize(video_info.file_path),
+            "upload_bytes": frame_bytes,
+            "frame_count": len(frames),
+            "frame_times": [round(frame.time, 2) for frame in frames]
+        })
+        return frames
+
+    @staticmethod
+    def _align_to_frames(clips: List[ClipInfo], frame_times: List[float], duration: float) -> None:
+        """
+        将关键帧模式返回的片段对齐到源视频时间轴
+
+        模型只看到离散的帧，片段起点取不晚于它的最近一帧；只覆盖单帧的片段
+        终点延伸到下一帧（两帧之间的画面由前一帧代表）；时间限制在视频时长内。
+        """
+        for clip in clips:
+            start = min(clip.start_seconds, duration)
+            index = bisect.bisect_right(frame_times, start) - 1
+            if index >= 0:
+                start = frame_times[index]
+            end = min(clip.end_seconds, duration)
+            if end <= min(clip.start_seconds, duration):
+                following = bisect.bisect_right(frame_times, start)
+                end = frame_times[following] if following < len(frame_times) else duration
+            clip.start_seconds = start
+            clip.end_seconds = end
+            clip.start_time = seconds_to_time_str(start)
+            clip.end_time = seconds_to_time_str(end)
+
+    @traced("analyzer.cut_window")
+    def _cut_window(self, video_path: str, start: float, end: float):
+        """
+        精确剪出分析窗口（重新编码，窗口0秒严格对应源视频 start）
+
+        Returns:
+            (窗口文件路径, 是否为需删除的临时文件)
+        """
+        if self.proxy_generator:
+            try:
+                proxy_path = self.proxy_generator.get_proxy(video_path, start=start, end=end)
+                if proxy_path:
+                    return proxy_path, False
+            except Exception as e:
+                logger.error(f"Window proxy failed, cutting from source: {e}")
+        return self.video_processor.cut_clip(video_path, start, end, reencode=True), True
+
+    def _build_clips(
+        self,
+        video_info: VideoInfo,
+        result: dict,
+        offset: float = 0.0,
+        limit: Optional[float] = None,
+        start_index: int = 0
+    ) -> List[ClipInfo]:
+        """
+        将LLM结果解析为ClipInfo列表
+
+        Args:
+            video_info: 视频信息
+            result: LLM解析结果
+            offset: 分析素材0秒对应的源视频时间（秒）
+            limit: 片段结束时间上限（秒，源视频时间）
+            start_index: 片段序号起始值
+
+        Returns:
+            精彩片段列表（时间均为源视频时间）
+        """
         clips = []
-        for i, clip_data in enumerate(result.get("clips", [])):
+        for i, clip_data in enumerate(result.get("clips", []), start=start_index):
             clip_id = f"{video_info.video_id}_{i}_{uuid.uuid4().hex[:8]}"
 
             start_time = clip_data.get("start_time", "00:00:00")
             end_time = clip_data.get("end_time", "00:00:10")
+            start_seconds = time_str_to_seconds(start_time)
+            end_seconds = time_str_to_seconds(end_time)
+
+            if offset:
+                start_seconds += offset
+                end_seconds += offset
+            if limit is not None:
+                end_seconds = min(end_seconds, limit)
+            if offset or limit is not None:
+                start_time = seconds_to_time_str(start_seconds)
+                end_time = seconds_to_time_str(end_seconds)
 
             clip = ClipInfo(
                 id=clip_id,
                 start_time=start_time,
                 end_time=end_time,
-                start_seconds=time_str_to_seconds(start_time),
-                end_seconds=time_str_to_seconds(end_time),
+                start_seconds=start_seconds,
+                end_seconds=end_seconds,
                 description=clip_data.get("description", ""),
                 highlight_type=clip_data.get("highlight_type", "精彩片段"),
                 score=clip_data.get("score", 0.5),
@@ -84,23 +638,31 @@ class VideoAnalyzer:
             )
             clips.append(clip)
 
-        logger.info(f"Found {len(clips)} clips for video: {video_info.video_id}")
+        return clips
 
-        # 生成缩略图
-        for clip in clips:
+    @traced("analyzer.generate_thumbnails")
+    def _generate_thumbnails(
+        self,
+        video_info: VideoInfo,
+        clips: List[ClipInfo],
+        report: ProgressCallback
+    ) -> None:
+        """生成并上传片段缩略图"""
+        for n, clip in enumerate(clips):
+            report("thumbnails", 85 + 15 * n // max(len(clips), 1))
             try:
-                thumbnail_path = self.video_processor.generate_thumbnail(
-                    video_info.file_path,
-                    clip.start_seconds,
-                    video_info.video_id,
-                    clip.id
-                )
-                clip.thumbnail_url = self.oss_client.upload_thumbnail(
-                    thumbnail_path,
-                    video_info.video_id,
-                    clip.id
-                )
+                with THUMBNAIL_SECONDS.time():
+                    thumbnail_path = self.video_processor.generate_thumbnail(
+                        video_info.file_path,
+                        clip.start_seconds,
+                        video_info.video_id,
+                        clip.id
+                    )
+                    clip.thumbnail_key = self.storage.put_file(
+                        thumbnail_path,
+                        self.storage.thumbnail_key(video_info.video_id, clip.id),
+                        kind="thumbnail"
+                    )
+                    clip.thumbnail_url = self.storage.get_url(clip.thumbnail_key)
             except Exception as e:
                 logger.error(f"Error generating thumbnail for clip {clip.id}: {e}")
-
-        return clips
@@ -1,14 +1,36 @@
 import ffmpeg
 import os
+import json
 import uuid
 import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 from app.config import settings
+from app.services.keyframe_index import KeyframeIndex
+from app.services.chunked_encoder import ChunkedEncoder
+from app.services.metrics import FFPROBE_SECONDS, VIDEO_PROCESSOR_SECONDS, timed
+from app.services.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+# 内存中缓存的关键帧索引数量
+KEYFRAME_CACHE_SIZE = 64
+# 缩略图时间点与最近关键帧相差不超过该值（秒）时直接取关键帧，只需解码一帧
+THUMBNAIL_SNAP_TOLERANCE = 1.0
+
+# 导出分辨率 -> (宽, 高)
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160)
+}
+
 
 class VideoProcessor:
     """FFmpeg视频处理服务"""
@@ -16,7 +38,71 @@ class VideoProcessor:
     def __init__(self, output_dir: str = None):
         self.output_dir = output_dir or settings.OUTPUT_DIR
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        self._keyframe_indexes: "OrderedDict[str, KeyframeIndex]" = OrderedDict()
+        self._keyframe_lock = threading.Lock()
+        self.chunked_encoder = ChunkedEncoder(self)
+        self.cut_workers = settings.EXPORT_CUT_WORKERS
+
+    @traced("video_processor.get_keyframe_index")
+    def get_keyframe_index(self, video_path: str) -> Optional[KeyframeIndex]:
+        """
+        获取视频关键帧索引（内存缓存 -> 媒体旁索引文件 -> ffprobe 扫描构建）
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            关键帧索引，构建失败时返回 None
+        """
+        with self._keyframe_lock:
+            index = self._keyframe_indexes.get(video_path)
+            if index is not None:
+                stat = os.stat(video_path)
+                if stat.st_size == index.source_size and stat.st_mtime_ns == index.source_mtime_ns:
+                    self._keyframe_indexes.move_to_end(video_path)
+                    return index
+
+        index = KeyframeIndex.load(video_path)
+        if index is None:
+            try:
+                with FFPROBE_SECONDS.time(operation="keyframes"):
+                    index = KeyframeIndex.build(video_path)
+                index.save(video_path)
+            except Exception as e:
+                logger.error(f"Error building keyframe index: {e}")
+                return None
+
+        with self._keyframe_lock:
+            self._keyframe_indexes[video_path] = index
+            self._keyframe_indexes.move_to_end(video_path)
+            while len(self._keyframe_indexes) > KEYFRAME_CACHE_SIZE:
+                self._keyframe_indexes.popitem(last=False)
+        return index
+
+    def snap_to_keyframe(
+        self,
+        video_path: str,
+        timestamp: float,
+        mode: str = "floor"
+    ) -> float:
+        """
+        将时间点对齐到关键帧
+
+        Args:
+            video_path: 视频文件路径
+            timestamp: 时间点（秒）
+            mode: floor（之前）、ceil（之后）或 nearest（最近）
+
+        Returns:
+            关键帧时间；无索引或找不到时返回原时间点
+        """
+        index = self.get_keyframe_index(video_path)
+        if not index:
+            return timestamp
+        snapped = getattr(index, mode)(timestamp)
+        return timestamp if snapped is None else snapped
 
+    @traced("video_processor.get_video_info")
     def get_video_info(self, video_path: str) -> dict:
         """
         获取视频信息
@@ -28,7 +114,8 @@ class VideoProcessor:
             包含视频信息的字典
         """
         try:
-            probe = ffmpeg.probe(video_path)
+            with FFPROBE_SECONDS.time(operation="info"):
+                probe = ffmpeg.probe(video_path)
             video_stream = next(
                 (s for s in probe['streams'] if s['codec_type'] == 'video'),
                 None
@@ -41,13 +128,18 @@ class VideoProcessor:
                     'height': int(video_stream.get('height', 0)),
                     'fps': eval(video_stream.get('r_frame_rate', '30/1')),
                     'codec': video_stream.get('codec_name', ''),
-                    'bitrate': int(probe['format'].get('bit_rate', 0))
+                    'bitrate': int(probe['format'].get('bit_rate', 0)),
+                    'has_audio': any(
+                        s['codec_type'] == 'audio' for s in probe['streams']
+                    )
                 }
         except Exception as e:
             logger.error(f"Error getting video info: {e}")
 
         return {}
 
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="generate_thumbnail")
+    @traced("video_processor.generate_thumbnail")
     def generate_thumbnail(
         self,
         video_path: str,
@@ -72,6 +164,11 @@ class VideoProcessor:
 
         thumbnail_path = str(thumbnail_dir / f"{clip_id}.jpg")
 
+        # 附近有关键帧时直接取关键帧，避免从上一个关键帧开始逐帧解码
+        keyframe = self.snap_to_keyframe(video_path, timestamp, mode="nearest")
+        if abs(keyframe - timestamp) <= THUMBNAIL_SNAP_TOLERANCE:
+            timestamp = keyframe
+
         try:
             (
                 ffmpeg
@@ -87,12 +184,15 @@ class VideoProcessor:
             logger.error(f"Error generating thumbnail: {e}")
             raise
 
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="cut_clip")
+    @traced("video_processor.cut_clip")
     def cut_clip(
         self,
         video_path: str,
         start_time: float,
         end_time: float,
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        reencode: bool = False
     ) -> str:
         """
         剪切视频片段
@@ -102,6 +202,7 @@ class VideoProcessor:
             start_time: 开始时间（秒）
             end_time: 结束时间（秒）
             output_path: 输出路径，不传则自动生成
+            reencode: 是否重新编码（帧精确边界，输出0秒严格对应 start_time）
 
         Returns:
             输出文件路径
@@ -111,17 +212,29 @@ class VideoProcessor:
                 Path(self.output_dir) / f"clip_{uuid.uuid4().hex}.mp4"
             )
 
+        # 流复制只能从关键帧开始，显式对齐到 start_time 之前的关键帧，
+        # 保证片段完整包含所选内容且无需重新编码
+        if not reencode:
+            start_time = self.snap_to_keyframe(video_path, start_time, mode="floor")
+
         duration = end_time - start_time
 
+        if reencode:
+            output_args = {
+                'vcodec': 'libx264',
+                'crf': 18,
+                'preset': 'veryfast',
+                'pix_fmt': 'yuv420p',
+                'acodec': 'aac'
+            }
+        else:
+            output_args = {'c': 'copy', 'avoid_negative_ts': 'make_zero'}
+
         try:
             (
                 ffmpeg
                 .input(video_path, ss=start_time, t=duration)
-                .output(
-                    output_path,
-                    c='copy',
-                    avoid_negative_ts='make_zero'
-                )
+                .output(output_path, **output_args)
                 .overwrite_output()
                 .run(quiet=True)
             )
@@ -131,6 +244,8 @@ class VideoProcessor:
             logger.error(f"Error cutting clip: {e}")
             raise
 
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="merge_clips")
+    @traced("video_processor.merge_clips")
     def merge_clips(
         self,
         clip_paths: List[str],
@@ -176,13 +291,79 @@ class VideoProcessor:
             if os.path.exists(list_file):
                 os.remove(list_file)
 
+    def cut_clips(
+        self,
+        video_path: str,
+        clips: List[Tuple[float, float]],
+        output_paths: List[str],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> List[str]:
+        """
+        并发剪切多个片段（流复制，各片段互不依赖）
+
+        Args:
+            video_path: 源视频路径
+            clips: 片段列表 [(start, end), ...]
+            output_paths: 与片段一一对应的输出路径
+            on_progress: 进度回调 (0-100)，每完成一个片段调用一次
+
+        Returns:
+            输出文件路径列表（与 clips 顺序一致）；任一片段失败时删除已生成的文件并抛出异常
+        """
+        return self._run_per_clip(
+            lambda start, end, output_path, workers: self.cut_clip(video_path, start, end, output_path),
+            clips, output_paths, on_progress
+        )
+
+    def _run_per_clip(
+        self,
+        task: Callable[[float, float, str, int], str],
+        clips: List[Tuple[float, float]],
+        output_paths: List[str],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> List[str]:
+        """
+        在 cut_workers 限定的线程池中并发处理每个片段
+
+        Args:
+            task: task(start, end, output_path, 并发数)，生成一个片段文件
+            clips: 片段列表 [(start, end), ...]
+            output_paths: 与片段一一对应的输出路径
+            on_progress: 进度回调 (0-100)，每完成一个片段调用一次
+
+        Returns:
+            输出文件路径列表（与 clips 顺序一致）；任一片段失败时删除已生成的文件并抛出异常
+        """
+        report = on_progress or (lambda progress: None)
+        workers = max(1, min(self.cut_workers, len(clips)))
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        contextvars.copy_context().run, task, start, end, output_path, workers
+                    )
+                    for (start, end), output_path in zip(clips, output_paths)
+                ]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    report(100 * done // len(futures))
+        except Exception:
+            for path in output_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        return list(output_paths)
+
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="export_clips")
+    @traced("video_processor.export_clips")
     def export_clips(
         self,
         video_path: str,
         clips: List[Tuple[float, float]],
         merge: bool = True,
-        resolution: str = "1080p"
-    ) -> str:
+        resolution: str = "1080p",
+        on_progress: Optional[Callable[[str, int], None]] = None
+    ) -> List[str]:
         """
         导出选中的片段
 
@@ -190,40 +371,162 @@ class VideoProcessor:
             video_path: 源视频路径
             clips: 片段列表 [(start, end), ...]
             merge: 是否合并为单个视频
-            resolution: 输出分辨率
+            resolution: 输出分辨率（仅在源视频更高时缩小）
+            on_progress: 进度回调 (stage, progress)
 
         Returns:
-            输出文件路径（合并模式）或目录路径（分开模式）
+            输出文件路径列表：合并模式只有一个文件，分开模式与 clips 一一对应
         """
-        resolution_map = {
-            "480p": (854, 480),
-            "720p": (1280, 720),
-            "1080p": (1920, 1080),
-            "4k": (3840, 2160)
-        }
-
-        width, height = resolution_map.get(resolution, (1920, 1080))
-
-        clip_paths = []
-        for i, (start, end) in enumerate(clips):
-            clip_path = str(
-                Path(self.output_dir) / f"temp_clip_{i}_{uuid.uuid4().hex}.mp4"
+        width, height = RESOLUTIONS.get(resolution, RESOLUTIONS["1080p"])
+
+        report = on_progress or (lambda stage, progress: None)
+
+        # 只在源视频高于目标分辨率时缩小，此时需要重新编码，改用并行分块转码
+        source_height = self.get_video_info(video_path).get('height') or 0
+        if source_height > height:
+            return self._export_scaled(video_path, clips, merge, height, report)
+
+        if not merge or len(clips) == 1:
+            # 分开导出：每个片段即为一个导出文件
+            output_paths = [
+                str(Path(self.output_dir) / f"clip_{uuid.uuid4().hex}.mp4") for _ in clips
+            ]
+            return self.cut_clips(
+                video_path, clips, output_paths,
+                on_progress=lambda progress: report("cutting", progress * 95 // 100)
             )
-            self.cut_clip(video_path, start, end, clip_path)
-            clip_paths.append(clip_path)
 
-        if merge and len(clip_paths) > 1:
-            output_path = self.merge_clips(clip_paths)
+        clip_paths = [
+            str(Path(self.output_dir) / f"temp_clip_{i}_{uuid.uuid4().hex}.mp4")
+            for i in range(len(clips))
+        ]
+        self.cut_clips(
+            video_path, clips, clip_paths,
+            on_progress=lambda progress: report("cutting", progress * 90 // 100)
+        )
+
+        report("merging", 90)
+        try:
+            return [self.merge_clips(clip_paths)]
+        finally:
             # 清理临时文件
             for path in clip_paths:
                 if os.path.exists(path):
                     os.remove(path)
-            return output_path
-        elif len(clip_paths) == 1:
-            return clip_paths[0]
+
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="export_renditions")
+    @traced("video_processor.export_renditions")
+    def export_renditions(
+        self,
+        video_path: str,
+        clips: List[Tuple[float, float]],
+        profiles: List[dict],
+        on_progress: Optional[Callable[[str, int], None]] = None
+    ) -> List[str]:
+        """
+        一次解码导出多个分辨率版本
+
+        所有片段拼接后经 split/asplit 分流到各版本的缩放和编码器，
+        在同一个 ffmpeg 进程中同时写出全部文件，源视频只解码一次。
+
+        Args:
+            video_path: 源视频路径
+            clips: 片段列表 [(start, end), ...]
+            profiles: 输出配置列表 [{"resolution", "crf", "preset", "audio_bitrate"}, ...]，
+                      目标高于源视频时保持原尺寸
+            on_progress: 进度回调 (stage, progress)
+
+        Returns:
+            与 profiles 一一对应的输出文件路径列表
+        """
+        report = on_progress or (lambda stage, progress: None)
+        info = self.get_video_info(video_path)
+        source_height = info.get('height') or 0
+        has_audio = info.get('has_audio', False)
+
+        inputs = [ffmpeg.input(video_path, ss=start, t=end - start) for start, end in clips]
+        if len(inputs) == 1:
+            video = inputs[0].video
+            audio = inputs[0].audio if has_audio else None
         else:
-            return self.output_dir
+            streams = [s for i in inputs for s in ((i.video, i.audio) if has_audio else (i.video,))]
+            joined = ffmpeg.concat(*streams, v=1, a=1 if has_audio else 0).node
+            video = joined[0]
+            audio = joined[1] if has_audio else None
+
+        count = len(profiles)
+        videos = video.filter_multi_output('split', count) if count > 1 else None
+        audios = audio.filter_multi_output('asplit', count) if audio is not None and count > 1 else None
+
+        token = uuid.uuid4().hex
+        output_paths = []
+        outputs = []
+        for i, profile in enumerate(profiles):
+            resolution = profile["resolution"]
+            height = RESOLUTIONS.get(resolution, RESOLUTIONS["1080p"])[1]
+            stream = videos[i] if videos is not None else video
+            if source_height > height:
+                stream = stream.filter('scale', -2, height)
+            output_path = str(Path(self.output_dir) / f"rendition_{token}_{resolution}.mp4")
+            output_paths.append(output_path)
+
+            args = {
+                'vcodec': 'libx264',
+                'crf': profile.get("crf", 20),
+                'preset': profile.get("preset", "veryfast"),
+                'pix_fmt': 'yuv420p',
+                'movflags': '+faststart'
+            }
+            streams = [stream]
+            if audio is not None:
+                streams.append(audios[i] if audios is not None else audio)
+                args.update(acodec='aac', audio_bitrate=profile.get("audio_bitrate", "128k"))
+            outputs.append(ffmpeg.output(*streams, output_path, **args))
+
+        report("encoding", 0)
+        try:
+            ffmpeg.merge_outputs(*outputs).overwrite_output().run(quiet=True)
+        except Exception as e:
+            logger.error(f"Error exporting renditions: {e}")
+            for path in output_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        report("encoding", 95)
+        logger.info(f"Renditions exported: {output_paths}")
+        return output_paths
 
+    def _export_scaled(
+        self,
+        video_path: str,
+        clips: List[Tuple[float, float]],
+        merge: bool,
+        height: int,
+        report: Callable[[str, int], None]
+    ) -> List[str]:
+        """
+        缩放导出：合并模式所有片段一次分块转码；分开模式各片段在 cut_workers 限定的
+        线程池中并发转码，分块转码的进程数和线程数在并发片段间均分
+        """
+        if merge or len(clips) == 1:
+            prefix = "merged" if len(clips) > 1 else "clip"
+            output_path = str(Path(self.output_dir) / f"{prefix}_{uuid.uuid4().hex}.mp4")
+            return [self.chunked_encoder.transcode(
+                video_path, clips, output_path, height=height,
+                on_progress=lambda progress: report("encoding", progress * 95 // 100)
+            )]
+
+        output_paths = [str(Path(self.output_dir) / f"clip_{uuid.uuid4().hex}.mp4") for _ in clips]
+        return self._run_per_clip(
+            lambda start, end, output_path, workers: self.chunked_encoder.transcode(
+                video_path, [(start, end)], output_path, height=height, concurrency=workers
+            ),
+            clips, output_paths,
+            lambda progress: report("encoding", progress * 95 // 100)
+        )
+
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="generate_preview")
+    @traced("video_processor.generate_preview")
     def generate_preview(
         self,
         video_path: str,
@@ -264,6 +567,8 @@ class VideoProcessor:
             logger.error(f"Error generating preview: {e}")
             raise
 
+    @timed(VIDEO_PROCESSOR_SECONDS, operation="split_video")
+    @traced("video_processor.split_video")
     def split_video(
         self,
         video_path: str,
@@ -280,6 +585,9 @@ class VideoProcessor:
 
         Returns:
             片段信息列表 [{"path": str, "start": float, "end": float, "index": int}, ...]
+
+        每个分段旁写一个同名 .json 记录其在源视频中的真实边界（边界对齐关键帧，
+        不是分段时长的整数倍），重启恢复时据此还原时间范围。
         """
         if output_dir is None:
             output_dir = str(Path(self.output_dir) / "segments")
@@ -292,12 +600,22 @@ class VideoProcessor:
             logger.error(f"Cannot get video duration: {video_path}")
             return []
 
+        # 分段边界对齐到距离整段位置最近的关键帧，相邻分段首尾相接、无重叠
+        boundaries = [0.0]
+        target = segment_duration
+        while target < total_duration:
+            boundary = self.snap_to_keyframe(video_path, target, mode="nearest")
+            if boundary <= boundaries[-1] or boundary >= total_duration:
+                boundary = self.snap_to_keyframe(video_path, target, mode="ceil")
+            if boundary <= boundaries[-1] or boundary >= total_duration:
+                break
+            boundaries.append(boundary)
+            target = boundary + segment_duration
+        boundaries.append(total_duration)
+
         segments = []
-        segment_index = 0
-        current_time = 0.0
 
-        while current_time < total_duration:
-            end_time = min(current_time + segment_duration, total_duration)
+        for segment_index, (current_time, end_time) in enumerate(zip(boundaries, boundaries[1:])):
             segment_id = uuid.uuid4().hex[:8]
             output_path = str(Path(output_dir) / f"segment_{segment_index}_{segment_id}.mp4")
 
@@ -315,21 +633,21 @@ class VideoProcessor:
                     .run(quiet=True)
                 )
 
-                segments.append({
+                segment = {
                     "path": output_path,
                     "start": current_time,
                     "end": end_time,
                     "index": segment_index,
                     "duration": duration
-                })
+                }
+                with open(Path(output_path).with_suffix(".json"), 'w') as f:
+                    json.dump(dict(segment, source=video_path), f)
+                segments.append(segment)
 
                 logger.info(f"Segment {segment_index} created: {output_path} ({current_time:.1f}s - {end_time:.1f}s)")
 
             except Exception as e:
                 logger.error(f"Error creating segment {segment_index}: {e}")
 
-            current_time = end_time
-            segment_index += 1
-
         logger.info(f"Video split into {len(segments)} segments")
         return segments
@@ -0,0 +1,53 @@
+import threading
+from typing import Dict
+
+from app.models.schemas import VideoInfo
+
+
+class VideoStore(dict):
+    """
+    视频记录存储（video_id -> VideoInfo），维护版本号
+
+    增删记录时自动递增版本号；原地修改记录后须调用 mark_changed，
+    列表接口据此生成 ETag，未变化时直接返回 304。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+        # video_id -> 该视频最近一次变更时的版本号
+        self.versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _bump(self, video_id: str = None) -> int:
+        with self._lock:
+            self.version += 1
+            if video_id is not None:
+                self.versions[video_id] = self.version
+            return self.version
+
+    def mark_changed(self, video_id: str) -> int:
+        """记录一次原地修改，返回新的版本号"""
+        return self._bump(video_id)
+
+    def __setitem__(self, video_id: str, video: VideoInfo) -> None:
+        super().__setitem__(video_id, video)
+        self._bump(video_id)
+
+    def __delitem__(self, video_id: str) -> None:
+        super().__delitem__(video_id)
+        self.versions.pop(video_id, None)
+        self._bump()
+
+    def pop(self, video_id: str, *default):
+        existed = video_id in self
+        result = super().pop(video_id, *default)
+        if existed:
+            self.versions.pop(video_id, None)
+            self._bump()
+        return result
+
+    def clear(self) -> None:
+        super().clear()
+        self.versions.clear()
+        self._bump()
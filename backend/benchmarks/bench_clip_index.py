@@ -0,0 +1,113 @@
+"""
+片段区间索引基准：先与逐个扫描的暴力实现对比查询结果，再测量点查询、区间查询和去重耗时
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_clip_index --clips 20000 --queries 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from app.models.schemas import ClipInfo
+from app.services.clip_index import ClipIndex
+
+
+def make_clips(count: int, duration: float, rng: random.Random) -> list:
+    """随机片段，包含零时长片段和端点重合的片段（按整秒取值）"""
+    clips = []
+    for i in range(count):
+        start = float(rng.randint(0, int(duration)))
+        end = start + float(rng.choice([0, 0, 1, 2, 5, 10, 30, 60]))
+        clips.append(ClipInfo(
+            id=f"clip_{i}",
+            start_time="00:00:00",
+            end_time="00:00:00",
+            start_seconds=start,
+            end_seconds=end,
+            description="",
+            highlight_type="bench",
+            score=rng.random()
+        ))
+    return clips
+
+
+def brute_at(clips, t: float) -> set:
+    return {c.id for c in clips if c.start_seconds <= t <= c.end_seconds}
+
+
+def brute_overlapping(clips, start: float, end: float) -> set:
+    return {c.id for c in clips if min(end, c.end_seconds) - max(start, c.start_seconds) > 0}
+
+
+def check(index: ClipIndex, clips, queries, rng: random.Random) -> int:
+    """对比索引与暴力实现的结果，返回不一致的查询数"""
+    mismatches = 0
+    for t in queries:
+        if {c.id for c in index.at(t)} != brute_at(clips, t):
+            mismatches += 1
+        start = t + rng.choice([-5, -1, 0, 0.5])
+        end = start + rng.choice([0, 1, 3, 20])
+        if {c.id for c in index.overlapping(start, end)} != brute_overlapping(clips, start, end):
+            mismatches += 1
+    # 已知边界：零时长片段落在查询区间内部、查询端点与片段端点重合
+    for clip in clips[:50]:
+        for start, end in (
+            (clip.start_seconds - 2, clip.end_seconds + 2),
+            (clip.end_seconds, clip.end_seconds + 1),
+            (clip.start_seconds - 1, clip.start_seconds),
+        ):
+            if {c.id for c in index.overlapping(start, end)} != brute_overlapping(clips, start, end):
+                mismatches += 1
+    return mismatches
+
+
+def per_query_ms(func, queries) -> float:
+    started = time.perf_counter()
+    for t in queries:
+        func(t)
+    return (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clip interval index benchmark")
+    parser.add_argument("--clips", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=36000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    clips = make_clips(args.clips, args.duration, rng)
+    queries = [float(rng.randint(0, int(args.duration))) for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    index = ClipIndex(clips)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    mismatches = check(index, clips, queries, rng)
+    started = time.perf_counter()
+    kept, suppressed = index.suppress(0.6, metric="iou")
+    suppress_ms = (time.perf_counter() - started) * 1000
+
+    results = {
+        "clips": args.clips,
+        "queries": args.queries,
+        "mismatches": mismatches,
+        "build_ms": round(build_ms, 2),
+        "at_index_ms": round(per_query_ms(index.at, queries), 4),
+        "at_scan_ms": round(per_query_ms(lambda t: brute_at(clips, t), queries), 4),
+        "overlapping_index_ms": round(per_query_ms(lambda t: index.overlapping(t, t + 30), queries), 4),
+        "overlapping_scan_ms": round(
+            per_query_ms(lambda t: brute_overlapping(clips, t, t + 30), queries), 4
+        ),
+        "suppress_ms": round(suppress_ms, 2),
+        "suppressed": len(suppressed),
+    }
+    print(json.dumps(results, indent=2))
+    if mismatches:
+        raise SystemExit(f"{mismatches} queries differ from brute force")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+特征提取基准：验证单次低分辨率解码的特征提取远快于实时
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_features --durations 60 600 --min-realtime 20
+"""
+import argparse
+import json
+import sys
+import tempfile
+
+from benchmarks.common import make_synthetic_video, Timer
+from app.services.video_processor import VideoProcessor
+from app.services.feature_extractor import FeatureExtractor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature extraction benchmark")
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 600])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--work-dir", default=None)
+    parser.add_argument("--min-realtime", type=float, default=20.0,
+                        help="realtime factor below which the run fails")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bench_features_")
+    processor = VideoProcessor(output_dir=work_dir)
+    extractor = FeatureExtractor(processor, output_dir=work_dir)
+
+    results = []
+    for duration in args.durations:
+        video_path = make_synthetic_video(work_dir, duration, args.width, args.height)
+        with Timer() as timer:
+            meta = extractor.extract(f"bench_{int(duration)}", video_path)
+        results.append({
+            "duration": duration,
+            "resolution": f"{args.width}x{args.height}",
+            "elapsed_seconds": round(timer.elapsed, 3),
+            "realtime_factor": round(duration / timer.elapsed, 1),
+            "frames": meta["frames"],
+            "scene_cuts": meta["scene_cut_count"]
+        })
+
+    print(json.dumps(results, indent=2))
+
+    slowest = min(r["realtime_factor"] for r in results)
+    if slowest < args.min_realtime:
+        print(f"FAIL: slowest realtime factor {slowest}x < {args.min_realtime}x", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
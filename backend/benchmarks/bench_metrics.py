@@ -0,0 +1,60 @@
+"""
+指标记录开销基准：测量每次 observe/inc/计时装饰器的耗时，以及 /metrics 渲染耗时
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_metrics --iterations 200000
+"""
+import argparse
+import json
+import time
+
+from app.services.metrics import Counter, Histogram, Registry, timed
+
+
+def per_call_ns(func, iterations: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter_ns() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics recording overhead benchmark")
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    registry = Registry()
+    histogram = registry.register(Histogram("bench_seconds", "bench", ["operation"]))
+    counter = registry.register(Counter("bench_total", "bench", ["kind"]))
+
+    def noop():
+        pass
+
+    timed_noop = timed(histogram, operation="noop")(noop)
+
+    baseline = per_call_ns(noop, args.iterations)
+    results = {
+        "iterations": args.iterations,
+        "noop_call_ns": round(baseline, 1),
+        "histogram_observe_ns": round(
+            per_call_ns(lambda: histogram.observe(0.42, operation="cut_clip"), args.iterations), 1
+        ),
+        "counter_inc_ns": round(
+            per_call_ns(lambda: counter.inc(1024, kind="video"), args.iterations), 1
+        ),
+        "timed_decorator_overhead_ns": round(
+            per_call_ns(timed_noop, args.iterations) - baseline, 1
+        ),
+    }
+
+    for i in range(50):
+        histogram.observe(0.1, operation=f"op_{i}")
+    started = time.perf_counter()
+    registry.render()
+    results["render_ms_50_series"] = round((time.perf_counter() - started) * 1000, 3)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+媒体处理流水线基准：在合成视频上测量 VideoProcessor 各操作的吞吐、峰值内存和写盘量
+
+每个操作在独立的 fork 子进程中执行，结果以 JSON 输出，便于跨提交对比。
+不需要网络或 API 密钥。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_pipeline --durations 30 120 --resolutions 1280x720 1920x1080 \
+        --output bench_pipeline.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import make_synthetic_video, run_isolated
+from app.services.video_processor import VideoProcessor
+from app.services.chunked_encoder import ChunkedEncoder
+from app.services.reframer import Reframer
+
+OPERATIONS = (
+    "get_video_info", "split_video", "cut_clip", "cut_clip_reencode",
+    "merge_clips", "export_clips", "generate_preview", "generate_thumbnail",
+    "transcode_single", "transcode_chunked", "reframe_trajectory", "reframe_export"
+)
+
+
+def environment() -> dict:
+    """记录运行环境，便于解释跨机器差异"""
+    def command_output(args):
+        try:
+            return subprocess.run(args, capture_output=True, text=True, check=True).stdout.splitlines()[0]
+        except (OSError, subprocess.CalledProcessError, IndexError):
+            return None
+
+    return {
+        "commit": command_output(["git", "rev-parse", "--short", "HEAD"]),
+        "ffmpeg": command_output(["ffmpeg", "-version"]),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.time()
+    }
+
+
+def clip_ranges(duration: float, count: int = 3):
+    """在视频中均匀取 count 个片段，每段不超过10秒"""
+    length = min(10.0, duration / (2 * count))
+    step = duration / count
+    return [(i * step + length / 2, i * step + length * 1.5) for i in range(count)]
+
+
+def bench_case(work_dir: str, duration: float, width: int, height: int, operations) -> list:
+    video_path = make_synthetic_video(str(Path(work_dir) / "inputs"), duration, width, height)
+    output_dir = str(Path(work_dir) / f"outputs_{int(duration)}s_{width}x{height}")
+    processor = VideoProcessor(output_dir=output_dir)
+    ranges = clip_ranges(duration)
+    clip_seconds = sum(end - start for start, end in ranges)
+
+    # 整段缩放转码：单进程与按核数并行分块对比
+    single_encoder = ChunkedEncoder(processor, workers=1)
+    chunked_encoder = ChunkedEncoder(processor, min_chunk_seconds=1)
+    transcode_path = str(Path(output_dir) / "transcoded.mp4")
+    reframer = Reframer(processor)
+
+    # 合并基准的输入片段在计时外准备好
+    clip_paths = []
+    if "merge_clips" in operations:
+        clip_paths = [processor.cut_clip(video_path, start, end) for start, end in ranges]
+
+    # 操作名 -> (操作, 处理的媒体时长)
+    cases = {
+        "get_video_info": (lambda: processor.get_video_info(video_path), duration),
+        "split_video": (
+            lambda: len(processor.split_video(video_path, segment_duration=max(duration / 4, 1))),
+            duration
+        ),
+        "cut_clip": (lambda: processor.cut_clip(video_path, *ranges[0]), ranges[0][1] - ranges[0][0]),
+        "cut_clip_reencode": (
+            lambda: processor.cut_clip(video_path, *ranges[0], reencode=True),
+            ranges[0][1] - ranges[0][0]
+        ),
+        "merge_clips": (lambda: processor.merge_clips(clip_paths), clip_seconds),
+        "export_clips": (lambda: processor.export_clips(video_path, ranges, merge=True), clip_seconds),
+        "generate_preview": (
+            lambda: processor.generate_preview(video_path, duration / 2, min(10.0, duration / 2)),
+            min(10.0, duration / 2)
+        ),
+        "generate_thumbnail": (
+            lambda: processor.generate_thumbnail(video_path, duration / 2, "bench", "thumb"),
+            None
+        ),
+        "transcode_single": (
+            lambda: single_encoder.transcode(video_path, [(0, duration)], transcode_path, height=480),
+            duration
+        ),
+        "transcode_chunked": (
+            lambda: chunked_encoder.transcode(video_path, [(0, duration)], transcode_path, height=480),
+            duration
+        ),
+        # 竖屏重构图：轨迹分析单独计时，与 export_clips 对比整体开销
+        "reframe_trajectory": (
+            lambda: len(reframer.trajectory(video_path, 0, duration, 9 / 16 * height / width)[0]),
+            duration
+        ),
+        "reframe_export": (lambda: reframer.export(video_path, ranges, "9:16"), clip_seconds)
+    }
+
+    results = []
+    for name in operations:
+        func, media_seconds = cases[name]
+        measurement = run_isolated(func, output_dir)
+        elapsed = measurement["elapsed_seconds"]
+        results.append({
+            "operation": name,
+            "duration": duration,
+            "resolution": f"{width}x{height}",
+            "media_seconds": round(media_seconds, 3) if media_seconds else None,
+            "elapsed_seconds": round(elapsed, 4),
+            "realtime_factor": round(media_seconds / elapsed, 2) if media_seconds and elapsed > 0 else None,
+            "peak_rss_bytes": measurement["peak_rss_bytes"],
+            "ffmpeg_peak_rss_bytes": measurement["ffmpeg_peak_rss_bytes"],
+            "disk_bytes_written": measurement["disk_bytes_written"]
+        })
+        print(
+            f"{name:<20} {duration:>6.0f}s {width}x{height}  {elapsed:8.3f}s  "
+            f"rt={results[-1]['realtime_factor']}",
+            file=sys.stderr
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Media pipeline benchmark")
+    parser.add_argument("--durations", type=float, nargs="+", default=[30, 120])
+    parser.add_argument("--resolutions", nargs="+", default=["1280x720", "1920x1080"])
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--work-dir", default=None, help="synthetic inputs are cached here")
+    parser.add_argument("--output", default=None, help="JSON output path, stdout if omitted")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="bench_pipeline_")
+
+    results = []
+    for resolution in args.resolutions:
+        width, height = (int(v) for v in resolution.lower().split("x"))
+        for duration in args.durations:
+            results.extend(bench_case(work_dir, duration, width, height, args.operations))
+
+    report = {"environment": environment(), "results": results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
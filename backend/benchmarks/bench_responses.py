@@ -0,0 +1,127 @@
+"""
+片段/视频接口响应基准：在内存中构造一个含数百个片段的视频，
+对比默认 JSON 编码与预序列化缓存路径的每秒请求数和响应体大小
+
+请求直接经 ASGI 发往应用，不经过网络，结果反映序列化与框架开销；
+压缩场景的耗时包含客户端解压。未安装 brotli 时 br 场景会协商为 gzip。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_responses --clips 500 --requests 2000 --concurrency 16
+"""
+import asyncio
+import argparse
+import json
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.main import app
+from app.models.schemas import ClipInfo, ClipsResponse, VideoInfo, VideoStatus
+from app.routers.video import video_store
+from app.services.video_analyzer import seconds_to_time_str
+
+
+def make_video(clip_count: int) -> VideoInfo:
+    clips = []
+    for i in range(clip_count):
+        start = i * 12.5
+        clips.append(ClipInfo(
+            id=uuid.uuid4().hex[:8],
+            start_time=seconds_to_time_str(start),
+            end_time=seconds_to_time_str(start + 10),
+            start_seconds=start,
+            end_seconds=start + 10,
+            description=f"第{i + 1}个精彩片段：主角在关键时刻完成了一次漂亮的动作，观众反应热烈",
+            highlight_type="action",
+            score=0.5 + (i % 50) / 100
+        ))
+    video_id = uuid.uuid4().hex
+    return VideoInfo(
+        video_id=video_id,
+        filename="bench.mp4",
+        file_path="/dev/null",
+        status=VideoStatus.ANALYZED,
+        duration=clip_count * 12.5,
+        width=1920,
+        height=1080,
+        fps=30.0,
+        clips=clips
+    )
+
+
+def legacy_app() -> FastAPI:
+    """与优化前实现相同的接口：每次请求构建模型并走 FastAPI 默认编码"""
+    legacy = FastAPI()
+
+    @legacy.get("/api/clips/{video_id}", response_model=ClipsResponse)
+    async def get_clips(video_id: str):
+        if video_id not in video_store:
+            raise HTTPException(status_code=404, detail="Video not found")
+        video = video_store[video_id]
+        return ClipsResponse(video_id=video_id, clips=video.clips, total_count=len(video.clips))
+
+    return legacy
+
+
+async def measure(target, path: str, requests: int, concurrency: int, headers: dict) -> dict:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+        size = response.num_bytes_downloaded
+        encoding = response.headers.get("content-encoding", "identity")
+
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                (await client.get(path, headers=headers)).raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "response_bytes": size,
+        "content_encoding": encoding
+    }
+
+
+async def run(args) -> dict:
+    video = make_video(args.clips)
+    video_store[video.video_id] = video
+    path = f"/api/clips/{video.video_id}"
+
+    cases = {
+        "legacy": (legacy_app(), {"Accept-Encoding": "identity"}),
+        "cached": (app, {"Accept-Encoding": "identity"}),
+        "cached_gzip": (app, {"Accept-Encoding": "gzip"}),
+        "cached_br": (app, {"Accept-Encoding": "br, gzip"}),
+    }
+    results = {"clips": args.clips, "requests": args.requests, "concurrency": args.concurrency}
+    for name, (target, headers) in cases.items():
+        results[name] = await measure(target, path, args.requests, args.concurrency, headers)
+
+    results["speedup"] = round(
+        results["cached"]["requests_per_second"] / results["legacy"]["requests_per_second"], 2
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clip list response benchmark")
+    parser.add_argument("--clips", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""基准测试公共工具：用 ffmpeg lavfi 源生成确定性的合成视频"""
+import ffmpeg
+import os
+import sys
+import time
+import resource
+import multiprocessing
+from pathlib import Path
+from typing import Callable, Dict
+
+
+def make_synthetic_video(
+    output_dir: str,
+    duration: float,
+    width: int = 1280,
+    height: int = 720,
+    fps: int = 30,
+    gop: int = 60
+) -> str:
+    """
+    生成合成测试视频（testsrc2 画面 + sine 音频），相同参数结果相同，已存在则复用
+
+    Args:
+        output_dir: 输出目录
+        duration: 时长（秒）
+        width: 宽度
+        height: 高度
+        fps: 帧率
+        gop: 关键帧间隔（帧）
+
+    Returns:
+        视频文件路径
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    path = str(Path(output_dir) / f"synthetic_{int(duration)}s_{width}x{height}_{fps}fps.mp4")
+    if os.path.exists(path):
+        return path
+
+    video = ffmpeg.input(
+        f"testsrc2=size={width}x{height}:rate={fps}:duration={duration}", f='lavfi'
+    )
+    audio = ffmpeg.input(f"sine=frequency=440:sample_rate=48000:duration={duration}", f='lavfi')
+    temp_path = path + ".tmp.mp4"
+    (
+        ffmpeg
+        .output(
+            video, audio, temp_path,
+            vcodec='libx264', preset='veryfast', pix_fmt='yuv420p',
+            g=gop, acodec='aac', audio_bitrate='128k',
+            fflags='+bitexact', flags='+bitexact'
+        )
+        .overwrite_output()
+        .run(quiet=True)
+    )
+    os.replace(temp_path, path)
+    return path
+
+
+class Timer:
+    """简单计时上下文"""
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+
+
+def peak_rss_bytes(who: int = resource.RUSAGE_SELF) -> int:
+    """当前进程（或已回收子进程）的峰值常驻内存（字节）"""
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def snapshot_files(directory: str) -> Dict[str, int]:
+    """记录目录下所有文件的大小"""
+    sizes = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError:
+                continue
+    return sizes
+
+
+def bytes_written(before: Dict[str, int], after: Dict[str, int]) -> int:
+    """两次快照之间新增或变大的文件字节数"""
+    return sum(max(0, size - before.get(path, 0)) for path, size in after.items())
+
+
+def run_isolated(func: Callable[[], object], work_dir: str) -> dict:
+    """
+    在 fork 出的子进程中执行一次操作，使峰值内存不受之前操作影响
+
+    Args:
+        func: 无参操作，返回值需可 pickle
+        work_dir: 统计写盘字节数的目录
+
+    Returns:
+        {"elapsed_seconds", "peak_rss_bytes", "ffmpeg_peak_rss_bytes", "disk_bytes_written", "result"}
+    """
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+
+    def target():
+        before = snapshot_files(work_dir)
+        with Timer() as timer:
+            result = func()
+        sender.send({
+            "elapsed_seconds": timer.elapsed,
+            "peak_rss_bytes": peak_rss_bytes(resource.RUSAGE_SELF),
+            "ffmpeg_peak_rss_bytes": peak_rss_bytes(resource.RUSAGE_CHILDREN),
+            "disk_bytes_written": bytes_written(before, snapshot_files(work_dir)),
+            "result": result
+        })
+
+    process = context.Process(target=target)
+    process.start()
+    sender.close()
+    try:
+        measurement = receiver.recv()
+    except EOFError:
+        measurement = None
+    process.join()
+    if process.exitcode != 0 or measurement is None:
+        raise RuntimeError(f"Benchmark operation failed with exit code {process.exitcode}")
+    return measurement
@@ -0,0 +1,71 @@
+"""
+兼容 OpenAI 协议的本地模拟模型服务，用于离线压测完整分析流程
+
+优先回放录制目录中匹配的响应，没有匹配时返回确定性的合成片段；
+可注入延迟、错误率和流式分块。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.mock_llm_server --port 9000 --latency 2 --error-rate 0.05
+
+然后设置 ZHIPU_BASE_URL=http://localhost:9000/v1/ 和任意 ZHIPU_API_KEY 启动后端。
+"""
+import argparse
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.services.llm_transport import ReplayTransport, ResponseShaper
+
+
+def create_app(transport: ReplayTransport) -> FastAPI:
+    app = FastAPI(title="Mock LLM server")
+
+    @app.post("/{prefix:path}chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.body()
+        upstream = httpx.Request("POST", str(request.url), content=body)
+        # 回放中的延迟为阻塞 sleep，放到线程池执行
+        response = await run_in_threadpool(transport.handle_request, upstream)
+        return StreamingResponse(
+            response.stream,
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type")
+        )
+
+    @app.get("/{prefix:path}models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--cassettes", default="./llm_cassettes", help="recorded exchanges to replay")
+    parser.add_argument("--strict", action="store_true", help="404 instead of synthetic responses")
+    parser.add_argument("--latency", type=float, default=None,
+                        help="seconds per request, recorded latency if omitted")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-size", type=int, default=0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--video-duration", type=float, default=300.0,
+                        help="range of synthetic clip timestamps in seconds")
+    args = parser.parse_args()
+
+    transport = ReplayTransport(
+        args.cassettes,
+        ResponseShaper(args.latency, args.error_rate, args.chunk_size, args.chunk_delay, args.seed),
+        strict=args.strict,
+        video_duration=args.video_duration
+    )
+    uvicorn.run(create_app(transport), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
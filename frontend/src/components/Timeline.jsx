@@ -1,3 +1,5 @@
+import { useMemo } from 'react';
+
 function Timeline({
   duration,
   currentTime,
@@ -20,6 +22,27 @@ function Timeline({
     }
   };
 
+  // 选中集合与重叠片段的分行布局只在数据变化时计算，避免每次渲染（播放头移动）都遍历
+  const selectedSet = useMemo(() => new Set(selectedClips || []), [selectedClips]);
+
+  // 按开始时间扫描，把片段放入第一个已空出的行，重叠的片段不再互相遮挡
+  const { lanes, laneCount } = useMemo(() => {
+    const sorted = [...(clips || [])].sort((a, b) => a.start_seconds - b.start_seconds);
+    const laneEnds = [];
+    const assigned = {};
+    for (const clip of sorted) {
+      let lane = laneEnds.findIndex((end) => end <= clip.start_seconds);
+      if (lane === -1) {
+        lane = laneEnds.length;
+        laneEnds.push(clip.end_seconds);
+      } else {
+        laneEnds[lane] = clip.end_seconds;
+      }
+      assigned[clip.id] = lane;
+    }
+    return { lanes: assigned, laneCount: Math.max(laneEnds.length, 1) };
+  }, [clips]);
+
   const getClipPosition = (clip) => {
     const left = (clip.start_seconds / duration) * 100;
     const width = ((clip.end_seconds - clip.start_seconds) / duration) * 100;
@@ -69,16 +92,23 @@ function Timeline({
         {/* 片段块 */}
         {clips?.map((clip) => {
           const { left, width } = getClipPosition(clip);
-          const isSelected = selectedClips?.includes(clip.id);
+          const isSelected = selectedSet.has(clip.id);
+          const lane = lanes[clip.id] || 0;
           return (
             <div
               key={clip.id}
               className={`
-                absolute top-2 bottom-2 rounded cursor-pointer
+                absolute rounded cursor-pointer
                 transition-all duration-200
                 ${isSelected ? 'bg-accent' : 'bg-accent/50 hover:bg-accent/70'}
               `}
-              style={{ left, width, minWidth: '4px' }}
+              style={{
+                left,
+                width,
+                minWidth: '4px',
+                top: `calc(0.5rem + ${lane} * (100% - 1rem) / ${laneCount})`,
+                height: `calc((100% - 1rem) / ${laneCount} - 1px)`,
+              }}
               onClick={(e) => {
                 e.stopPropagation();
                 onClipClick?.(clip);
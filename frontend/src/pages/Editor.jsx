@@ -3,7 +3,7 @@ import Sidebar from '../components/Sidebar';
 import VideoPlayer from '../components/VideoPlayer';
 import ParamsPanel from '../components/ParamsPanel';
 import Timeline from '../components/Timeline';
-import { videoApi, clipsApi } from '../services/api';
+import { videoApi, clipsApi, eventsApi } from '../services/api';
 import { PRESET_PROMPTS } from '../components/PromptSelector';
 
 function Editor() {
@@ -117,6 +117,20 @@ function Editor() {
 
       await videoApi.analyze(videoId, promptToUse);
 
+      // 等待服务端推送分析完成事件
+      await new Promise((resolve, reject) => {
+        const unsubscribe = eventsApi.subscribe([videoId], (event) => {
+          if (event.type !== 'status') return;
+          if (event.status === 'analyzed') {
+            unsubscribe();
+            resolve();
+          } else if (event.status === 'error') {
+            unsubscribe();
+            reject(new Error(event.error_message || 'Analysis failed'));
+          }
+        });
+      });
+
       // 获取分析结果
       const clipsResult = await clipsApi.getClips(videoId);
       setClips(clipsResult.clips);
@@ -174,6 +188,9 @@ function Editor() {
       if (result.download_url) {
         // 打开下载链接
         window.open(result.download_url, '_blank');
+      } else {
+        // 分开导出：每个片段一个下载链接
+        (result.files || []).forEach((file) => window.open(file.download_url, '_blank'));
       }
 
       alert('导出成功!');
@@ -7,9 +7,9 @@ const api = axios.create({
 
 // 视频相关API
 export const videoApi = {
-  // 获取视频列表
-  list: async () => {
-    const response = await api.get('/videos');
+  // 获取视频列表，params 支持 status、parent_video_id、is_segment、sort、order、limit、cursor
+  list: async (params = {}) => {
+    const response = await api.get('/videos', { params });
     return response.data;
   },
 
@@ -46,9 +46,10 @@ export const videoApi = {
     return response.data;
   },
 
-  // 分析视频
-  analyze: async (videoId, prompt = null) => {
-    const response = await api.post(`/videos/${videoId}/analyze`, { prompt });
+  // 分析视频：template 为内置模板名，mode 为 video（整段视频）、frames（只发送关键帧）或 two_pass（粗筛后精细分析）
+  // templates 传多个模板名时并发分析并合并去重，片段带 template/template_scores
+  analyze: async (videoId, prompt = null, { template = null, templates = [], mode = null } = {}) => {
+    const response = await api.post(`/videos/${videoId}/analyze`, { prompt, template, templates, mode });
     return response.data;
   },
 
@@ -56,6 +57,17 @@ export const videoApi = {
   getStreamUrl: (videoId) => {
     return `/api/videos/${videoId}/stream`;
   },
+
+  // 获取HLS主播放列表地址
+  getHlsUrl: (videoId) => {
+    return `/api/videos/${videoId}/hls/master.m3u8`;
+  },
+
+  // 获取HLS打包状态
+  getHlsStatus: async (videoId) => {
+    const response = await api.get(`/videos/${videoId}/hls`);
+    return response.data;
+  },
 };
 
 // 片段相关API
@@ -92,15 +104,92 @@ export const clipsApi = {
       format: options.format || 'mp4',
       resolution: options.resolution || '1080p',
       merge: options.merge !== false,
+      // 多版本导出，如 [{ resolution: '1080p' }, { resolution: '480p', crf: 28 }]
+      renditions: options.renditions || [],
     });
     return response.data;
   },
 
+  // 查询覆盖某一时间点的片段
+  getClipsAt: async (videoId, t) => {
+    const response = await api.get(`/clips/${videoId}/at`, { params: { t } });
+    return response.data;
+  },
+
+  // 查询与时间区间重叠的片段
+  getOverlappingClips: async (videoId, start, end) => {
+    const response = await api.get(`/clips/${videoId}/overlapping`, { params: { start, end } });
+    return response.data;
+  },
+
+  // 重叠片段去重：mode 为 suppress（非极大值抑制）或 merge（合并），apply 为 true 时直接替换片段列表
+  dedupeClips: async (videoId, { mode = 'suppress', threshold = 0.5, metric = 'iou', gap = 0, apply = false } = {}) => {
+    const response = await api.post(`/clips/${videoId}/dedupe`, { mode, threshold, metric, gap, apply });
+    return response.data;
+  },
+
   // 删除片段
   deleteClip: async (videoId, clipId) => {
     const response = await api.delete(`/clips/${videoId}/${clipId}`);
     return response.data;
   },
+
+  // 批量设置选中状态，clips 为 [{video_id, clip_id}]
+  selectClips: async (clips, selected = true) => {
+    const response = await api.post('/clips/batch/select', { clips, selected });
+    return response.data;
+  },
+
+  // 批量删除片段
+  deleteClips: async (clips) => {
+    const response = await api.post('/clips/batch/delete', { clips });
+    return response.data;
+  },
+
+  // 批量修改片段边界，updates 为 [{video_id, clip_id, start_seconds, end_seconds}]
+  updateClips: async (updates) => {
+    const response = await api.post('/clips/batch/update', { updates });
+    return response.data;
+  },
+};
+
+// 批量分析API
+export const batchesApi = {
+  // 批量分析：videoIds 为视频ID列表，或传 parentVideoId 分析其全部分段
+  analyze: async ({ videoIds = [], parentVideoId = null, prompt = null, priority = 0 } = {}) => {
+    const response = await api.post('/batches', {
+      video_ids: videoIds,
+      parent_video_id: parentVideoId,
+      prompt,
+      priority,
+    });
+    return response.data;
+  },
+
+  // 获取批量进度与结果
+  getStatus: async (batchId) => {
+    const response = await api.get(`/batches/${batchId}`);
+    return response.data;
+  },
+
+  // 取消尚未开始的分析
+  cancel: async (batchId) => {
+    const response = await api.delete(`/batches/${batchId}`);
+    return response.data;
+  },
+};
+
+// 事件推送API（SSE）
+export const eventsApi = {
+  // 订阅视频事件，一个连接可关注多个视频，返回取消订阅函数
+  subscribe: (videoIds, onEvent) => {
+    const query = videoIds && videoIds.length ? `?video_ids=${videoIds.join(',')}` : '';
+    const source = new EventSource(`/api/events${query}`);
+    ['status', 'progress', 'clips', 'export', 'hls', 'video_created'].forEach((type) => {
+      source.addEventListener(type, (event) => onEvent(JSON.parse(event.data)));
+    });
+    return () => source.close();
+  },
 };
 
 export default api;